@@ -1,5 +1,24 @@
-from . import genetic
-from . import genetic_mo
-from . import genetic_mo_pareto
-from . import milp
-from . import heuristic
+import importlib
+
+# solver modules, imported on first access, e.g., algo.milp,
+# so only the used solvers and their dependencies are loaded
+__all__ = [
+    "genetic",
+    "genetic_mo",
+    "genetic_mo_pareto",
+    "milp",
+    "milp_decomp",
+    "heuristic",
+    "pso",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+                         __name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,8 +1,10 @@
 import math
-from algo.util.output import Output
+from contextlib import closing
+from algo.util.output import Output, Feasibility_Checker
 from algo.util.sp import SP_Solver
 from algo.util.brkga import Chromosome, BRKGA
 from algo.util import ga_heuristic
+from algo.util import telemetry as tm
 import numpy
 
 INF = float("inf")
@@ -12,11 +14,15 @@ DEFAULT_STALL_THRESHOLD = 0.0
 
 
 class SP_Chromosome(Chromosome, SP_Solver):
-    def __init__(self, input, objective=None, use_heuristic=True):
+    def __init__(self, input, objective=None, use_heuristic=True, pool_size=0,
+                 local_improvement=False):
         Chromosome.__init__(self)
         SP_Solver.__init__(self, input)
 
         self.use_heuristic = use_heuristic
+        self.pool_size = pool_size
+        self.local_improvement = local_improvement
+        self._checker = None
 
         nb_apps = len(self.apps)
         r_apps = range(nb_apps)
@@ -45,25 +51,26 @@ class SP_Chromosome(Chromosome, SP_Solver):
         if not self.use_heuristic:
             return []
 
-        indiv_list = [
-            ga_heuristic.create_individual_cloud(self),
-            ga_heuristic.create_individual_net_delay(self),
-            ga_heuristic.create_individual_cluster_metoids(self),
-            ga_heuristic.create_individual_deadline(self)
+        functions = [
+            ga_heuristic.create_individual_cloud,
+            ga_heuristic.create_individual_net_delay,
+            ga_heuristic.create_individual_cluster_metoids,
+            ga_heuristic.create_individual_deadline
         ]
-        merged_indiv = []
-        for indiv_1 in indiv_list:
-            indiv = ga_heuristic.invert_individual(self, indiv_1)
-            merged_indiv.append(indiv)
-
-            for indiv_2 in indiv_list:
-                if indiv_1 == indiv_2:
+        population = ga_heuristic.create_individuals(self, functions,
+                                                     self.pool_size)
+        inverted = 1.0 - population
+        merged = 0.5 * population[:, numpy.newaxis] + 0.5 * population
+
+        indiv_list = list(population)
+        for i, indiv_1 in enumerate(population):
+            indiv_list.append(inverted[i])
+            for j, indiv_2 in enumerate(population):
+                if numpy.array_equal(indiv_1, indiv_2):
                     continue
-                indiv = ga_heuristic.merge_population(self, [indiv_1, indiv_2])
-                merged_indiv.append(indiv)
-        indiv_list += merged_indiv
+                indiv_list.append(merged[i, j])
 
-        return indiv_list
+        return [indiv.tolist() for indiv in indiv_list]
 
     def stopping_criteria(self, population):
         best_indiv = population[0]
@@ -76,12 +83,37 @@ class SP_Chromosome(Chromosome, SP_Solver):
             values = self._best_values[-1 * self.stall_window:]
             values = list(map(lambda i: i / max_value, values))
             variance = numpy.var(values)
+            self.stopping_values["stall_variance"] = float(variance)
 
         return best_value == 0.0 or variance <= self.stall_threshold
 
+    def check_individual(self, individual):
+        """Check the feasibility of the solution decoded from an individual
+        Args:
+            individual (list): individual of the population
+        Raises:
+            ValueError: if the decoded solution violates any constraint
+        """
+        return self.check_solution(*self.decode(individual))
+
+    def check_solution(self, place, load):
+        """Check the feasibility of a decoded solution
+        Args:
+            place (numpy.ndarray): placement of the solution
+            load (numpy.ndarray): load distribution of the solution
+        Raises:
+            ValueError: if the solution violates any constraint
+        """
+        if self._checker is None:
+            self._checker = Feasibility_Checker(self.input)
+        report = self._checker.check(place, load)
+        if not report.is_valid():
+            raise ValueError("invalid decoded solution:\n{}".format(report))
+        return report
+
     def fitness(self, individual):
-        result = self.decode(individual)
-        return self.objective(*result)
+        result = self.timed(tm.TIME_DECODE, self.decode, individual)
+        return self.timed(tm.TIME_METRIC, self.objective, *result)
 
     def decode(self, individual):
         nb_apps = len(self.apps)
@@ -92,16 +124,10 @@ class SP_Chromosome(Chromosome, SP_Solver):
         r_requests = range(nb_requests)
         cloud = self.get_cloud_index()
 
-        place = {(a, h): 0
-                 for h in r_nodes
-                 for a in r_apps}
-        load = {(a, b, h): 0
-                for h in r_nodes
-                for b in r_nodes
-                for a in r_apps}
         app_load = {(a, h): 0
                     for h in r_nodes
                     for a in r_apps}
+        assigned = []
 
         selected_nodes = []
         for a in r_apps:
@@ -135,20 +161,25 @@ class SP_Chromosome(Chromosome, SP_Solver):
                 resources = {}
                 for r in self.resources:
                     k1, k2 = self.apps[a].get_demand(r)
-                    value = resource_used[h, r] + k1 + (1 - place[a, h]) * k2
+                    placed = app_load[a, h] > 0
+                    value = resource_used[h, r] + k1 + (1 - placed) * k2
                     capacity = self.nodes[h].get_capacity(r)
                     resources[r] = value
                     fit = fit and (value <= capacity)
 
                 if fit:
-                    load[a, b, h] += 1
+                    assigned.append((a, b, h))
                     app_load[a, h] += 1
-                    place[a, h] = 1
                     for r in self.resources:
                         resource_used[h, r] = resources[r]
                     break
 
-        return self.local_search(place, load)
+        load = numpy.zeros((nb_apps, nb_nodes, nb_nodes), dtype=int)
+        if assigned:
+            numpy.add.at(load, tuple(numpy.transpose(assigned)), 1)
+        place = (load.sum(axis=1) > 0).astype(int)
+
+        return self.local_search(place, load, self.local_improvement)
 
     def _node_priority(self, indiv, a, b, h, app_load):
         app = self.apps[a]
@@ -169,27 +200,120 @@ class SP_Chromosome(Chromosome, SP_Solver):
         return net_delay + proc_delay
 
 
-def solve(input,
-          nb_generations=100,
-          population_size=100,
-          elite_proportion=0.1,
-          mutant_proportion=0.1,
-          elite_probability=0.6,
-          objective=None,
-          use_heuristic=True,
-          pool_size=POOL_SIZE):
+def _create_solver(input,
+                   nb_generations,
+                   population_size,
+                   elite_proportion,
+                   mutant_proportion,
+                   elite_probability,
+                   objective,
+                   use_heuristic,
+                   pool_size,
+                   local_improvement,
+                   seed,
+                   telemetry,
+                   time_limit,
+                   max_evaluations):
 
     chromossome = SP_Chromosome(input,
                                 objective=objective,
-                                use_heuristic=use_heuristic)
+                                use_heuristic=use_heuristic,
+                                pool_size=pool_size,
+                                local_improvement=local_improvement)
     genetic = BRKGA(chromossome,
                     nb_generations=nb_generations,
                     population_size=population_size,
                     elite_proportion=elite_proportion,
                     mutant_proportion=mutant_proportion,
                     elite_probability=elite_probability,
-                    pool_size=pool_size)
+                    pool_size=pool_size,
+                    seed=seed,
+                    telemetry=telemetry,
+                    time_limit=time_limit,
+                    max_evaluations=max_evaluations)
+    return chromossome, genetic
 
+
+def solve(input,
+          nb_generations=100,
+          population_size=100,
+          elite_proportion=0.1,
+          mutant_proportion=0.1,
+          elite_probability=0.6,
+          objective=None,
+          use_heuristic=True,
+          pool_size=POOL_SIZE,
+          local_improvement=False,
+          validate_elite=False,
+          seed=None,
+          telemetry=None,
+          time_limit=0,
+          max_evaluations=0):
+
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          local_improvement=local_improvement,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations)
     population = genetic.solve()
     result = chromossome.decode(population[0])
+    if validate_elite:
+        chromossome.check_solution(*result)
     return Output(input).set_solution(*result)
+
+
+def iter_solve(input,
+               nb_generations=100,
+               population_size=100,
+               elite_proportion=0.1,
+               mutant_proportion=0.1,
+               elite_probability=0.6,
+               objective=None,
+               use_heuristic=True,
+               pool_size=POOL_SIZE,
+               local_improvement=False,
+               validate_elite=False,
+               seed=None,
+               telemetry=None,
+               time_limit=0,
+               max_evaluations=0):
+    """Solve the problem yielding a solution whenever the best fitness improves
+    The generator can be closed at any time, e.g., by stopping the iteration,
+    and then the genetic algorithm and its pool are terminated
+    Args:
+        input (Input): input of the problem
+        other arguments are the same of the solve function
+    Yields:
+        output: Output of the best solution of the generation
+        stats: dictionary of statistics of the generation
+    """
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          local_improvement=local_improvement,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations)
+    with closing(genetic.iter_solve()) as generations:
+        for population, stats in generations:
+            if stats["improved"]:
+                result = chromossome.decode(population[0])
+                if validate_elite:
+                    chromossome.check_solution(*result)
+                yield Output(input).set_solution(*result), stats
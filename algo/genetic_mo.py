@@ -1,6 +1,8 @@
+from contextlib import closing
 from algo.util.output import Output
 from algo.util.nsgaii import NSGAII, NSGAII_Chromosome
 from algo.genetic import SP_Chromosome
+from algo.util import telemetry as tm
 
 DOMINANCE_ERROR = 0.01
 STOP_THRESHOLD = 0.10
@@ -17,11 +19,20 @@ class SP_NSGAII(NSGAII):
                  elite_probability,
                  pool_size,
                  stop_threshold,
-                 dominance_error):
+                 dominance_error,
+                 seed=None,
+                 telemetry=None,
+                 time_limit=0,
+                 max_evaluations=0,
+                 archive_size=None,
+                 hv_reference=None,
+                 hv_threshold=0.0):
 
         NSGAII.__init__(self, chromossome, population_size, nb_generations,
                         elite_proportion, mutant_proportion, elite_probability,
-                        pool_size, stop_threshold)
+                        pool_size, stop_threshold, seed, telemetry,
+                        time_limit, max_evaluations, archive_size,
+                        hv_reference, hv_threshold)
         self.dominance_error = dominance_error
 
     def _dominates(self, fitness_1, fitness_2):
@@ -32,9 +43,10 @@ class SP_NSGAII(NSGAII):
 
 
 class MO_Chromosome(SP_Chromosome, NSGAII_Chromosome):
-    def __init__(self, input, objectives=None, use_heuristic=True):
+    def __init__(self, input, objectives=None, use_heuristic=True, pool_size=0):
         NSGAII_Chromosome.__init__(self)
-        SP_Chromosome.__init__(self, input, use_heuristic=use_heuristic)
+        SP_Chromosome.__init__(self, input, use_heuristic=use_heuristic,
+                               pool_size=pool_size)
         if objectives is None:
             objectives = [
                 self.metric.get_max_deadline_violation,
@@ -47,10 +59,53 @@ class MO_Chromosome(SP_Chromosome, NSGAII_Chromosome):
         return False
 
     def fitness(self, individual):
-        solution = self.decode(individual)
+        solution = self.timed(tm.TIME_DECODE, self.decode, individual)
+        return self.timed(tm.TIME_METRIC, self._get_objectives, solution)
+
+    def _get_objectives(self, solution):
         return [f(*solution) for f in self.objectives]
 
 
+def _create_solver(input,
+                   nb_generations,
+                   population_size,
+                   elite_proportion,
+                   mutant_proportion,
+                   elite_probability,
+                   dominance_error,
+                   stop_threshold,
+                   objective,
+                   use_heuristic,
+                   pool_size,
+                   seed,
+                   telemetry,
+                   time_limit,
+                   max_evaluations,
+                   archive_size,
+                   hv_reference,
+                   hv_threshold):
+
+    chromossome = MO_Chromosome(input, objective, use_heuristic=use_heuristic,
+                                pool_size=pool_size)
+    genetic = SP_NSGAII(chromossome,
+                        nb_generations=nb_generations,
+                        population_size=population_size,
+                        elite_proportion=elite_proportion,
+                        mutant_proportion=mutant_proportion,
+                        elite_probability=elite_probability,
+                        stop_threshold=stop_threshold,
+                        pool_size=pool_size,
+                        dominance_error=dominance_error,
+                        seed=seed,
+                        telemetry=telemetry,
+                        time_limit=time_limit,
+                        max_evaluations=max_evaluations,
+                        archive_size=archive_size,
+                        hv_reference=hv_reference,
+                        hv_threshold=hv_threshold)
+    return chromossome, genetic
+
+
 def solve(input,
           nb_generations=100,
           population_size=100,
@@ -61,19 +116,92 @@ def solve(input,
           stop_threshold=STOP_THRESHOLD,
           objective=None,
           use_heuristic=True,
-          pool_size=POOL_SIZE):
-
-    chromossome = MO_Chromosome(input, objective, use_heuristic=use_heuristic)
-    genetic = SP_NSGAII(chromossome,
-                        nb_generations=nb_generations,
-                        population_size=population_size,
-                        elite_proportion=elite_proportion,
-                        mutant_proportion=mutant_proportion,
-                        elite_probability=elite_probability,
-                        stop_threshold=stop_threshold,
-                        pool_size=pool_size,
-                        dominance_error=dominance_error)
+          pool_size=POOL_SIZE,
+          seed=None,
+          telemetry=None,
+          time_limit=0,
+          max_evaluations=0,
+          archive_size=None,
+          hv_reference=None,
+          hv_threshold=0.0):
 
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          dominance_error=dominance_error,
+                                          stop_threshold=stop_threshold,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations,
+                                          archive_size=archive_size,
+                                          hv_reference=hv_reference,
+                                          hv_threshold=hv_threshold)
     population = genetic.solve()
     result = chromossome.decode(population[0])
-    return Output(input).set_solution(*result)
+    return _get_output(input, genetic, result)
+
+
+def iter_solve(input,
+               nb_generations=100,
+               population_size=100,
+               elite_proportion=0.1,
+               mutant_proportion=0.1,
+               elite_probability=0.6,
+               dominance_error=DOMINANCE_ERROR,
+               stop_threshold=STOP_THRESHOLD,
+               objective=None,
+               use_heuristic=True,
+               pool_size=POOL_SIZE,
+               seed=None,
+               telemetry=None,
+               time_limit=0,
+               max_evaluations=0,
+               archive_size=None,
+               hv_reference=None,
+               hv_threshold=0.0):
+    """Solve the problem yielding a solution whenever the first front improves
+    The generator can be closed at any time, e.g., by stopping the iteration,
+    and then the genetic algorithm and its pool are terminated
+    Args:
+        input (Input): input of the problem
+        other arguments are the same of the solve function
+    Yields:
+        output: Output of the first solution of the generation
+        stats: dictionary of statistics of the generation
+    """
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          dominance_error=dominance_error,
+                                          stop_threshold=stop_threshold,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations,
+                                          archive_size=archive_size,
+                                          hv_reference=hv_reference,
+                                          hv_threshold=hv_threshold)
+    with closing(genetic.iter_solve()) as generations:
+        for population, stats in generations:
+            if stats["improved"]:
+                result = chromossome.decode(population[0])
+                yield _get_output(input, genetic, result), stats
+
+
+def _get_output(input, genetic, result):
+    output = Output(input).set_solution(*result)
+    return output.set_pareto_front(genetic.archive.get_front(),
+                                   genetic.get_hypervolume())
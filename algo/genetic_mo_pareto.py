@@ -1,3 +1,4 @@
+from contextlib import closing
 from algo.util.output import Output
 from algo.util.nsgaii import NSGAII
 from algo.genetic_mo import MO_Chromosome
@@ -5,6 +6,44 @@ from algo.genetic_mo import MO_Chromosome
 POOL_SIZE = 4
 
 
+def _create_solver(input,
+                   nb_generations,
+                   population_size,
+                   elite_proportion,
+                   mutant_proportion,
+                   elite_probability,
+                   stop_threshold,
+                   objective,
+                   use_heuristic,
+                   pool_size,
+                   seed,
+                   telemetry,
+                   time_limit,
+                   max_evaluations,
+                   archive_size,
+                   hv_reference,
+                   hv_threshold):
+
+    chromossome = MO_Chromosome(input, objective, use_heuristic=use_heuristic,
+                                pool_size=pool_size)
+    genetic = NSGAII(chromossome,
+                     nb_generations=nb_generations,
+                     population_size=population_size,
+                     elite_proportion=elite_proportion,
+                     mutant_proportion=mutant_proportion,
+                     elite_probability=elite_probability,
+                     stop_threshold=stop_threshold,
+                     pool_size=pool_size,
+                     seed=seed,
+                     telemetry=telemetry,
+                     time_limit=time_limit,
+                     max_evaluations=max_evaluations,
+                     archive_size=archive_size,
+                     hv_reference=hv_reference,
+                     hv_threshold=hv_threshold)
+    return chromossome, genetic
+
+
 def solve(input,
           nb_generations=100,
           population_size=100,
@@ -14,18 +53,89 @@ def solve(input,
           stop_threshold=0.10,
           objective=None,
           use_heuristic=True,
-          pool_size=POOL_SIZE):
-
-    chromossome = MO_Chromosome(input, objective, use_heuristic=use_heuristic)
-    genetic = NSGAII(chromossome,
-                     nb_generations=nb_generations,
-                     population_size=population_size,
-                     elite_proportion=elite_proportion,
-                     mutant_proportion=mutant_proportion,
-                     elite_probability=elite_probability,
-                     stop_threshold=stop_threshold,
-                     pool_size=pool_size)
+          pool_size=POOL_SIZE,
+          seed=None,
+          telemetry=None,
+          time_limit=0,
+          max_evaluations=0,
+          archive_size=None,
+          hv_reference=None,
+          hv_threshold=0.0):
 
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          stop_threshold=stop_threshold,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations,
+                                          archive_size=archive_size,
+                                          hv_reference=hv_reference,
+                                          hv_threshold=hv_threshold)
     population = genetic.solve()
     result = chromossome.decode(population[0])
-    return Output(input).set_solution(*result)
+    return _get_output(input, genetic, result)
+
+
+def iter_solve(input,
+               nb_generations=100,
+               population_size=100,
+               elite_proportion=0.1,
+               mutant_proportion=0.1,
+               elite_probability=0.6,
+               stop_threshold=0.10,
+               objective=None,
+               use_heuristic=True,
+               pool_size=POOL_SIZE,
+               seed=None,
+               telemetry=None,
+               time_limit=0,
+               max_evaluations=0,
+               archive_size=None,
+               hv_reference=None,
+               hv_threshold=0.0):
+    """Solve the problem yielding a solution whenever the first front improves
+    The generator can be closed at any time, e.g., by stopping the iteration,
+    and then the genetic algorithm and its pool are terminated
+    Args:
+        input (Input): input of the problem
+        other arguments are the same of the solve function
+    Yields:
+        output: Output of the first solution of the generation
+        stats: dictionary of statistics of the generation
+    """
+    chromossome, genetic = _create_solver(input,
+                                          nb_generations=nb_generations,
+                                          population_size=population_size,
+                                          elite_proportion=elite_proportion,
+                                          mutant_proportion=mutant_proportion,
+                                          elite_probability=elite_probability,
+                                          stop_threshold=stop_threshold,
+                                          objective=objective,
+                                          use_heuristic=use_heuristic,
+                                          pool_size=pool_size,
+                                          seed=seed,
+                                          telemetry=telemetry,
+                                          time_limit=time_limit,
+                                          max_evaluations=max_evaluations,
+                                          archive_size=archive_size,
+                                          hv_reference=hv_reference,
+                                          hv_threshold=hv_threshold)
+    with closing(genetic.iter_solve()) as generations:
+        for population, stats in generations:
+            if stats["improved"]:
+                result = chromossome.decode(population[0])
+                yield _get_output(input, genetic, result), stats
+
+
+def _get_output(input, genetic, result):
+    output = Output(input).set_solution(*result)
+    return output.set_pareto_front(genetic.archive.get_front(),
+                                   genetic.get_hypervolume())
@@ -1,5 +1,4 @@
 import numpy as np
-from docplex.mp.model import Model
 from algo.util.sp import SP_Solver
 from algo.util.output import Output
 
@@ -19,6 +18,15 @@ class MILP(SP_Solver):
         self.nb_threads = nb_threads
 
     def solve(self):
+        mdl = self._create_model()
+        self._set_objective(mdl)
+        self._set_parameters(mdl)
+
+        # Solving
+        mdl.solve()
+        return self._get_solution(mdl)
+
+    def _create_model(self):
         # Auxiliar Variables
         nb_nodes = len(self.nodes)
         r_nodes = range(nb_nodes)
@@ -29,7 +37,10 @@ class MILP(SP_Solver):
                      for node in self.nodes]
                     for app in self.apps]
         max_load = [sum(requests[a]) for a in r_apps]
+        self._requests = requests
 
+        # docplex is only loaded by the solvers that use it
+        from docplex.mp.model import Model
         mdl = Model(name='ServicePlacement')
 
         # Decision Variables
@@ -43,11 +54,20 @@ class MILP(SP_Solver):
                                            lb=0, name="lf")
         dvar_load_e = mdl.continuous_var_matrix(nb_apps, nb_nodes,
                                                 lb=0.0, name="le")
+        self._dvar_place = dvar_place
+        self._dvar_distribution = dvar_distribution
+        self._dvar_e = dvar_e
 
         # Decision Expresions
         dexpr_load = {(a, h): mdl.sum(dvar_distribution[a, b, h] for b in r_nodes)
                       for a in r_apps
                       for h in r_nodes}
+        dexpr_demand = {(h, r): mdl.sum(np.dot([dexpr_load[a, h], dvar_place[a, h]],
+                                               self.apps[a].get_demand(r))
+                                        for a in r_apps)
+                        for h in r_nodes
+                        for r in self.resources}
+        self._dexpr_demand = dexpr_demand
 
         # Constraints
         # Number of Instances
@@ -80,9 +100,7 @@ class MILP(SP_Solver):
                             for b in r_nodes
                             for h in r_nodes)
         # Node Capacity
-        mdl.add_constraints(mdl.sum(np.dot([dexpr_load[a, h], dvar_place[a, h]],
-                                           self.apps[a].get_demand(r))
-                                    for a in r_apps)
+        mdl.add_constraints(dexpr_demand[h, r]
                             <= self.nodes[h].get_capacity(r)
                             for h in r_nodes
                             for r in self.resources)
@@ -138,9 +156,12 @@ class MILP(SP_Solver):
                             for a in r_apps
                             for h in r_nodes)
 
-        # Objective
-        mdl.minimize(dvar_e)
+        return mdl
 
+    def _set_objective(self, mdl):
+        mdl.minimize(self._dvar_e)
+
+    def _set_parameters(self, mdl):
         # mdl.float_precision = 3
         # mdl.print_information()
 
@@ -149,6 +170,15 @@ class MILP(SP_Solver):
         if self.nb_threads > 0:
             mdl.context.cplex_parameters.threads = self.nb_threads
 
+    def _get_solution(self, mdl):
+        nb_nodes = len(self.nodes)
+        r_nodes = range(nb_nodes)
+        nb_apps = len(self.apps)
+        r_apps = range(nb_apps)
+        requests = self._requests
+        dvar_place = self._dvar_place
+        dvar_distribution = self._dvar_distribution
+
         cloud = self.get_cloud_index()
         obj_value = INF
         place = {(a, h): 0 if h != cloud else 1
@@ -159,14 +189,13 @@ class MILP(SP_Solver):
                 for b in r_nodes
                 for h in r_nodes}
 
-        # Solving
-        if mdl.solve():
+        if mdl.solution is not None:
             obj_value = mdl.objective_value
             for a in r_apps:
                 for h in r_nodes:
-                    place[a, h] = int(dvar_place[a, h].solution_value)
+                    place[a, h] = int(round(dvar_place[a, h].solution_value))
                     for b in r_nodes:
-                        load[a, b, h] = int(dvar_distribution[a, b, h].solution_value)
+                        load[a, b, h] = int(round(dvar_distribution[a, b, h].solution_value))
 
         return place, load, obj_value
 
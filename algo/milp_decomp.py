@@ -0,0 +1,447 @@
+import math
+import time
+import traceback
+import multiprocessing as mp
+import numpy as np
+from algo.milp import MILP
+from algo.util.sp import SP_Solver
+from algo.util.output import Output
+
+INF = float("inf")
+GROUP_BY_APP = "app"
+GROUP_BY_TYPE = "type"
+NB_ITERATIONS = 30
+GAP_TOLERANCE = 0.01
+STEP_SCALE = 2.0
+STEP_STALL = 3
+WEIGHT_RATE = 1.0
+TIME_LIMIT = 3600
+SUB_TIME_LIMIT = 60
+NB_THREADS = 1
+POOL_SIZE = 4
+
+
+def _init_pool(decomposition):
+    """Initialize a sub-process to solve subproblems
+    Args:
+        decomposition (MILP_Decomposition): decomposition solver object
+    """
+    global _decomp
+    _decomp = decomposition
+
+
+def _solve_subproblem(args):
+    """Solve a subproblem in a sub-process
+    Args:
+        args (tuple): (group index, objective weight, resource prices,
+                       time limit)
+    Returns:
+        result: subproblem result
+    """
+    global _decomp
+    try:
+        return _decomp._solve_subproblem(*args)
+    except Exception:
+        # CPLEX exceptions may not be picklable, which would block the pool
+        raise RuntimeError(traceback.format_exc())
+
+
+class Priced_MILP(MILP):
+    """MILP subproblem of a group of applications
+    The node capacity constraints shared with other groups are priced
+    in the objective function
+    """
+
+    def __init__(self, input, time_limit=0, nb_threads=0):
+        MILP.__init__(self, input, time_limit, nb_threads)
+        self._mdl = None
+
+    def solve(self, weight, prices, time_limit=0):
+        """Solve the subproblem for a set of prices
+        Args:
+            weight (float): weight of the deadline violation
+            prices (dict): price of each (node index, resource) capacity
+            time_limit (float): time limit in seconds of this solve,
+                                the time limit of the object if 0
+        Returns:
+            place: placement of the group
+            load: load distribution of the group
+            e: max deadline violation of the group
+            bound: lower bound of the subproblem objective
+        """
+        if self._mdl is None:
+            self._mdl = self._create_model()
+            self._set_parameters(self._mdl)
+        self.weight = weight
+        self.prices = prices
+
+        mdl = self._mdl
+        if time_limit <= 0:
+            time_limit = self.time_limit
+        if time_limit > 0:
+            mdl.context.cplex_parameters.timelimit = time_limit
+        self._set_objective(mdl)
+        mdl.solve()
+
+        place, load, obj_value = self._get_solution(mdl)
+        e = INF
+        bound = -INF
+        if mdl.solution is not None:
+            e = self._dvar_e.solution_value
+            bound = mdl.solve_details.best_bound
+        return place, load, e, bound
+
+    def _set_objective(self, mdl):
+        price_expr = mdl.sum(price * self._dexpr_demand[h, r]
+                             / float(self.nodes[h].get_capacity(r))
+                             for (h, r), price in self.prices.items()
+                             if price > 0.0)
+        mdl.minimize(self.weight * self._dvar_e + price_expr)
+
+
+class MILP_Decomposition(SP_Solver):
+    """Lagrangian relaxation of the node capacity constraints
+    The MILP is decomposed into per-application (or per-application type)
+    subproblems solved in parallel and coordinated through capacity prices.
+    The max deadline violation is split among groups by a weight vector,
+    since max_g e_g >= sum_g w_g * e_g for any w in the simplex
+    See also:
+    https://doi.org/10.1287/mnsc.27.1.1
+    """
+
+    def __init__(self,
+                 input,
+                 group_by=GROUP_BY_APP,
+                 nb_iterations=NB_ITERATIONS,
+                 gap_tolerance=GAP_TOLERANCE,
+                 time_limit=TIME_LIMIT,
+                 sub_time_limit=SUB_TIME_LIMIT,
+                 nb_threads=NB_THREADS,
+                 pool_size=POOL_SIZE):
+        """Initialize method
+        Args:
+            input (Input): input of the problem
+            group_by (str): "app" or "type", how applications are grouped
+                            into subproblems
+            nb_iterations (int): maximum number of subgradient iterations
+            gap_tolerance (float): stop when the relative gap is below it
+            time_limit (float): overall time limit in seconds
+            sub_time_limit (float): time limit of each subproblem in seconds
+            nb_threads (int): number of CPLEX threads of each subproblem
+            pool_size (int): number of processes solving subproblems
+        """
+        SP_Solver.__init__(self, input)
+        self.group_by = group_by
+        self.nb_iterations = nb_iterations
+        self.gap_tolerance = gap_tolerance
+        self.time_limit = time_limit
+        self.sub_time_limit = sub_time_limit
+        self.nb_threads = nb_threads
+        self.pool_size = pool_size
+
+        self.groups = self._get_groups()
+        self._subproblems = {}
+        self._pool = None
+
+    def _get_groups(self):
+        r_apps = range(len(self.apps))
+        if self.group_by == GROUP_BY_TYPE:
+            types = []
+            for app in self.apps:
+                if app.type not in types:
+                    types.append(app.type)
+            groups = [[a for a in r_apps if self.apps[a].type == type]
+                      for type in types]
+        else:
+            groups = [[a] for a in r_apps]
+        return groups
+
+    def _get_subproblem(self, group_index):
+        """Get the subproblem of a group, it is created once per process
+        """
+        if group_index not in self._subproblems:
+            group = self.groups[group_index]
+            sub_input = self.input.filter(app_indexes=group)
+            self._subproblems[group_index] = Priced_MILP(sub_input,
+                                                         self.sub_time_limit,
+                                                         self.nb_threads)
+        return self._subproblems[group_index]
+
+    def _solve_subproblem(self, group_index, weight, prices, time_limit=0):
+        subproblem = self._get_subproblem(group_index)
+        return subproblem.solve(weight, prices, time_limit)
+
+    def _get_sub_time_limit(self, start_time):
+        """Get the time limit of the subproblems of an iteration,
+        i.e., the subproblem time limit bounded by the remaining time
+        Args:
+            start_time (float): start time of the optimization
+        Returns:
+            time_limit: time limit in seconds, no limit if 0,
+                        negative if the time is over
+        """
+        if self.time_limit <= 0:
+            return self.sub_time_limit
+        remaining = self.time_limit - (time.time() - start_time)
+        if remaining <= 0.0:
+            return -1.0
+        if self.sub_time_limit > 0:
+            return min(self.sub_time_limit, remaining)
+        return remaining
+
+    def _init_pool(self):
+        self._clean_pool()
+
+        self._map_func = map
+        self._solve_func = lambda args: self._solve_subproblem(*args)
+        if self.pool_size > 0 and len(self.groups) > 1:
+            try:
+                # Require UNIX fork to work
+                mp_ctx = mp.get_context("fork")
+                pool_size = min(self.pool_size, mp_ctx.cpu_count(),
+                                len(self.groups))
+                self._pool = mp_ctx.Pool(processes=pool_size,
+                                         initializer=_init_pool,
+                                         initargs=[self])
+                self._map_func = self._pool.map
+                self._solve_func = _solve_subproblem
+            except ValueError:
+                pass
+
+    def _clean_pool(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _get_capacities(self):
+        """Get the finite capacities, i.e., the relaxed constraints
+        """
+        capacities = {}
+        for h, node in enumerate(self.nodes):
+            for r in self.resources:
+                capacity = float(node.get_capacity(r))
+                if capacity < INF:
+                    capacities[h, r] = capacity
+        return capacities
+
+    def _merge(self, results):
+        """Merge the subproblem solutions into a solution of the full problem
+        """
+        r_apps = range(len(self.apps))
+        r_nodes = range(len(self.nodes))
+        place = {(a, h): 0 for a in r_apps for h in r_nodes}
+        load = {(a, b, h): 0 for a in r_apps for b in r_nodes for h in r_nodes}
+
+        for group, result in zip(self.groups, results):
+            sub_place, sub_load = result[0], result[1]
+            for (sub_a, a) in enumerate(group):
+                for h in r_nodes:
+                    place[a, h] = sub_place[sub_a, h]
+                    for b in r_nodes:
+                        load[a, b, h] = sub_load[sub_a, b, h]
+
+        return place, load
+
+    def _get_node_demand(self, place, load, a, h):
+        node_load = sum([load[a, b, h] for b in range(len(self.nodes))])
+        demand = {}
+        for r in self.resources:
+            k1, k2 = self.apps[a].get_demand(r)
+            demand[r] = place[a, h] * (node_load * k1 + k2)
+        return demand
+
+    def _repair(self, place, load):
+        """Make a merged solution feasible
+        Instances of overloaded nodes are evicted, their load is moved to
+        another instance of the same application with enough free resources,
+        or to the cloud otherwise
+        """
+        r_apps = range(len(self.apps))
+        r_nodes = range(len(self.nodes))
+        cloud = self.get_cloud_index()
+
+        used = {(h, r): 0.0 for h in r_nodes for r in self.resources}
+        for a in r_apps:
+            for h in r_nodes:
+                if place[a, h]:
+                    demand = self._get_node_demand(place, load, a, h)
+                    for r in self.resources:
+                        used[h, r] += demand[r]
+
+        def overload(h):
+            return max([used[h, r] / float(self.nodes[h].get_capacity(r))
+                        for r in self.resources])
+
+        for h in r_nodes:
+            if h == cloud:
+                continue
+            while overload(h) > 1.0:
+                apps = [a for a in r_apps if place[a, h]]
+                if not apps:
+                    break
+                demands = {a: self._get_node_demand(place, load, a, h)
+                           for a in apps}
+                a = max(apps, key=lambda a: sum([demands[a][r] / float(self.nodes[h].get_capacity(r))
+                                                 for r in self.resources]))
+                app = self.apps[a]
+                moved = sum([load[a, b, h] for b in r_nodes])
+
+                target = cloud
+                for n in r_nodes:
+                    if n == h or n == cloud or not place[a, n]:
+                        continue
+                    fit = all([used[n, r] + moved * app.get_demand_k1(r)
+                               <= self.nodes[n].get_capacity(r)
+                               for r in self.resources])
+                    if fit:
+                        target = n
+                        break
+
+                target_demand = self._get_node_demand(place, load, a, target)
+                for r in self.resources:
+                    used[h, r] -= demands[a][r]
+                    used[target, r] -= target_demand[r]
+                place[a, h] = 0
+                place[a, target] = 1
+                for b in r_nodes:
+                    load[a, b, target] += load[a, b, h]
+                    load[a, b, h] = 0
+                target_demand = self._get_node_demand(place, load, a, target)
+                for r in self.resources:
+                    used[target, r] += target_demand[r]
+
+        return place, load
+
+    def solve(self):
+        """Execute the subgradient optimization
+        Returns:
+            place: best feasible placement found
+            load: best feasible load distribution found
+            lower_bound: best lower bound of the max deadline violation
+            upper_bound: max deadline violation of the returned solution
+        """
+        start_time = time.time()
+        nb_groups = len(self.groups)
+        capacities = self._get_capacities()
+        prices = {key: 0.0 for key in capacities}
+        weights = [1.0 / nb_groups] * nb_groups
+
+        best_place, best_load = None, None
+        lower_bound = -INF
+        upper_bound = INF
+        step_scale = STEP_SCALE
+        stall = 0
+        self.nb_iterations_done = 0
+
+        self._init_pool()
+        try:
+            for iteration in range(self.nb_iterations):
+                sub_time_limit = self._get_sub_time_limit(start_time)
+                if sub_time_limit < 0.0:
+                    break
+                args = [(g, weights[g], prices, sub_time_limit)
+                        for g in range(nb_groups)]
+                results = list(self._map_func(self._solve_func, args))
+                self.nb_iterations_done = iteration + 1
+
+                # Lagrangian dual value
+                bound = sum([result[3] for result in results]) - sum(prices.values())
+                if bound > lower_bound:
+                    lower_bound = bound
+                    stall = 0
+                else:
+                    stall += 1
+                    if stall >= STEP_STALL:
+                        step_scale /= 2.0
+                        stall = 0
+
+                place, load = self._repair(*self._merge(results))
+                value = self.metric.get_max_deadline_violation(place, load)
+                if value < upper_bound:
+                    upper_bound = value
+                    best_place, best_load = place, load
+
+                gap = self._get_gap(lower_bound, upper_bound)
+                if gap <= self.gap_tolerance:
+                    break
+                if self.time_limit > 0 and time.time() - start_time >= self.time_limit:
+                    break
+
+                # Subgradient of the prices: normalized capacity violations
+                used = {key: 0.0 for key in capacities}
+                for group, result in zip(self.groups, results):
+                    sub_place, sub_load = result[0], result[1]
+                    for (sub_a, a) in enumerate(group):
+                        app = self.apps[a]
+                        for (h, r) in capacities:
+                            if not sub_place[sub_a, h]:
+                                continue
+                            node_load = sum([sub_load[sub_a, b, h]
+                                             for b in range(len(self.nodes))])
+                            k1, k2 = app.get_demand(r)
+                            used[h, r] += node_load * k1 + k2
+                subgradient = {key: used[key] / capacities[key] - 1.0
+                               for key in capacities}
+                norm = sum([g ** 2 for key, g in subgradient.items()
+                            if g > 0.0 or prices[key] > 0.0])
+                if norm > 0.0 and bound > -INF:
+                    step = step_scale * (upper_bound - bound) / norm
+                    prices = {key: max(0.0, prices[key] + step * subgradient[key])
+                              for key in capacities}
+
+                # Exponentiated gradient of the weights in the simplex
+                e_values = [min(result[2], upper_bound) for result in results]
+                max_e = max(e_values)
+                if max_e > 0.0:
+                    weights = [w * math.exp(WEIGHT_RATE * e / max_e)
+                               for w, e in zip(weights, e_values)]
+                    total = sum(weights)
+                    weights = [w / total for w in weights]
+        finally:
+            self._clean_pool()
+
+        if best_place is None:
+            best_place, best_load = self._get_cloud_solution()
+            upper_bound = self.metric.get_max_deadline_violation(best_place,
+                                                                 best_load)
+        return best_place, best_load, max(0.0, lower_bound), upper_bound
+
+    def _get_cloud_solution(self):
+        r_apps = range(len(self.apps))
+        r_nodes = range(len(self.nodes))
+        cloud = self.get_cloud_index()
+        place = {(a, h): int(h == cloud) for a in r_apps for h in r_nodes}
+        load = {(a, b, h): self.get_nb_requests(a, b) if h == cloud else 0
+                for a in r_apps for b in r_nodes for h in r_nodes}
+        return place, load
+
+    def _get_gap(self, lower_bound, upper_bound):
+        if upper_bound <= 0.0 or upper_bound <= lower_bound:
+            return 0.0
+        return (upper_bound - max(0.0, lower_bound)) / upper_bound
+
+
+def solve(input,
+          group_by=GROUP_BY_APP,
+          nb_iterations=NB_ITERATIONS,
+          gap_tolerance=GAP_TOLERANCE,
+          time_limit=TIME_LIMIT,
+          sub_time_limit=SUB_TIME_LIMIT,
+          nb_threads=NB_THREADS,
+          pool_size=POOL_SIZE):
+
+    solver = MILP_Decomposition(input,
+                                group_by=group_by,
+                                nb_iterations=nb_iterations,
+                                gap_tolerance=gap_tolerance,
+                                time_limit=time_limit,
+                                sub_time_limit=sub_time_limit,
+                                nb_threads=nb_threads,
+                                pool_size=pool_size)
+    place, load, lower_bound, upper_bound = solver.solve()
+    output = Output(input).set_solution(place, load)
+    output.lower_bound = lower_bound
+    output.upper_bound = upper_bound
+    output.gap = solver._get_gap(lower_bound, upper_bound)
+    output.nb_iterations = solver.nb_iterations_done
+    return output
@@ -0,0 +1,59 @@
+from algo.util.output import Output
+from algo.util.pso import PSO, PSO_Decoder
+from algo.genetic import SP_Chromosome
+
+POOL_SIZE = 4
+
+
+class SP_Decoder(SP_Chromosome, PSO_Decoder):
+    """Particle positions decoded as BRKGA random keys
+    """
+
+    def __init__(self, input, objective=None, use_heuristic=True, pool_size=0):
+        PSO_Decoder.__init__(self)
+        SP_Chromosome.__init__(self, input, objective=objective,
+                               use_heuristic=use_heuristic,
+                               pool_size=pool_size)
+        self.nb_dimensions = self.nb_genes
+
+    def gen_init_positions(self):
+        return self.gen_init_population()
+
+    def stopping_criteria(self, best_coding, best_cost):
+        return best_cost == 0.0
+
+    def get_cost(self, coding):
+        return self.fitness(coding)
+
+
+def solve(input,
+          nb_particles=100,
+          max_iteration=100,
+          weight=0.5,
+          cognative_const=1,
+          social_const=2,
+          objective=None,
+          use_heuristic=True,
+          pool_size=POOL_SIZE,
+          time_limit=0,
+          seed=None):
+
+    decoder = SP_Decoder(input,
+                         objective=objective,
+                         use_heuristic=use_heuristic,
+                         pool_size=pool_size)
+    bounds = [(0.0, 1.0)] * decoder.get_dimensions()
+    pso = PSO(decoder,
+              nb_particles=nb_particles,
+              max_iteration=max_iteration,
+              bounds=bounds,
+              weight=weight,
+              cognative_const=cognative_const,
+              social_const=social_const,
+              pool_size=pool_size,
+              time_limit=time_limit,
+              seed=seed)
+
+    position, cost = pso.solve()
+    result = decoder.decode(position)
+    return Output(input).set_solution(*result)
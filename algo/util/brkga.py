@@ -1,5 +1,11 @@
-import random
+import time
+import numpy as np
 import multiprocessing as mp
+from algo.util import telemetry as tm
+
+INF = float("inf")
+# Number of individuals evaluated by each process between budget checks
+BUDGET_BATCH_SIZE = 10
 
 
 def _init_pool(genetic_algo):
@@ -22,6 +28,23 @@ def _get_fitness(indiv):
     return _ga._get_fitness(indiv)
 
 
+def _get_timed_fitness(indiv):
+    """Calculate the fitness of an individual and the time spent on it
+    Args:
+        indiv (list): indivual
+    Returns:
+        fitness: fitness value
+        timings: elapsed times of the chromosome indexed by name
+    """
+    global _ga
+    timings = _ga.chromossome.timings
+    timings.clear()
+    start = time.perf_counter()
+    fitness = _ga._get_fitness(indiv)
+    tm.add_time(timings, tm.TIME_FITNESS, time.perf_counter() - start)
+    return fitness, dict(timings)
+
+
 class BRKGA:
     """ Biased Random Key Genetic Algorithm
     See also:
@@ -35,7 +58,11 @@ class BRKGA:
                  elite_proportion,
                  mutant_proportion,
                  elite_probability=None,
-                 pool_size=0):
+                 pool_size=0,
+                 seed=None,
+                 telemetry=None,
+                 time_limit=0,
+                 max_evaluations=0):
         """Initialize method
         Args:
             chromossome (Chromosome): chromossome representation object
@@ -50,6 +77,16 @@ class BRKGA:
             elite_probability (float): probability of a elite gene to be
                                        selected during crossvers
             pool_size (int): number of processes for parallelisms
+            seed (object): seed of the random generator, e.g., an int or a
+                           numpy.random.SeedSequence. The random operations
+                           run only in the main process, so the result does
+                           not depend on the pool size
+            telemetry (object): Telemetry object or name of a JSON Lines file
+                                to trace each generation, disabled if None
+            time_limit (float): maximum execution time in seconds,
+                                disabled if 0
+            max_evaluations (int): maximum number of fitness evaluations,
+                                   disabled if 0
         """
 
         self.chromossome = chromossome
@@ -66,6 +103,14 @@ class BRKGA:
             self.elite_probability = self._elite_size / float(self.pop_size)
 
         self.pool_size = pool_size
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.telemetry = tm.get_telemetry(telemetry)
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self._start_time = None
+        self._nb_evaluations = 0
+        self._budget_exhausted = False
         self._pool = None
         self._map_func = None
         self._fitness_func = None
@@ -75,6 +120,15 @@ class BRKGA:
         """
         self._elite_size = int(round(self.elite_proportion * self.pop_size))
         self._mutant_size = int(round(self.mutant_proportion * self.pop_size))
+        self.rng = np.random.default_rng(self.seed)
+        self._start_time = time.time()
+        self._nb_evaluations = 0
+        self._budget_exhausted = False
+        self.chromossome.rng = self.rng
+        self.chromossome.timings = None
+        if self.telemetry is not None:
+            self.chromossome.timings = {}
+            self.telemetry.start()
         self._init_pool()
         self.chromossome.init_params()
 
@@ -96,6 +150,8 @@ class BRKGA:
                                          initargs=[self])
                 self._map_func = self._pool.map
                 self._fitness_func = _get_fitness
+                if self.telemetry is not None:
+                    self._fitness_func = _get_timed_fitness
             except ValueError:
                 pass
 
@@ -108,6 +164,34 @@ class BRKGA:
             self._map_func = None
             self._fitness_func = None
 
+    def _has_budget(self):
+        """Verify whether a time or an evaluation budget is set
+        Returns:
+            has_budget: True if any budget is set
+        """
+        return self.time_limit > 0 or self.max_evaluations > 0
+
+    def _get_remaining_evaluations(self):
+        """Get the number of fitness evaluations left in the budget
+        Returns:
+            remaining: number of evaluations, infinite if there is no budget
+        """
+        if self.max_evaluations > 0:
+            return max(0, self.max_evaluations - self._nb_evaluations)
+        return INF
+
+    def _is_budget_exhausted(self):
+        """Verify whether the time or the evaluation budget has expired
+        Returns:
+            exhausted: True if the algorithm should stop
+        """
+        if not self._budget_exhausted:
+            elapsed_time = time.time() - self._start_time
+            self._budget_exhausted = (
+                (self.time_limit > 0 and elapsed_time >= self.time_limit)
+                or self._get_remaining_evaluations() == 0)
+        return self._budget_exhausted
+
     def _stopping_criteria(self, population):
         """Verify whether the GA should stop or not
         Args:
@@ -157,7 +241,11 @@ class BRKGA:
         Returns:
             fitnesses: list of fitnesses of all indivuals
         """
-        fitnesses = list(self._map_func(self._fitness_func, population))
+        if self._has_budget():
+            fitnesses = self._get_budget_fitnesses(population)
+        else:
+            fitnesses = self._evaluate(population)
+
         # cache the fitness value inside the individual
         for (index, indiv) in enumerate(population):
             value = fitnesses[index]
@@ -165,6 +253,88 @@ class BRKGA:
                 indiv.append(value)
         return fitnesses
 
+    def _get_budget_fitnesses(self, population):
+        """Calculate the fitness of the indivuals of a population in batches
+        The budget is checked between batches, and if it expires the
+        individuals not evaluated are removed from the population.
+        The first batch is always evaluated
+        Args:
+            population (list): population, modified in place
+        Returns:
+            fitnesses: list of fitnesses of the remaining indivuals
+        """
+        batch_size = BUDGET_BATCH_SIZE * max(1, self.pool_size)
+        fitnesses = []
+        start = 0
+        while start < len(population):
+            if start > 0 and self._is_budget_exhausted():
+                del population[start:]
+                break
+
+            # the cached individuals do not consume the evaluation budget
+            remaining = max(1, self._get_remaining_evaluations())
+            end = start
+            nb_new = 0
+            while (end < len(population) and end - start < batch_size
+                   and nb_new < remaining):
+                if len(population[end]) == self.nb_genes:
+                    nb_new += 1
+                end += 1
+            fitnesses += self._evaluate(population[start:end])
+            start = end
+
+        return fitnesses
+
+    def _evaluate(self, population):
+        """Calculate the fitness of individuals through the pool
+        Args:
+            population (list): individuals
+        Returns:
+            fitnesses: list of fitnesses of the indivuals
+        """
+        self._nb_evaluations += sum(1 for indiv in population
+                                    if len(indiv) == self.nb_genes)
+        if self.telemetry is None:
+            return list(self._map_func(self._fitness_func, population))
+        return self._get_timed_fitnesses(population)
+
+    def _get_timed_fitnesses(self, population):
+        """Calculate the fitnesses of a population recording their times
+        The fitness time is summed over the processes, and the wall time of
+        the pool map not spent on the fitness by the processes is recorded
+        as the inter-process communication (IPC) time
+        Args:
+            population (list): population
+        Returns:
+            fitnesses: list of fitnesses of all indivuals
+        """
+        telemetry = self.telemetry
+        nb_cached = sum(1 for indiv in population
+                        if len(indiv) > self.nb_genes)
+        telemetry.count("evaluations", len(population) - nb_cached)
+        telemetry.count("cache_hits", nb_cached)
+
+        start = time.perf_counter()
+        results = list(self._map_func(self._fitness_func, population))
+        elapsed = time.perf_counter() - start
+        telemetry.add_time(tm.TIME_MAP, elapsed)
+
+        if self._pool is None:
+            telemetry.add_times(self.chromossome.timings)
+            self.chromossome.timings.clear()
+            telemetry.add_time(tm.TIME_FITNESS, elapsed)
+            return results
+
+        fitnesses = []
+        busy = 0.0
+        for fitness, timings in results:
+            fitnesses.append(fitness)
+            busy += timings.get(tm.TIME_FITNESS, 0.0)
+            telemetry.add_times(timings)
+        ipc = max(0.0, elapsed - busy / self.pool_size)
+        telemetry.add_time(tm.TIME_IPC, ipc)
+        return fitnesses
+
     def _classify_population(self, population):
         """Sorts individuals by their fitness value
         Args:
@@ -180,6 +350,7 @@ class BRKGA:
         """Generate the indivuals of the first generation
         """
         # Get boostrap individuals generated by the chromossome representation
+        start = time.perf_counter()
         pop = list(self.chromossome.gen_init_population())
 
         # Complete the population with random individuals
@@ -187,8 +358,9 @@ class BRKGA:
         if rand_size > 0:
             pop += [self._gen_rand_individual()
                     for i in range(rand_size)]
+        self._add_time(tm.TIME_INIT, start)
 
-        return self._classify_population(pop)
+        return self._timed_classify_population(pop)
 
     def _gen_next_population(self, current_ranked_pop):
         """Generate the next population
@@ -199,6 +371,7 @@ class BRKGA:
         Returns:
             next_population: list of individuals of the next population
         """
+        start = time.perf_counter()
         next_population = []
 
         # Get elite individuals
@@ -215,32 +388,160 @@ class BRKGA:
         if self._elite_size == 0:
             elite = non_elite
         while len(next_population) < self.pop_size:
-            indiv_1 = random.choice(elite)
-            indiv_2 = random.choice(non_elite)
+            indiv_1 = elite[self.rng.integers(len(elite))]
+            indiv_2 = non_elite[self.rng.integers(len(non_elite))]
             offspring = self._crossover(indiv_1, indiv_2,
                                         self.elite_probability,
                                         1.0 - self.elite_probability)
             next_population += offspring
+        self._add_time(tm.TIME_CROSSOVER, start)
 
         # Select indivuals with best fitness for next generation
-        next_population = self._classify_population(next_population)
+        next_population = self._timed_classify_population(next_population)
         return next_population[:self.pop_size]
 
-    def solve(self):
-        """Execute the genetic algorithm
+    def _timed_classify_population(self, population):
+        """Sorts individuals by their fitness value recording the time spent
+        Args:
+            population (list): list of individuals
+        Returns:
+            population: list of sorted individuals
+        """
+        if self.telemetry is None:
+            return self._classify_population(population)
+
+        timings = self.telemetry.timings
+        map_time = timings.get(tm.TIME_MAP, 0.0)
+        start = time.perf_counter()
+        population = self._classify_population(population)
+        map_time = timings.get(tm.TIME_MAP, 0.0) - map_time
+        classify_time = time.perf_counter() - start - map_time
+        self.telemetry.add_time(tm.TIME_CLASSIFY, max(0.0, classify_time))
+        return population
+
+    def _add_time(self, name, start):
+        """Record the time elapsed since start if the telemetry is enabled
+        Args:
+            name (str): name of the timing
+            start (float): start time from time.perf_counter
+        """
+        if self.telemetry is not None:
+            self.telemetry.add_time(name, time.perf_counter() - start)
+
+    def _get_generation_stats(self, population):
+        """Get the statistics of a generation for the telemetry
+        Args:
+            population (list): sorted population of the generation
+        Returns:
+            stats: dictionary with the best and the mean fitness
+        """
+        values = [indiv[-1] for indiv in population]
+        return {"best": values[0], "mean": float(np.mean(values))}
+
+    def _get_stopping_values(self):
+        """Get the values used by the stopping criteria
+        Returns:
+            values: dictionary of values indexed by name
+        """
+        values = dict(self.chromossome.stopping_values)
+        values["budget_exhausted"] = self._budget_exhausted
+        return values
+
+    def _get_best(self, population):
+        """Get the best value of a generation
+        Args:
+            population (list): sorted population of the generation
+        Returns:
+            best: fitness of the best individual
+        """
+        return population[0][-1]
+
+    def _is_improvement(self, best, previous):
+        """Verify whether the best value of a generation improves a previous one
+        Args:
+            best (object): best value of the generation
+            previous (object): previous best value, or None
+        Returns:
+            improved: True if the best value is better than the previous one
+        """
+        return previous is None or best < previous
+
+    def _record_generation(self, stats):
+        """Write the telemetry record of a generation
+        Args:
+            stats (dict): statistics of the generation
+        """
+        if self.telemetry is None:
+            return
+        counters = self.telemetry.counters
+        nb_hits = counters.get("cache_hits", 0)
+        nb_indivs = nb_hits + counters.get("evaluations", 0)
+        hit_rate = nb_hits / float(nb_indivs) if nb_indivs > 0 else 0.0
+        values = dict(stats)
+        generation = values.pop("generation")
+        values.pop("elapsed")
+        self.telemetry.record(generation,
+                              stopping=self._get_stopping_values(),
+                              cache_hit_rate=hit_rate,
+                              **values)
+
+    def iter_solve(self):
+        """Execute the genetic algorithm generation by generation
+        The pool is terminated when the generator finishes or is closed,
+        e.g., when the consumer stops the iteration early
+        Yields:
+            population: sorted population of the generation
+            stats: statistics of the generation, i.e., generation number,
+                   elapsed time, total number of evaluations, whether the best
+                   value improved, whether the algorithm stops, best
+                   and mean fitness
         """
         self._init_params()
-        pop = self._gen_first_population()
         try:
-            for i in range(self.nb_generations):
-                if self._stopping_criteria(pop):
+            pop = self._gen_first_population()
+            best = None
+            generation = 0
+            while True:
+                stop = (generation >= self.nb_generations
+                        or self._is_budget_exhausted()
+                        or self._stopping_criteria(pop))
+                current = self._get_best(pop)
+                improved = self._is_improvement(current, best)
+                if improved:
+                    best = current
+
+                stats = {"generation": generation,
+                         "elapsed": time.time() - self._start_time,
+                         "total_evaluations": self._nb_evaluations,
+                         "improved": improved,
+                         "stop": stop}
+                stats.update(self._get_generation_stats(pop))
+                self._record_generation(stats)
+                yield pop, stats
+
+                if stop:
                     break
                 pop = self._gen_next_population(pop)
-        except KeyboardInterrupt:
-            raise
+                generation += 1
         finally:
             self._clean_pool()
-            return pop
+            if self.telemetry is not None:
+                self.telemetry.close()
+
+    def solve(self):
+        """Execute the genetic algorithm
+        Returns:
+            population: sorted population of the last generation
+        """
+        pop = None
+        try:
+            for pop, _ in self.iter_solve():
+                pass
+        except KeyboardInterrupt:
+            # return the current population if the execution is interrupted
+            if pop is None:
+                raise
+        return pop
 
 
 class Chromosome():
@@ -253,18 +554,38 @@ class Chromosome():
         """Object initilization
         """
         self.nb_genes = 1
+        self.rng = np.random.default_rng()
+        self.timings = None
+        self.stopping_values = {}
 
     def init_params(self):
         """Initialize parameters before starting the genetic algorithm
         """
-        pass
+        self.stopping_values = {}
+
+    def timed(self, name, func, *args):
+        """Call a function recording its elapsed time
+        The time is recorded only if the timings are enabled by the telemetry
+        Args:
+            name (str): name of the timing
+            func (function): function to call
+            *args: arguments of the function
+        Returns:
+            result: result of the function
+        """
+        if self.timings is None:
+            return func(*args)
+        start = time.perf_counter()
+        result = func(*args)
+        tm.add_time(self.timings, name, time.perf_counter() - start)
+        return result
 
     def gen_rand_individual(self):
         """Generate a random individual
         Returns:
             individual: a new individual
         """
-        return [random.random() for _ in range(self.nb_genes)]
+        return self.rng.random(self.nb_genes).tolist()
 
     def gen_init_population(self):
         """Generate some individuals for the first population
@@ -295,10 +616,10 @@ class Chromosome():
         offspring_1 = indiv_1[:self.nb_genes]
         offspring_2 = indiv_2[:self.nb_genes]
 
-        for g in range(self.nb_genes):
-            if random.random() > prob_1:
-                offspring_1[g] = indiv_2[g]
-                offspring_2[g] = indiv_1[g]
+        swap = self.rng.random(self.nb_genes) > prob_1
+        for g in np.flatnonzero(swap):
+            offspring_1[g] = indiv_2[g]
+            offspring_2[g] = indiv_1[g]
 
         return [offspring_1, offspring_2]
 
@@ -1,6 +1,87 @@
+import multiprocessing as mp
+from collections import OrderedDict
+import numpy as np
 from algo.util.kmedoids import KMedoids
 
 INF = float("inf")
+CACHE_SIZE = 8
+
+_cache = OrderedDict()
+
+
+def _init_pool(chromosome):
+    """Initialize a sub-process to create heuristic individuals
+    Args:
+        chromosome (SP_Chromosome): chromosome representation object
+    """
+    global _chromosome
+    _chromosome = chromosome
+
+
+def _create_individual(function):
+    """Create an individual in a sub-process
+    Args:
+        function (function): creation function
+    Returns:
+        individual: list of genes
+    """
+    global _chromosome
+    return function(_chromosome)
+
+
+def clear_cache():
+    """Remove all cached individuals
+    """
+    _cache.clear()
+
+
+def create_individuals(chromosome, functions, pool_size=0):
+    """Create the individuals of a list of creation functions
+    The individuals are cached per input fingerprint, so solvers working on
+    the same input (or a copy of it) in the same process reuse them.
+    Missing individuals are created in parallel if pool_size > 0
+    Args:
+        chromosome (SP_Chromosome): chromosome representation object
+        functions (list): creation functions
+        pool_size (int): number of processes
+    Returns:
+        individuals: NumPy array with one individual per row
+    """
+    key = chromosome.input.get_fingerprint()
+    if key in _cache:
+        _cache.move_to_end(key)
+    else:
+        _cache[key] = {}
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    individuals = _cache[key]
+
+    missing = []
+    for f in functions:
+        if f.__name__ not in individuals and f not in missing:
+            missing.append(f)
+
+    results = None
+    if pool_size > 0 and len(missing) > 1:
+        try:
+            # Require UNIX fork to work
+            mp_ctx = mp.get_context("fork")
+            pool_size = min(pool_size, mp_ctx.cpu_count(), len(missing))
+            with mp_ctx.Pool(processes=pool_size,
+                             initializer=_init_pool,
+                             initargs=[chromosome]) as pool:
+                results = pool.map(_create_individual, missing)
+        except ValueError:
+            pass
+    if results is None:
+        results = [f(chromosome) for f in missing]
+
+    for f, indiv in zip(missing, results):
+        indiv = np.array(indiv, dtype=float)
+        indiv.flags.writeable = False
+        individuals[f.__name__] = indiv
+
+    return np.array([individuals[f.__name__] for f in functions])
 
 
 def create_individual_cloud(chromosome):
@@ -23,22 +104,9 @@ def create_individual_net_delay(chromosome):
     for a in r_apps:
         indiv[a] = 1.0
 
-        nodes_delay = []
-        max_delay = 1.0
-        for h in r_nodes:
-            avg_delay = 0.0
-            count = 0
-            for b in r_nodes:
-                # if chromosome.get_nb_users(a, b) > 0:
-                #     avg_delay += chromosome.get_net_delay(a, b, h)
-                #     count += 1
-                avg_delay += chromosome.get_net_delay(a, b, h)
-                count += 1
-            if count > 0:
-                avg_delay = avg_delay / float(count)
-            nodes_delay.append(avg_delay)
-            if avg_delay > max_delay:
-                max_delay = avg_delay
+        distances = chromosome.get_net_delay_matrix(a)
+        nodes_delay = distances.mean(axis=0)
+        max_delay = max(1.0, nodes_delay.max())
 
         for h in r_nodes:
             key = nb_apps + a * nb_nodes + h
@@ -65,27 +133,20 @@ def create_individual_cluster(chromosome):
         indiv[a] = 1.0
         app = chromosome.apps[a]
 
-        distances = [[app.get_net_delay(i, j)
-                      for j in chromosome.nodes]
-                     for i in chromosome.nodes]
+        distances = chromosome.get_net_delay_matrix(a)
         features = list(filter(lambda h: app.get_nb_users(chromosome.nodes[h]) > 0, r_nodes))
         max_nb_clusters = min(len(features), app.max_instances)
 
         clusters = [list(r_nodes)]
-        max_score = -1
         if max_nb_clusters > 1:
-            for k in range(1, max_nb_clusters + 1):
-                k_clusters = kmedoids.fit(k, features, distances)
-                k_score = kmedoids.silhouette_score(k_clusters, distances)
-                if k_score > max_score:
-                    max_score = k_score
-                    clusters = k_clusters
+            clusters, _ = _get_best_clusters(kmedoids, max_nb_clusters,
+                                             features, distances)
 
         nb_instances = min(nb_nodes, app.max_instances)
         cluster_nb_instances = nb_instances // len(clusters)
         for cluster in clusters:
-            priority = {i: sum([distances[i][j] for j in cluster])
-                        for i in cluster}
+            sum_dist = distances[np.ix_(cluster, cluster)].sum(axis=1)
+            priority = dict(zip(cluster, sum_dist))
             cluster.sort(key=lambda i: priority[i])
             for (index, h) in enumerate(cluster):
                 key = nb_apps + a * nb_nodes + h
@@ -115,26 +176,13 @@ def create_individual_cluster_metoids(chromosome):
         indiv[a] = 1.0
         app = chromosome.apps[a]
 
-        distances = [[app.get_net_delay(i, j)
-                      for j in chromosome.nodes]
-                     for i in chromosome.nodes]
+        distances = chromosome.get_net_delay_matrix(a)
         features = list(filter(lambda h: app.get_nb_users(chromosome.nodes[h]) > 0, r_nodes))
 
         nb_clusters = min(len(features), app.max_instances)
         kmedoids.fit(nb_clusters, features, distances)
         metoids = kmedoids.get_last_metoids()
-        m_distances = []
-        max_dist = 1.0
-        for h in r_nodes:
-            dist = min(map(lambda m: distances[h][m], metoids))
-            m_distances.append(dist)
-            if dist > max_dist:
-                max_dist = dist
-
-        for h in r_nodes:
-            key = nb_apps + a * nb_nodes + h
-            value = 1.0 - m_distances[h] / float(max_dist)
-            indiv[key] = value
+        _set_metoids_priority(chromosome, indiv, a, metoids, distances)
 
     return indiv
 
@@ -158,39 +206,47 @@ def create_individual_cluster_metoids_sc(chromosome):
         indiv[a] = 1.0
         app = chromosome.apps[a]
 
-        distances = [[app.get_net_delay(i, j)
-                      for j in chromosome.nodes]
-                     for i in chromosome.nodes]
+        distances = chromosome.get_net_delay_matrix(a)
         features = list(filter(lambda h: app.get_nb_users(chromosome.nodes[h]) > 0, r_nodes))
         max_nb_clusters = min(len(features), app.max_instances)
 
         metoids = list(r_nodes)
-        max_score = -1
         if max_nb_clusters > 1:
-            for k in range(1, max_nb_clusters + 1):
-                k_clusters = kmedoids.fit(k, features, distances)
-                k_score = kmedoids.silhouette_score(k_clusters, distances)
-                k_metoids = kmedoids.get_last_metoids()
-                if k_score > max_score:
-                    max_score = k_score
-                    metoids = k_metoids
-
-        m_distances = []
-        max_dist = 1.0
-        for h in r_nodes:
-            dist = min(map(lambda m: distances[h][m], metoids))
-            m_distances.append(dist)
-            if dist > max_dist:
-                max_dist = dist
-
-        for h in r_nodes:
-            key = nb_apps + a * nb_nodes + h
-            value = 1.0 - m_distances[h] / float(max_dist)
-            indiv[key] = value
+            _, metoids = _get_best_clusters(kmedoids, max_nb_clusters,
+                                            features, distances)
+        _set_metoids_priority(chromosome, indiv, a, metoids, distances)
 
     return indiv
 
 
+def _get_best_clusters(kmedoids, max_nb_clusters, features, distances):
+    """Get the clusters and medoids with the highest silhouette score
+    among 1 to max_nb_clusters clusters, computed by a warm-started k sweep
+    """
+    best = None
+    max_score = -1
+    for clusters, metoids, score in kmedoids.fit_sweep(max_nb_clusters,
+                                                       features, distances):
+        if score > max_score:
+            max_score = score
+            best = (clusters, metoids)
+    return best
+
+
+def _set_metoids_priority(chromosome, indiv, app_index, metoids, distances):
+    """Prioritize the nodes of an application closer to the medoids
+    """
+    nb_apps = len(chromosome.apps)
+    nb_nodes = len(chromosome.nodes)
+
+    m_distances = distances[:, metoids].min(axis=1)
+    max_dist = max(1.0, m_distances.max())
+
+    start = nb_apps + app_index * nb_nodes
+    values = 1.0 - m_distances / float(max_dist)
+    indiv[start:start + nb_nodes] = values.tolist()
+
+
 def create_individual_user(chromosome):
     """Create an individual that priorizes nodes
     with large number of users
@@ -302,8 +358,8 @@ def create_individual_deadline(chromosome):
 def invert_individual(chromosome, individual):
     """Invert a individual representation
     """
-    indiv = individual[:chromosome.nb_genes]
-    return list(map(lambda i: 1.0 - i, indiv))
+    indiv = np.asarray(individual[:chromosome.nb_genes], dtype=float)
+    return (1.0 - indiv).tolist()
 
 
 def merge_population(chromosome, population, weights=None):
@@ -314,24 +370,22 @@ def merge_population(chromosome, population, weights=None):
     if weights is None:
         weights = [1.0 / float(pop_size)] * pop_size
 
-    merged_indiv = [0] * nb_genes
-    for g in range(nb_genes):
-        value = 0.0
-        for i, indiv in enumerate(population):
-            value += weights[i] * indiv[g]
-        merged_indiv[g] = value
+    population = np.array([indiv[:nb_genes] for indiv in population],
+                          dtype=float)
+    merged_indiv = np.dot(weights, population)
+    return merged_indiv.tolist()
 
-    return merged_indiv
 
-
-def merge_creation_functions(chromosome, functions, weights=None):
+def merge_creation_functions(chromosome, functions, weights=None,
+                             pool_size=0):
     """Create an individual by merging the results of
     a list of creation functions
     """
-    population = [f(chromosome) for f in functions]
+    if len(functions) == 0:
+        return None
+
+    population = create_individuals(chromosome, functions, pool_size)
     if len(population) > 1:
         return merge_population(chromosome, population, weights)
-    elif len(population) > 0:
-        return population[0]
     else:
-        return None
+        return population[0].tolist()
@@ -1,108 +1,258 @@
-import random
+import numpy as np
+
 INF = float("inf")
+SWAP_TOLERANCE = 1e-9
 
 
 class KMedoids():
-    def __init__(self, max_iterations=300):
+    """K-Medoids clustering over a precomputed distance matrix
+    The assignment and update steps are vectorized with NumPy and
+    the alternate (Voronoi iteration) phase is refined by a PAM swap phase
+    using the FastPAM1 cost decomposition
+    See also:
+    https://doi.org/10.1016/j.is.2021.101804
+    """
+
+    def __init__(self, max_iterations=300, swap=True):
+        """Initialize method
+        Args:
+            max_iterations (int): maximum number of iterations of each phase
+            swap (bool): whether the PAM swap phase is executed
+        """
         self.max_iterations = max_iterations
+        self.swap = swap
         self.last_metoids = []
+        self._distances = None
+        self._matrix = None
 
     def fit(self, nb_clusters, data, distances):
-        r_clusters = range(nb_clusters)
+        """Cluster the data
+        Args:
+            nb_clusters (int): number of clusters
+            data (list): indexes of the data in the distance matrix
+            distances (list): distance matrix, list of lists or NumPy array
+        Returns:
+            clusters: list of clusters, each one is a list of data indexes
+        """
+        data = np.asarray(data, dtype=int)
+        nb_clusters = min(nb_clusters, len(data))
+        if nb_clusters <= 0:
+            self.last_metoids = []
+            return []
 
-        labels = {v: -1 for v in data}
-        metoids = self._initial_metoids(nb_clusters, data, distances)
+        matrix = self._get_matrix(distances)
+        d = matrix[np.ix_(data, data)]
+
+        metoids = self._initial_metoids(nb_clusters, d)
+        labels, metoids = self._alternate(d, metoids)
+        if self.swap and nb_clusters < len(data):
+            labels, metoids = self._swap(d, metoids)
+
+        self.last_metoids = data[metoids].tolist()
+        return [data[labels == label].tolist() for label in range(nb_clusters)]
+
+    def get_last_metoids(self):
+        return self.last_metoids
+
+    def _get_matrix(self, distances):
+        """Get the distance matrix as a NumPy array
+        The conversion of the last list of lists is cached
+        """
+        if isinstance(distances, np.ndarray):
+            return distances
+        if distances is not self._distances:
+            self._distances = distances
+            self._matrix = np.asarray(distances, dtype=float)
+        return self._matrix
+
+    def _initial_metoids(self, nb_clusters, d):
+        sum_dist = d.sum(axis=1)
+        valid = sum_dist > 0.0
+        priority = (d[valid] / sum_dist[valid, np.newaxis]).sum(axis=0)
+        metoids = np.argsort(priority, kind="stable")[:nb_clusters]
+        return metoids
+
+    def _assign(self, d, metoids):
+        """Assign each datum to its closest medoid,
+        ties are assigned to the medoid with the highest label
+        """
+        nb_clusters = len(metoids)
+        m_distances = d[:, metoids]
+        return nb_clusters - 1 - np.argmin(m_distances[:, ::-1], axis=1)
+
+    def _alternate(self, d, metoids):
+        nb_data = len(d)
+        nb_clusters = len(metoids)
+        metoids = np.array(metoids)
+        labels = np.full(nb_data, -1)
 
-        clusters = None
-        changed = True
         iter = 0
+        changed = True
         while iter < self.max_iterations and changed:
-            clusters = [[] for _ in r_clusters]
-            changed = False
-            for v in data:
-                min_dist = INF
-                new_label = -1
-                for label in r_clusters:
-                    metoid = metoids[label]
-                    if distances[v][metoid] <= min_dist:
-                        new_label = label
-                        min_dist = distances[v][metoid]
-                if new_label != labels[v]:
-                    changed = True
-                labels[v] = new_label
-                clusters[new_label].append(v)
-
-            for label in r_clusters:
-                cluster = clusters[label]
-                metoid = metoids[label]
-                min_sum_dist = INF
-                for v in cluster:
-                    sum_dist = sum([distances[v][u] for u in cluster])
-                    if sum_dist < min_sum_dist:
-                        min_sum_dist = sum_dist
-                        metoid = v
-                metoids[label] = metoid
+            new_labels = self._assign(d, metoids)
+            changed = np.any(new_labels != labels)
+            labels = new_labels
+
+            # sum of distances of each datum to the data of its cluster
+            one_hot = np.zeros((nb_data, nb_clusters))
+            one_hot[np.arange(nb_data), labels] = 1.0
+            own_dist = (d @ one_hot)[np.arange(nb_data), labels]
+
+            # the first datum with the min sum in each non-empty cluster
+            order = np.lexsort((own_dist, labels))
+            first = np.ones(nb_data, dtype=bool)
+            first[1:] = labels[order][1:] != labels[order][:-1]
+            selected = order[first]
+            metoids[labels[selected]] = selected
 
             iter = iter + 1
-        self.last_metoids = metoids
 
-        return clusters
+        return labels, metoids
 
-    def get_last_metoids(self):
-        return self.last_metoids
+    def _swap(self, d, metoids):
+        nb_data = len(d)
+        nb_clusters = len(metoids)
+        r_data = np.arange(nb_data)
+        metoids = np.array(metoids)
 
-    # def _initial_metoids(self, nb_clusters, data, distances):
-    #     metoids = random.sample(data, k=nb_clusters)
-    #     return metoids
+        for _ in range(self.max_iterations):
+            m_distances = d[:, metoids]
+            order = np.argsort(m_distances, axis=1)
+            nearest_label = order[:, 0]
+            nearest = m_distances[r_data, nearest_label]
+            if nb_clusters > 1:
+                second = m_distances[r_data, order[:, 1]]
+            else:
+                second = np.full(nb_data, INF)
 
-    def _initial_metoids(self, nb_clusters, data, distances):
-        r_data = range(len(data))
-        priority = {v: 0.0 for v in data}
-        sum_dist = [sum([distances[i][l] for l in data]) for i in data]
+            # FastPAM1: change of the total deviation of swapping
+            # medoid i with the candidate x, for all (i, x) at once
+            to_nearest = np.minimum(d, nearest[:, np.newaxis])
+            to_second = np.minimum(d, second[:, np.newaxis])
+            shared = (to_nearest - nearest[:, np.newaxis]).sum(axis=0)
+            one_hot = np.zeros((nb_data, nb_clusters))
+            one_hot[r_data, nearest_label] = 1.0
+            removal = one_hot.T @ (to_second - to_nearest)
+            delta = shared[np.newaxis, :] + removal
+            delta[:, metoids] = INF
 
-        for j in r_data:
-            for i in r_data:
-                if sum_dist[i] > 0.0:
-                    datum_i = data[i]
-                    datum_j = data[j]
-                    priority[datum_j] += distances[datum_i][datum_j] / sum_dist[i]
+            i, x = np.unravel_index(np.argmin(delta), delta.shape)
+            if delta[i, x] >= -SWAP_TOLERANCE:
+                break
+            metoids[i] = x
 
-        s_data = sorted(data, key=lambda i: priority[i])
-        metoids = s_data[:nb_clusters]
-        return metoids
+        return self._assign(d, metoids), metoids
+
+    def fit_sweep(self, max_clusters, data, distances):
+        """Cluster the data for every number of clusters from 1 to max_clusters
+        The medoids found for k clusters plus the datum that most reduces
+        the total deviation (PAM build step) warm start the clustering with
+        k + 1 clusters. The silhouette score is updated incrementally
+        from the data that changed of cluster
+        Args:
+            max_clusters (int): maximum number of clusters
+            data (list): indexes of the data in the distance matrix
+            distances (list): distance matrix, list of lists or NumPy array
+        Returns:
+            generator: tuples (clusters, medoids, silhouette score) for each k
+        """
+        data = np.asarray(data, dtype=int)
+        nb_data = len(data)
+        max_clusters = min(max_clusters, nb_data)
+        if max_clusters <= 0:
+            return
+
+        matrix = self._get_matrix(distances)
+        d = matrix[np.ix_(data, data)]
+
+        labels = np.zeros(nb_data, dtype=int)
+        cluster_sum = d.sum(axis=1)[:, np.newaxis]
+        metoids = self._initial_metoids(1, d)
+        for k in range(1, max_clusters + 1):
+            if k > 1:
+                metoids = np.append(metoids, self._build_metoid(d, metoids))
+                cluster_sum = np.hstack([cluster_sum, np.zeros((nb_data, 1))])
+
+            new_labels, metoids = self._alternate(d, metoids)
+            if self.swap and k < nb_data:
+                new_labels, metoids = self._swap(d, metoids)
+
+            moved = np.flatnonzero(new_labels != labels)
+            if len(moved) > 0:
+                change = np.zeros((len(moved), k))
+                change[np.arange(len(moved)), new_labels[moved]] += 1.0
+                change[np.arange(len(moved)), labels[moved]] -= 1.0
+                cluster_sum += d[:, moved] @ change
+            labels = new_labels
+
+            sizes = np.bincount(labels, minlength=k)
+            score = self._silhouette(labels, sizes, cluster_sum)
+            self.last_metoids = data[metoids].tolist()
+            clusters = [data[labels == label].tolist() for label in range(k)]
+            yield clusters, self.last_metoids, score
+
+    def _build_metoid(self, d, metoids):
+        """Select the datum that most reduces the total deviation
+        if added as a new medoid
+        """
+        nearest = d[:, metoids].min(axis=1)
+        gain = np.maximum(nearest[:, np.newaxis] - d, 0.0).sum(axis=0)
+        gain[metoids] = -1.0
+        return np.argmax(gain)
 
     def silhouette_score(self, clusters, distances):
+        """Calculate the mean silhouette of the clusters
+        The silhouette of each cluster is the mean silhouette of its data,
+        clusters with less than two data have zero silhouette
+        Args:
+            clusters (list): list of clusters, each one is a list of data indexes
+            distances (list): distance matrix, list of lists or NumPy array
+        Returns:
+            score: silhouette score
+        """
         nb_clusters = len(clusters)
-        r_clusters = range(nb_clusters)
         if nb_clusters <= 1:
             return 0.0
-        s = sum([self._cluster_silhouette(label, clusters, distances) for label in r_clusters])
-        s = s / float(len(clusters))
-        return s
-
-    def _cluster_silhouette(self, label, clusters, distances):
-        c = clusters[label]
-        cluster_size = len(c)
-        if cluster_size <= 1:
-            return 0.0
-        s = sum([self._datum_silhouette(datum, label, clusters, distances) for datum in c])
-        s = s / float(cluster_size)
-        return s
 
-    def _datum_silhouette(self, datum, label, clusters, distances):
-        cluster = clusters[label]
-        if len(cluster) <= 1 or len(clusters) <= 1:
-            return 0.0
+        sizes = np.array([len(c) for c in clusters])
+        data = np.concatenate([np.asarray(c, dtype=int) for c in clusters])
+        labels = np.repeat(np.arange(nb_clusters), sizes)
+        nb_data = len(data)
 
-        a = sum([distances[datum][v] for v in cluster]) / float(len(cluster))
-        b = INF
-        for c_label, c in enumerate(clusters):
-            if c_label == label or len(c) == 0:
-                continue
-            c_b = sum([distances[datum][v] for v in c]) / float(len(c))
-            if c_b < b:
-                b = c_b
+        matrix = self._get_matrix(distances)
+        d = matrix[np.ix_(data, data)]
+        one_hot = np.zeros((nb_data, nb_clusters))
+        one_hot[np.arange(nb_data), labels] = 1.0
 
-        if b == 0.0 and a == 0.0:
+        return self._silhouette(labels, sizes, d @ one_hot)
+
+    def _silhouette(self, labels, sizes, cluster_sum):
+        """Calculate the silhouette score
+        Args:
+            labels (numpy.ndarray): cluster of each datum
+            sizes (numpy.ndarray): size of each cluster
+            cluster_sum (numpy.ndarray): sum of distances of each datum
+                                         to the data of each cluster
+        Returns:
+            score: silhouette score
+        """
+        nb_clusters = len(sizes)
+        if nb_clusters <= 1:
             return 0.0
-        return (b - a) / float(max(b, a))
+        r_data = np.arange(len(labels))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_dist = cluster_sum / sizes
+            mean_dist[:, sizes == 0] = INF
+            a = mean_dist[r_data, labels]
+            mean_dist[r_data, labels] = INF
+            b = mean_dist.min(axis=1)
+
+            max_ab = np.maximum(a, b)
+            s = np.where(max_ab > 0.0, (b - a) / max_ab, 0.0)
+            s[sizes[labels] <= 1] = 0.0
+
+            c_s = np.bincount(labels, weights=s, minlength=nb_clusters)
+            c_s = np.where(sizes > 1, c_s / sizes, 0.0)
+
+        return float(c_s.sum() / nb_clusters)
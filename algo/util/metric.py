@@ -283,6 +283,76 @@ class Metric():
             avg = avg / float(nb_apps)
         return avg
 
+    def get_upper_bound(self, metric_name):
+        """Get an upper bound of a metric calculated from the input only,
+        over the solutions with at least one instance of each application.
+        It is the same for any solver, so it can be used as a common
+        reference point of the hypervolume
+        Args:
+            metric_name (str): name of the metric method,
+                               e.g., "get_overall_cost"
+        Returns:
+            bound: upper bound, or None if the metric has no finite bound
+        """
+        bounds = {
+            "get_max_deadline_violation": self._get_deadline_violation_bound,
+            "get_qos_violation": self._get_deadline_violation_bound,
+            "get_overall_cost": self._get_cost_bound,
+            "get_cost": self._get_cost_bound,
+            "get_avg_unavailability": self._get_unavailability_bound,
+        }
+        if metric_name not in bounds:
+            return None
+        return bounds[metric_name]()
+
+    def _get_deadline_violation_bound(self):
+        # the processing delay decreases with the load if k1 >= work size
+        r_apps = self.filter.get_r_apps()
+        r_nodes = self.filter.get_r_nodes()
+
+        max_e = 0.0
+        for a in r_apps:
+            app = self.apps[a]
+            cpu_k1, cpu_k2 = app.get_cpu_demand()
+            if cpu_k1 < app.work_size or cpu_k2 <= 0:
+                return None
+            proc_delay = app.work_size / float(cpu_k2)
+            net_delay = max([self._get_network_delay(a, b, h)
+                             for b in r_nodes for h in r_nodes])
+            max_e = max(max_e, net_delay + proc_delay - app.deadline)
+        return max_e
+
+    def _get_cost_bound(self):
+        # an instance in every node and all the load in the most costly one
+        r_apps = self.filter.get_r_apps()
+        r_nodes = self.filter.get_r_nodes()
+
+        total_cost = 0.0
+        for a in r_apps:
+            app = self.apps[a]
+            nb_requests = sum([app.get_nb_requests(self.nodes[b])
+                               for b in r_nodes])
+            for r in self.resources:
+                k1, k2 = app.get_demand(r)
+                costs = [self.nodes[h].get_cost(r) for h in r_nodes]
+                total_cost += sum([cost_1 * k2 + cost_2
+                                   for cost_1, cost_2 in costs])
+                total_cost += max([cost_1 for cost_1, _ in costs]) * k1 * nb_requests
+        return total_cost
+
+    def _get_unavailability_bound(self):
+        # a single instance in the least available node
+        r_apps = self.filter.get_r_apps()
+        r_nodes = self.filter.get_r_nodes()
+        nb_apps = len(r_apps)
+
+        min_availability = min([self.nodes[h].availability for h in r_nodes])
+        avg = sum([1.0 - self.apps[a].availability * min_availability
+                   for a in r_apps])
+        if nb_apps > 0:
+            avg = avg / float(nb_apps)
+        return avg
+
 
 class MetricFilter:
     def __init__(self, input):
@@ -1,10 +1,17 @@
 from functools import cmp_to_key
+import numpy as np
 from algo.util.brkga import BRKGA, Chromosome
+from algo.util.pareto import Pareto_Archive, hypervolume
 
 
 INF = float("inf")
 MAX_CRWD_DIST = 1.0
 # MAX_CRWD_DIST = INF
+# Margin of the default hypervolume reference point
+# as a proportion of the objective ranges of the first generation
+HV_MARGIN = 0.1
+# Number of generations of the hypervolume stopping criteria
+HV_WINDOW = 10
 
 
 # Non-dominated Sorting Genetic Algorithm II
@@ -17,12 +24,37 @@ class NSGAII(BRKGA):
                  mutant_proportion,
                  elite_probability,
                  pool_size=0,
-                 stop_threshold=0.0):
+                 stop_threshold=0.0,
+                 seed=None,
+                 telemetry=None,
+                 time_limit=0,
+                 max_evaluations=0,
+                 archive_size=None,
+                 hv_reference=None,
+                 hv_threshold=0.0):
+        """Initialize method
+        Args:
+            stop_threshold (float): threshold of the MGBM stopping criteria
+            archive_size (int): maximum size of the Pareto archive,
+                                the population size if None,
+                                unbounded if 0
+            hv_reference (list): reference point of the hypervolume,
+                                 by default the worst values of the first
+                                 generation plus a margin
+            hv_threshold (float): stop if the relative improvement of the
+                                  hypervolume in the last generations is
+                                  below the threshold, disabled if 0
+            other arguments are the same of BRKGA
+        """
 
         BRKGA.__init__(self, chromossome, population_size, nb_generations,
                        elite_proportion, mutant_proportion, elite_probability,
-                       pool_size)
+                       pool_size, seed, telemetry, time_limit, max_evaluations)
         self.stop_threshold = stop_threshold
+        self.archive_size = archive_size
+        self.hv_reference = hv_reference
+        self.hv_threshold = hv_threshold
+        self.archive = None
 
     def _init_params(self):
         BRKGA._init_params(self)
@@ -30,10 +62,105 @@ class NSGAII(BRKGA):
         self._current_nd_fitness = None
         self._mgbm_estimation = 1
         self._mgbm_count = 0
+        self._mdr = None
+
+        archive_size = self.archive_size
+        if archive_size is None:
+            archive_size = self.pop_size
+        self.archive = Pareto_Archive(archive_size)
+        self._hv_ideal = None
+        self._hv_scale = None
+        self._hv_rng = np.random.default_rng(self.seed)
+        self._hypervolumes = []
 
     def _stopping_criteria(self, population):
         return (self.chromossome.stopping_criteria(population)
-                or self._stopping_criteria_mgbm())
+                or self._stopping_criteria_mgbm()
+                or self._stopping_criteria_hv())
+
+    def _stopping_criteria_hv(self):
+        """Stop if the hypervolume of the archive stalls
+        Returns:
+            stop: True if the relative improvement of the hypervolume
+                  in the last HV_WINDOW generations is below the threshold
+        """
+        improvement = self._get_hv_improvement()
+        return (self.hv_threshold > 0.0 and improvement is not None
+                and improvement < self.hv_threshold)
+
+    def _get_hv_improvement(self):
+        """Get the relative improvement of the hypervolume of the archive
+        in the last HV_WINDOW generations
+        Returns:
+            improvement: relative improvement, or None if there are not
+                         enough generations
+        """
+        if len(self._hypervolumes) <= HV_WINDOW:
+            return None
+        previous = self._hypervolumes[-1 - HV_WINDOW]
+        current = self._hypervolumes[-1]
+        if previous <= 0.0:
+            return INF if current > 0.0 else 0.0
+        return (current - previous) / previous
+
+    def _update_archive(self, population, fitnesses, front):
+        """Add the first front of a generation to the Pareto archive
+        and calculate the hypervolume of the archive
+        Args:
+            population (list): population of the generation
+            fitnesses (list): fitness of each individual
+            front (list): indexes of the individuals of the first front
+        """
+        if self._hv_ideal is None:
+            self._init_hv_bounds(fitnesses)
+
+        changed = self.archive.add([population[i] for i in front],
+                                   [fitnesses[i] for i in front])
+        if changed or not self._hypervolumes:
+            self._hypervolumes.append(self._calc_hypervolume())
+        else:
+            self._hypervolumes.append(self._hypervolumes[-1])
+
+    def _init_hv_bounds(self, fitnesses):
+        """Set the normalization of the objectives for the hypervolume
+        The objectives are scaled so the ideal point of the first
+        generation is 0 and the reference point is 1
+        Args:
+            fitnesses (list): fitnesses of the first generation
+        """
+        values = np.array(fitnesses, dtype=float)
+        ideal = values.min(axis=0)
+        if self.hv_reference is not None:
+            reference = np.array(self.hv_reference, dtype=float)
+        else:
+            nadir = values.max(axis=0)
+            margin = HV_MARGIN * (nadir - ideal)
+            margin = np.where(margin > 0.0, margin,
+                              HV_MARGIN * np.maximum(np.abs(nadir), 1.0))
+            reference = nadir + margin
+        scale = reference - ideal
+        self._hv_ideal = ideal
+        self._hv_scale = np.where(scale > 0.0, scale, 1.0)
+
+    def _calc_hypervolume(self):
+        """Calculate the normalized hypervolume of the archive
+        Returns:
+            hypervolume: hypervolume of the archive in the box between the
+                         ideal point of the first generation and the
+                         reference point, usually in [0, 1]
+        """
+        front = (self.archive.get_front() - self._hv_ideal) / self._hv_scale
+        reference = np.ones(len(self._hv_ideal))
+        return hypervolume(front, reference, rng=self._hv_rng)
+
+    def get_hypervolume(self):
+        """Get the normalized hypervolume of the archive
+        Returns:
+            hypervolume: hypervolume of the last generation, or None
+        """
+        if not self._hypervolumes:
+            return None
+        return self._hypervolumes[-1]
 
     def _stopping_criteria_mgbm(self):
         """Calculate the MGBM stopping criteria
@@ -68,10 +195,53 @@ class NSGAII(BRKGA):
             i = self._mgbm_estimation
             i = (t / float(t + 1)) * i + (1 / float(t + 1)) * mdr
             self._mgbm_estimation = i
+            self._mdr = mdr
             # print("{}\t{}\t{}".format(t, mdr, i))
 
         return self._mgbm_estimation < self.stop_threshold
 
+    def _get_stopping_values(self):
+        values = BRKGA._get_stopping_values(self)
+        values["mdr"] = self._mdr
+        values["mgbm"] = self._mgbm_estimation
+        values["hv_improvement"] = self._get_hv_improvement()
+        return values
+
+    def _get_generation_stats(self, population):
+        """Get the statistics of a generation for the telemetry
+        Args:
+            population (list): sorted population of the generation
+        Returns:
+            stats: dictionary with the size of the first front and of the
+                   archive, the hypervolume of the archive, and the best
+                   and the mean value of each objective
+        """
+        values = np.array([indiv[-1] for indiv in population], dtype=float)
+        return {"front_size": len(self._current_nd_fitness),
+                "archive_size": len(self.archive),
+                "hypervolume": self.get_hypervolume(),
+                "best": values.min(axis=0).tolist(),
+                "mean": values.mean(axis=0).tolist()}
+
+    def _get_best(self, population):
+        return list(self._current_nd_fitness)
+
+    def _is_improvement(self, best, previous):
+        """Verify whether a first front improves a previous one,
+        i.e., whether it has a fitness not found or dominated in the previous
+        Args:
+            best (list): fitnesses of the first front
+            previous (list): fitnesses of the previous first front, or None
+        Returns:
+            improved: True if the front is better than the previous one
+        """
+        if previous is None:
+            return True
+        return any(all(fitness != prev_fitness
+                       and not self._dominates(prev_fitness, fitness)
+                       for prev_fitness in previous)
+                   for fitness in best)
+
     def _classify_population(self, population):
         fitnesses = self._get_fitnesses(population)
         fronts, rank = self._fast_non_dominated_sort(fitnesses)
@@ -79,6 +249,7 @@ class NSGAII(BRKGA):
 
         self._previous_nd_fitness = self._current_nd_fitness
         self._current_nd_fitness = list(map(lambda i: fitnesses[i], fronts[0]))
+        self._update_archive(population, fitnesses, fronts[0])
 
         def sort_cmp(indiv_1, indiv_2):
             index_1 = population.index(indiv_1)
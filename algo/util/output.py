@@ -1,5 +1,119 @@
 import math
+import numpy as np
 from algo.util.metric import Metric
+from algo.util.sp import as_arrays
+
+
+class Violation_Report:
+    """Constraints violated by a solution and by how much
+    Attributes:
+        instances (dict): number of instances of an app above its maximum
+                          (positive) or below one (negative), indexed by app
+        demand (dict): requests assigned minus requests generated,
+                       indexed by (app, source node)
+        placement (dict): load assigned to a node without the app instance,
+                          indexed by (app, source node, target node)
+        capacity (dict): demand above the capacity of a node,
+                         indexed by (node, resource)
+    """
+
+    def __init__(self):
+        self.instances = {}
+        self.demand = {}
+        self.placement = {}
+        self.capacity = {}
+
+    def is_valid(self):
+        return not (self.instances or self.demand
+                    or self.placement or self.capacity)
+
+    def get_nb_violations(self):
+        return (len(self.instances) + len(self.demand)
+                + len(self.placement) + len(self.capacity))
+
+    def to_dict(self):
+        return {
+            "instances": self.instances,
+            "demand": self.demand,
+            "placement": self.placement,
+            "capacity": self.capacity
+        }
+
+    def __str__(self):
+        if self.is_valid():
+            return "valid"
+        items = []
+        for name, violations in self.to_dict().items():
+            for key, value in sorted(violations.items()):
+                items.append("{} {}: {}".format(name, key, value))
+        return "\n".join(items)
+
+
+class Feasibility_Checker:
+    """Vectorized feasibility check of solutions of an input
+    The parameters of the input are stored as arrays once, so the check
+    of each solution is a few array operations
+    """
+
+    def __init__(self, input):
+        """Initialize method
+        Args:
+            input (Input): input of the problem
+        """
+        self.input = input
+        apps = input.apps
+        nodes = input.nodes
+        resources = list(input.resources)
+        self.resources = resources
+
+        self._max_instances = np.array([app.max_instances for app in apps])
+        self._requests = np.array([[int(math.ceil(app.get_nb_users(node)
+                                                  * app.request_rate))
+                                    for node in nodes]
+                                   for app in apps], dtype=int)
+        self._k1 = np.array([[app.get_demand_k1(r) for r in resources]
+                             for app in apps], dtype=float)
+        self._k2 = np.array([[app.get_demand_k2(r) for r in resources]
+                             for app in apps], dtype=float)
+        self._capacity = np.array([[node.get_capacity(r) for r in resources]
+                                   for node in nodes], dtype=float)
+
+    def check(self, place, load):
+        """Check all the constraints of a solution
+        Args:
+            place (dict): placement indexed by (app, node), or a NumPy array
+            load (dict): load indexed by (app, source node, target node),
+                         or a NumPy array
+        Returns:
+            report: Violation_Report of the solution
+        """
+        nb_apps, nb_nodes = self._requests.shape
+        place, load = as_arrays(place, load, nb_apps, nb_nodes)
+        placed = place > 0
+        report = Violation_Report()
+
+        nb_instances = placed.sum(axis=1)
+        excess = np.where(nb_instances == 0, -1,
+                          np.maximum(nb_instances - self._max_instances, 0))
+        for a in np.flatnonzero(excess):
+            report.instances[int(a)] = int(excess[a])
+
+        diff = load.sum(axis=2) - self._requests
+        for a, b in zip(*np.nonzero(diff)):
+            report.demand[int(a), int(b)] = int(diff[a, b])
+
+        unplaced = (load > 0) & ~placed[:, np.newaxis, :]
+        for a, b, h in zip(*np.nonzero(unplaced)):
+            report.placement[int(a), int(b), int(h)] = int(load[a, b, h])
+
+        node_load = load.sum(axis=1)
+        demand = (np.einsum("ah,ar->hr", placed * node_load, self._k1)
+                  + np.einsum("ah,ar->hr", placed, self._k2))
+        excess = demand - self._capacity
+        for h, r in zip(*np.nonzero(excess > 0.0)):
+            report.capacity[int(h), self.resources[r]] = float(excess[h, r])
+
+        return report
 
 
 class Output:
@@ -8,56 +122,36 @@ class Output:
         self.place = place
         self.load = load
         self.metric = Metric(input)
+        self.pareto_front = None
+        self.hypervolume = None
 
     def set_solution(self, place, load):
         self.place = place
         self.load = load
         return self
 
+    def set_pareto_front(self, front, hypervolume=None):
+        """Set the Pareto front found by a multi-objective solver
+        Args:
+            front (numpy.ndarray): (n, m) array with the values of the
+                                   m objectives of n non-dominated solutions
+            hypervolume (float): normalized hypervolume of the front
+        Returns:
+            output: this object
+        """
+        self.pareto_front = front
+        self.hypervolume = hypervolume
+        return self
+
     def get_vars(self):
         return self.place, self.load
 
     def get_qos_violation(self):
         return self.metric.get_qos_violation(self.place, self.load)
 
+    def get_violations(self):
+        checker = Feasibility_Checker(self.input)
+        return checker.check(self.place, self.load)
+
     def is_valid(self):
-        r_apps = range(len(self.input.apps))
-        r_nodes = range(len(self.input.nodes))
-        place = self.place
-        load = self.load
-        apps = self.input.apps
-        nodes = self.input.nodes
-        resources = self.input.resources
-
-        for a in r_apps:
-            app = apps[a]
-            nb_instances = sum([place[a, h] for h in r_nodes])
-            if nb_instances > app.max_instances or nb_instances == 0:
-                return False
-            for b in r_nodes:
-                node_b = nodes[b]
-                rate = app.request_rate
-                nb_users = app.get_nb_users(node_b)
-                requests = int(math.ceil(nb_users * rate))
-                total_load = int(sum([load[a, b, h] for h in r_nodes]))
-                if requests != total_load:
-                    return False
-                for h in r_nodes:
-                    if load[a, b, h] > 0 and not place[a, h]:
-                        return False
-
-        for h in r_nodes:
-            node = nodes[h]
-            for r in resources:
-                demand = 0
-                for a in r_apps:
-                    app = apps[a]
-                    k1, k2 = app.get_demand(r)
-                    node_load = int(sum([load[a, b, h] for b in r_nodes]))
-                    demand += float(place[a, h] * (node_load * k1 + k2))
-                    if node_load > 0 and not place[a, h]:
-                        return False
-                if demand > node.get_capacity(r):
-                    return False
-
-        return True
+        return self.get_violations().is_valid()
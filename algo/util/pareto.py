@@ -0,0 +1,254 @@
+import numpy as np
+
+# Number of random samples of the Monte Carlo hypervolume estimation
+MC_SAMPLES = 100000
+# Number of samples checked at once by the Monte Carlo estimation
+MC_BATCH_SIZE = 10000
+
+
+def get_non_dominated(points):
+    """Get the points not dominated by any other point (minimization)
+    Duplicated points are kept only once
+    Args:
+        points (numpy.ndarray): (n, m) array of n points with m objectives
+    Returns:
+        mask: boolean array, True for the non-dominated points
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    # dominated[i, j] is True if point j dominates point i
+    less_equal = np.all(points[np.newaxis, :, :] <= points[:, np.newaxis, :],
+                        axis=2)
+    less = np.any(points[np.newaxis, :, :] < points[:, np.newaxis, :], axis=2)
+    mask = ~np.any(less_equal & less, axis=1)
+
+    # remove duplicates
+    equal = np.all(points[np.newaxis, :, :] == points[:, np.newaxis, :],
+                   axis=2)
+    first = np.argmax(equal, axis=1)
+    return mask & (first == np.arange(len(points)))
+
+
+def get_crowding_distances(points):
+    """Get the crowding distance of each point of a front
+    Args:
+        points (numpy.ndarray): (n, m) array of n points with m objectives
+    Returns:
+        distances: array with the distance of each point,
+                   the extreme points have infinite distance
+    """
+    points = np.asarray(points, dtype=float)
+    nb_points, nb_obj = points.shape
+    distances = np.zeros(nb_points)
+    if nb_points <= 2:
+        distances[:] = np.inf
+        return distances
+
+    for m in range(nb_obj):
+        order = np.argsort(points[:, m], kind="stable")
+        values = points[order, m]
+        distances[order[0]] = distances[order[-1]] = np.inf
+        value_range = values[-1] - values[0]
+        if value_range > 0.0:
+            distances[order[1:-1]] += (values[2:] - values[:-2]) / value_range
+    return distances
+
+
+def hypervolume(points, reference, nb_samples=MC_SAMPLES, rng=None):
+    """Hypervolume dominated by a set of points (minimization)
+    and bounded by a reference point.
+    The calculation is exact for up to 3 objectives and a Monte Carlo
+    estimation for more objectives
+    Args:
+        points (numpy.ndarray): (n, m) array of n points with m objectives
+        reference (numpy.ndarray): reference point with m values
+        nb_samples (int): number of samples of the Monte Carlo estimation
+        rng (numpy.random.Generator): random generator of the estimation
+    Returns:
+        hypervolume: volume of the dominated region
+    """
+    reference = np.asarray(reference, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, len(reference))
+    points = points[np.all(points < reference, axis=1)]
+    if len(points) == 0:
+        return 0.0
+    points = points[get_non_dominated(points)]
+
+    nb_obj = len(reference)
+    if nb_obj == 1:
+        return float(reference[0] - points[:, 0].min())
+    elif nb_obj == 2:
+        return _hypervolume_2d(points, reference)
+    elif nb_obj == 3:
+        return _hypervolume_3d(points, reference)
+    else:
+        return _hypervolume_monte_carlo(points, reference, nb_samples, rng)
+
+
+def normalized_hypervolume(points, ideal, reference, nb_samples=MC_SAMPLES,
+                           rng=None):
+    """Hypervolume of a set of points in the box between a fixed ideal
+    point and a reference point, scaled so the box has unit volume.
+    With the same ideal and reference points, e.g., bounds of the instance,
+    the values of different runs and solvers are comparable
+    Args:
+        points (numpy.ndarray): (n, m) array of n points with m objectives
+        ideal (numpy.ndarray): ideal point with m values
+        reference (numpy.ndarray): reference point with m values
+        nb_samples (int): number of samples of the Monte Carlo estimation
+        rng (numpy.random.Generator): random generator of the estimation
+    Returns:
+        hypervolume: normalized volume of the dominated region in [0, 1]
+    """
+    ideal = np.asarray(ideal, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    scale = reference - ideal
+    scale = np.where(scale > 0.0, scale, 1.0)
+    points = np.asarray(points, dtype=float).reshape(-1, len(reference))
+    points = (np.maximum(points, ideal) - ideal) / scale
+    return hypervolume(points, np.ones(len(reference)), nb_samples, rng)
+
+
+def _hypervolume_2d(points, reference):
+    """Exact hypervolume of 2 objectives by a sweep on the first objective
+    """
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    volume = 0.0
+    previous_y = reference[1]
+    for x, y in points[order]:
+        if y < previous_y:
+            volume += (reference[0] - x) * (previous_y - y)
+            previous_y = y
+    return float(volume)
+
+
+def _hypervolume_3d(points, reference):
+    """Exact hypervolume of 3 objectives by slicing the third objective
+    Each slice between consecutive values is a 2-dimensional hypervolume
+    """
+    order = np.argsort(points[:, 2], kind="stable")
+    points = points[order]
+    z_values = np.append(points[:, 2], reference[2])
+    volume = 0.0
+    for i in range(len(points)):
+        height = z_values[i + 1] - z_values[i]
+        if height > 0.0:
+            area = _hypervolume_2d(points[:i + 1, :2], reference[:2])
+            volume += area * height
+    return float(volume)
+
+
+def _hypervolume_monte_carlo(points, reference, nb_samples, rng):
+    """Monte Carlo estimation of the hypervolume
+    Samples are drawn uniformly in the box between the ideal point
+    of the set and the reference point
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    ideal = points.min(axis=0)
+    box_volume = float(np.prod(reference - ideal))
+    if box_volume <= 0.0:
+        return 0.0
+
+    nb_dominated = 0
+    remaining = nb_samples
+    while remaining > 0:
+        size = min(remaining, MC_BATCH_SIZE)
+        samples = rng.uniform(ideal, reference, size=(size, len(reference)))
+        dominated = np.zeros(size, dtype=bool)
+        for point in points:
+            dominated |= np.all(samples >= point, axis=1)
+        nb_dominated += int(dominated.sum())
+        remaining -= size
+
+    return box_volume * nb_dominated / float(nb_samples)
+
+
+class Pareto_Archive:
+    """External archive of the non-dominated individuals found
+    When the archive is full, the individuals in the most crowded region
+    of the front are removed first
+    """
+
+    def __init__(self, max_size=0):
+        """Initialize method
+        Args:
+            max_size (int): maximum number of individuals, unbounded if 0
+        """
+        self.max_size = max_size
+        self.individuals = []
+        self.fitnesses = None
+
+    def __len__(self):
+        return len(self.individuals)
+
+    def add(self, individuals, fitnesses):
+        """Add individuals to the archive
+        Args:
+            individuals (list): list of individuals
+            fitnesses (list): fitness of each individual, i.e.,
+                              list of values of the objectives
+        Returns:
+            changed: True if the archived individuals changed, i.e.,
+                     any individual was added or removed
+        """
+        fitnesses = np.asarray(fitnesses, dtype=float)
+        if len(individuals) == 0:
+            return False
+        if self.fitnesses is None:
+            all_fitnesses = fitnesses
+        else:
+            all_fitnesses = np.concatenate([self.fitnesses, fitnesses])
+        all_individuals = self.individuals + list(individuals)
+
+        mask = get_non_dominated(all_fitnesses)
+        selected = np.flatnonzero(mask)
+        nb_current = len(self.individuals)
+        if (len(selected) == nb_current
+                and np.all(selected == np.arange(nb_current))):
+            return False
+
+        if self.max_size > 0:
+            selected = self._prune(all_fitnesses, selected)
+        changed = not np.array_equal(selected, np.arange(nb_current))
+        self.individuals = [all_individuals[i] for i in selected]
+        self.fitnesses = all_fitnesses[selected]
+        return changed
+
+    def _prune(self, fitnesses, selected):
+        """Remove the most crowded individuals while the archive is full
+        Args:
+            fitnesses (numpy.ndarray): fitnesses of the candidates
+            selected (numpy.ndarray): indexes of the non-dominated candidates
+        Returns:
+            selected: indexes of the individuals kept
+        """
+        selected = list(selected)
+        while len(selected) > self.max_size:
+            distances = get_crowding_distances(fitnesses[selected])
+            del selected[int(np.argmin(distances))]
+        return np.array(selected, dtype=int)
+
+    def get_front(self):
+        """Get the fitnesses of the archived individuals
+        Returns:
+            front: (n, m) array of the n individuals and m objectives
+        """
+        if self.fitnesses is None:
+            return np.zeros((0, 0))
+        return self.fitnesses.copy()
+
+    def get_hypervolume(self, reference, nb_samples=MC_SAMPLES, rng=None):
+        """Hypervolume of the archive
+        Args:
+            reference (numpy.ndarray): reference point
+            nb_samples (int): number of samples of the Monte Carlo estimation
+            rng (numpy.random.Generator): random generator of the estimation
+        Returns:
+            hypervolume: volume dominated by the archive
+        """
+        if self.fitnesses is None:
+            return 0.0
+        return hypervolume(self.fitnesses, reference, nb_samples, rng)
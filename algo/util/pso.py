@@ -1,4 +1,6 @@
-import random
+import time
+import multiprocessing as mp
+import numpy as np
 
 # Constants
 X_MIN = -1.0
@@ -6,6 +8,26 @@ X_MAX = 1.0
 INF = float("inf")
 
 
+def _init_pool(pso):
+    """Initialize a sub-procress to calculate a particle cost
+    Args:
+        pso (PSO): a particle swarm optimization object
+    """
+    global _pso
+    _pso = pso
+
+
+def _get_cost(position):
+    """Calculate the cost of a particle position
+    Args:
+        position (list): particle position
+    Returns:
+        cost: cost value
+    """
+    global _pso
+    return _pso._get_cost(position)
+
+
 class PSO_Decoder:
     def __init__(self):
         self.nb_dimensions = 0
@@ -13,6 +35,14 @@ class PSO_Decoder:
     def get_dimensions(self):
         return self.nb_dimensions
 
+    def gen_init_positions(self):
+        """Generate some positions for the initial swarm
+        It is used to add bootstrap particles
+        Returns:
+            positions: list of positions
+        """
+        return []
+
     def stopping_criteria(self,  best_coding, best_cost):
         return False
 
@@ -20,108 +50,176 @@ class PSO_Decoder:
         return 0.0
 
 
-class Particle:
-    def __init__(self,
-                 x0,
-                 decoder,
-                 weight=0.5,
-                 cognative_const=1,
-                 social_const=2,
-                 bounds=None):
-        self.position = []          # particle position
-        self.velocity = []          # particle velocity
-        self.pos_best = []          # best position coding
-        self.cost_best = -1         # best error coding
-        self.cost = -1              # error coding
-        self.w = weight             # constant inertia weight (how much to weigh the previous velocity)
-        self.c1 = cognative_const   # cognative constant
-        self.c2 = social_const      # social constant
-        self.bounds = bounds
-        self.decoder = decoder
-        self.nb_dimensions = len(x0)
-
-        for i in range(self.nb_dimensions):
-            self.velocity.append(random.uniform(-1, 1))
-            self.position.append(x0[i])
-
-    # evaluate current fitness
-    def evaluate(self):
-        self.cost = self.decoder.get_cost(self.position)
-
-        # check to see if the current position is an coding best
-        if self.cost < self.cost_best or self.cost_best < 0:
-            self.pos_best = self.position
-            self.cost_best = self.cost
-
-    # update new particle velocity
-    def update_velocity(self, pos_best_g):
-        for i in range(self.nb_dimensions):
-            r1 = random.random()
-            r2 = random.random()
-
-            vel_cognitive = r1 * self.c1 * (self.pos_best[i] - self.position[i])
-            vel_social = r2 * self.c2 * (pos_best_g[i] - self.position[i])
-            self.velocity[i] = self.w * self.velocity[i] + vel_cognitive + vel_social
-
-    # update the particle position based off new velocity updates
-    def update_position(self):
-        for i in range(self.nb_dimensions):
-            self.position[i] = self.position[i] + self.velocity[i]
-
-            if self.bounds:
-                # adjust maximum position if necessary
-                if self.position[i] > self.bounds[i][1]:
-                    self.position[i] = self.bounds[i][1]
-
-                # adjust minimum position if neseccary
-                if self.position[i] < self.bounds[i][0]:
-                    self.position[i] = self.bounds[i][0]
-
-
 class PSO():
+    """Particle Swarm Optimization
+    The swarm is stored as NumPy matrices (one row per particle) and
+    updated with vectorized operations
+    See also:
+    https://doi.org/10.1109/ICNN.1995.488968
+    """
+
     def __init__(self,
                  decoder,
                  nb_particles,
                  max_iteration,
                  stopping_func=None,
-                 bounds=None):
-
+                 bounds=None,
+                 weight=0.5,
+                 cognative_const=1,
+                 social_const=2,
+                 pool_size=0,
+                 time_limit=0,
+                 seed=None):
+        """Initialize method
+        Args:
+            decoder (PSO_Decoder): decoder of the particle positions
+            nb_particles (int): number of particles
+            max_iteration (int): maximum number of iterations
+            stopping_func (function): optional stopping criteria, it receives
+                                      the best position and cost found
+            bounds (list): (min, max) values of each dimension
+            weight (float): inertia weight (how much to weigh the previous
+                            velocity)
+            cognative_const (float): cognative constant
+            social_const (float): social constant
+            pool_size (int): number of processes for parallelisms
+            time_limit (float): maximum execution time in seconds,
+                                disabled if 0
+            seed (object): seed of the random generator, e.g., an int or a
+                           numpy.random.SeedSequence
+        """
         self.decoder = decoder
         self.nb_dimensions = decoder.get_dimensions()
         self.nb_particles = nb_particles
         self.max_iteration = max_iteration
+        self.stopping_func = stopping_func
         self.bounds = bounds
+        self.w = weight
+        self.c1 = cognative_const
+        self.c2 = social_const
+        self.pool_size = pool_size
+        self.time_limit = time_limit
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._pool = None
+        self._map_func = None
+        self._cost_func = None
 
         if not self.bounds:
             self.bounds = [(X_MIN, X_MAX)] * self.nb_dimensions
 
+    def _init_pool(self):
+        """Initialize the multiprocessing pool
+        """
+        self._clean_pool()
+
+        self._pool = None
+        self._map_func = map
+        self._cost_func = self._get_cost
+        if self.pool_size > 0:
+            try:
+                # Require UNIX fork to work
+                mp_ctx = mp.get_context("fork")
+                self.pool_size = min(self.pool_size, mp_ctx.cpu_count())
+                self._pool = mp_ctx.Pool(processes=self.pool_size,
+                                         initializer=_init_pool,
+                                         initargs=[self])
+                self._map_func = self._pool.map
+                self._cost_func = _get_cost
+            except ValueError:
+                pass
+
+    def _clean_pool(self):
+        """Terminate the multiprocessing pool
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+            self._map_func = None
+            self._cost_func = None
+
+    def _get_cost(self, position):
+        return self.decoder.get_cost(position)
+
+    def _get_costs(self, positions):
+        """Calculate the cost of all particles
+        Args:
+            positions (numpy.ndarray): one position per row
+        Returns:
+            costs: NumPy array of costs
+        """
+        costs = self._map_func(self._cost_func, positions.tolist())
+        return np.array(list(costs), dtype=float)
+
+    def _stopping_criteria(self, pos_best, cost_best):
+        if self.stopping_func is not None and self.stopping_func(pos_best, cost_best):
+            return True
+        return self.decoder.stopping_criteria(pos_best, cost_best)
+
+    def _gen_swarm(self):
+        """Generate the initial positions and velocities
+        """
+        lower, upper = self._lower, self._upper
+        shape = (self.nb_particles, self.nb_dimensions)
+
+        position = self.rng.uniform(lower, upper, size=shape)
+        init_positions = list(self.decoder.gen_init_positions())
+        init_positions = init_positions[:self.nb_particles]
+        if init_positions:
+            init_positions = np.array(init_positions, dtype=float)
+            position[:len(init_positions)] = np.clip(init_positions, lower, upper)
+        velocity = self.rng.uniform(-1, 1, size=shape)
+
+        return position, velocity
+
     def solve(self):
-        cost_best_g = -1                  # best cost for group
-        pos_best_g = []                   # best position for group
-
-        # establish the swarm
-        swarm = []
-        for i in range(self.nb_particles):
-            x0 = [random.uniform(*self.bounds[d]) for d in range(self.nb_dimensions)]
-            swarm.append(Particle(x0, self.decoder, bounds=self.bounds))
-
-        # begin optimization loop
-        # try:
-        for i in range(self.max_iteration):
-            for particle in swarm:
-                particle.evaluate()
-
-                # determine if current particle is the best (globally)
-                if particle.cost < cost_best_g or cost_best_g < 0:
-                    pos_best_g = list(particle.position)
-                    cost_best_g = float(particle.cost)
-
-            # cycle through swarm and update velocities and position
-            for particle in swarm:
-                particle.update_velocity(pos_best_g)
-                particle.update_position()
-
-            if self.decoder.stopping_criteria(pos_best_g, cost_best_g):
-                break
+        """Execute the particle swarm optimization
+        Returns:
+            position: best position found
+            cost: cost of the best position
+        """
+        start_time = time.time()
+        self.rng = np.random.default_rng(self.seed)
+        bounds = np.array(self.bounds, dtype=float)
+        self._lower = bounds[:, 0]
+        self._upper = bounds[:, 1]
+        shape = (self.nb_particles, self.nb_dimensions)
+
+        position, velocity = self._gen_swarm()
+        pos_best = position.copy()              # best position of each particle
+        cost_best = np.full(self.nb_particles, INF)
+        pos_best_g = []                         # best position for group
+        cost_best_g = -1                        # best cost for group
+
+        self._init_pool()
+        try:
+            for i in range(self.max_iteration):
+                cost = self._get_costs(position)
+
+                # check to see if the current positions are a particle best
+                improved = cost < cost_best
+                pos_best[improved] = position[improved]
+                cost_best[improved] = cost[improved]
+
+                # determine if the current best is the best (globally)
+                best = np.argmin(cost_best)
+                if cost_best[best] < cost_best_g or cost_best_g < 0:
+                    pos_best_g = pos_best[best].tolist()
+                    cost_best_g = float(cost_best[best])
+
+                # update velocities and positions
+                r1 = self.rng.random(shape)
+                r2 = self.rng.random(shape)
+                vel_cognitive = self.c1 * r1 * (pos_best - position)
+                vel_social = self.c2 * r2 * (np.array(pos_best_g) - position)
+                velocity = self.w * velocity + vel_cognitive + vel_social
+                position = np.clip(position + velocity, self._lower, self._upper)
+
+                if self._stopping_criteria(pos_best_g, cost_best_g):
+                    break
+                if self.time_limit > 0 and time.time() - start_time >= self.time_limit:
+                    break
+        finally:
+            self._clean_pool()
 
         return pos_best_g, cost_best_g
@@ -1,5 +1,35 @@
+import heapq
+import numpy as np
 from algo.util.metric import Metric
 
+INF = float("inf")
+MAX_REBALANCE_MOVES = 1000
+
+
+def as_arrays(place, load, nb_apps, nb_nodes):
+    """Get a solution as NumPy arrays
+    Args:
+        place (dict): placement indexed by (app, node), or a NumPy array
+        load (dict): load indexed by (app, source node, target node),
+                     or a NumPy array
+        nb_apps (int): number of applications
+        nb_nodes (int): number of nodes
+    Returns:
+        place: (nb_apps, nb_nodes) array
+        load: (nb_apps, nb_nodes, nb_nodes) array
+    """
+    if isinstance(place, dict):
+        array = np.zeros((nb_apps, nb_nodes), dtype=int)
+        for key, value in place.items():
+            array[key] = value
+        place = array
+    if isinstance(load, dict):
+        array = np.zeros((nb_apps, nb_nodes, nb_nodes), dtype=int)
+        for key, value in load.items():
+            array[key] = value
+        load = array
+    return np.asarray(place), np.asarray(load)
+
 
 class SP_Solver():
     def __init__(self, input):
@@ -8,6 +38,9 @@ class SP_Solver():
         self.apps = input.apps
         self.resources = input.resources
         self.metric = Metric(input)
+        self._net_delay_matrices = {}
+        self._net_delay_classes = {}
+        self._net_delay_keys = None
 
     def get_cloud_index(self):
         return self.input.get_cloud_index()
@@ -27,6 +60,80 @@ class SP_Solver():
         node_2 = self.nodes[node_2_index]
         return app.get_net_delay(node_1, node_2)
 
+    def get_net_delay_matrix(self, app_index):
+        """Get the network delays of an application as a NumPy matrix
+        The matrix is built once, and applications with the same delays
+        (i.e., the same network-delay class) share the same matrix object
+        Args:
+            app_index (int): application index
+        Returns:
+            matrix: delays indexed by (node index, node index)
+        """
+        if app_index not in self._net_delay_matrices:
+            matrix = self._create_net_delay_matrix(self.apps[app_index])
+            key = matrix.tobytes()
+            if key not in self._net_delay_classes:
+                self._net_delay_classes[key] = matrix
+            self._net_delay_matrices[app_index] = self._net_delay_classes[key]
+        return self._net_delay_matrices[app_index]
+
+    def _create_net_delay_matrix(self, app):
+        """Convert the network delays of an application into a NumPy matrix
+        Args:
+            app (App): application
+        Returns:
+            matrix: delays indexed by (node index, node index)
+        """
+        ids = [node.id for node in self.nodes]
+        if isinstance(app.net_delay, np.ndarray):
+            return app.net_delay[np.ix_(ids, ids)].astype(float)
+
+        indexes = self._get_net_delay_indexes(app.net_delay)
+        if indexes is None:
+            return np.array([[app.get_net_delay(node_i, node_j)
+                              for node_j in self.nodes]
+                             for node_i in self.nodes], dtype=float)
+        rows, cols, valid = indexes
+        values = np.fromiter(app.net_delay.values(), dtype=float,
+                             count=len(app.net_delay))
+        matrix = np.full((len(self.nodes), len(self.nodes)), INF)
+        matrix[rows, cols] = values[valid]
+        return matrix
+
+    def _get_net_delay_indexes(self, net_delay):
+        """Get the node indexes of the keys of a dictionary of delays
+        The applications of an input usually have the same keys in the same
+        order, so the indexes are calculated once and only the values of
+        each application are read
+        Args:
+            net_delay (dict): delays indexed by (node id, node id)
+        Returns:
+            indexes: (rows, cols, valid) where valid selects the values
+                     of the keys of the nodes, or None if the node ids
+                     are not non-negative integers
+        """
+        keys = list(net_delay.keys())
+        if (self._net_delay_keys is not None
+                and self._net_delay_keys[0] == keys):
+            return self._net_delay_keys[1]
+
+        ids = np.array([node.id for node in self.nodes])
+        flat_keys = np.array([k for key in keys for k in key])
+        if (len(ids) == 0 or len(flat_keys) != 2 * len(keys)
+                or ids.dtype.kind not in "iu"
+                or flat_keys.dtype.kind not in "iu"
+                or ids.min() < 0 or flat_keys.min() < 0):
+            return None
+
+        node_index = np.full(max(ids.max(), flat_keys.max()) + 1, -1)
+        node_index[ids] = np.arange(len(ids))
+        rows = node_index[flat_keys[0::2]]
+        cols = node_index[flat_keys[1::2]]
+        valid = (rows >= 0) & (cols >= 0)
+        indexes = (rows[valid], cols[valid], valid)
+        self._net_delay_keys = (keys, indexes)
+        return indexes
+
     def get_nb_users(self, app_index, node_index):
         return self.apps[app_index].get_nb_users(self.nodes[node_index])
 
@@ -34,47 +141,153 @@ class SP_Solver():
         return self.apps[app_index].get_nb_requests(self.nodes[node_index])
 
     def solve(self):
-        r_nodes = range(len(self.nodes))
-        r_apps = range(len(self.apps))
-
-        place = {(a, h): 0
-                 for a in r_apps
-                 for h in r_nodes}
-        load = {(a, b, h): 0
-                for a in r_apps
-                for b in r_nodes
-                for h in r_nodes}
+        nb_nodes = len(self.nodes)
+        nb_apps = len(self.apps)
+
+        place = np.zeros((nb_apps, nb_nodes), dtype=int)
+        load = np.zeros((nb_apps, nb_nodes, nb_nodes), dtype=int)
         return self.local_search(place, load)
 
-    def local_search(self, place, load):
-        r_apps = range(len(self.apps))
-        nb_nodes = len(self.nodes)
-        r_nodes = range(nb_nodes)
+    def local_search(self, place, load, improve=False):
+        """Fix the number of instances of each application
+        The instances with less load are removed first, through a heap,
+        and their load is moved to the cloud
+        Args:
+            place (numpy.ndarray): placement indexed by (app, node)
+            load (numpy.ndarray): load indexed by (app, source, target)
+            improve (bool): whether the load is rebalanced between
+                            placed instances to reduce the max deadline violation
+        Returns:
+            place: placement array
+            load: load array
+        """
+        place, load = as_arrays(place, load, len(self.apps), len(self.nodes))
         cloud = self.get_cloud_index()
+        app_load = load.sum(axis=1)
 
-        for a in r_apps:
+        nb_instances = (place > 0).sum(axis=1)
+        for a in np.flatnonzero(nb_instances > self._get_max_instances()):
             app = self.apps[a]
-            instances = [h for h in r_nodes if place[a, h] > 0]
-            if len(instances) <= app.max_instances:
-                continue
+            place[a, cloud] = 1
+
+            # smallest load first, ties by the highest node index
+            heap = [(app_load[a, h], -h) for h in np.flatnonzero(place[a] > 0)
+                    if h != cloud]
+            heapq.heapify(heap)
+            count = len(heap) + 1
+            while count > app.max_instances:
+                _, h = heapq.heappop(heap)
+                h = -h
+                place[a, h] = 0
+                load[a, :, cloud] += load[a, :, h]
+                load[a, :, h] = 0
+                app_load[a, cloud] += app_load[a, h]
+                app_load[a, h] = 0
+                count -= 1
+
+        if improve:
+            self._rebalance(place, load, app_load)
+        return place, load
+
+    def _get_max_instances(self):
+        return np.array([app.max_instances for app in self.apps])
+
+    def _rebalance(self, place, load, app_load):
+        """Move the flow with the max deadline violation
+        to another instance of the same application, opening a new one
+        if the application has instances left,
+        while the move does not increase the max deadline violation
+        Args:
+            place (numpy.ndarray): placement indexed by (app, node)
+            load (numpy.ndarray): load indexed by (app, source, target)
+            app_load (numpy.ndarray): load indexed by (app, node)
+        """
+        nb_apps = len(self.apps)
+        nb_nodes = len(self.nodes)
+        if nb_apps == 0:
+            return
+        r_apps = range(nb_apps)
+        resources = list(self.resources)
+
+        work_size = np.array([app.work_size for app in self.apps], dtype=float)
+        cpu_k1 = np.array([app.get_cpu_demand_k1() for app in self.apps], dtype=float)
+        cpu_k2 = np.array([app.get_cpu_demand_k2() for app in self.apps], dtype=float)
+        deadline = np.array([app.deadline for app in self.apps], dtype=float)
+        k1 = np.array([[app.get_demand_k1(r) for r in resources]
+                       for app in self.apps], dtype=float)
+        k2 = np.array([[app.get_demand_k2(r) for r in resources]
+                       for app in self.apps], dtype=float)
+        capacity = np.array([[node.get_capacity(r) for r in resources]
+                             for node in self.nodes], dtype=float)
+        net_delay = [self.get_net_delay_matrix(a) for a in r_apps]
 
-            if not place[a, cloud]:
-                place[a, cloud] = 1
-                instances.append(cloud)
+        used = (place[:, :, np.newaxis]
+                * (app_load[:, :, np.newaxis] * k1[:, np.newaxis, :]
+                   + k2[:, np.newaxis, :])).sum(axis=0)
 
-            def node_load(h):
-                return sum([load[a, b, h] for b in r_nodes])
+        def proc_delay(a, node_load):
+            with np.errstate(divide="ignore"):
+                divisor = node_load * (cpu_k1[a] - work_size[a]) + cpu_k2[a]
+                delay = np.where(divisor > 0.0, work_size[a] / divisor, INF)
+            return np.where(node_load > 0, delay, 0.0)
 
-            instances.sort(key=node_load, reverse=True)
+        def app_violation(a):
+            # violation of each flow (b, h) of the application
+            delay = net_delay[a] + proc_delay(a, app_load[a])[np.newaxis, :]
+            return np.where(load[a] > 0, delay - deadline[a], -INF)
 
-            while len(instances) > app.max_instances:
-                h = instances.pop()
-                if h == cloud:
-                    instances.insert(0, cloud)
-                    continue
+        max_instances = self._get_max_instances()
+        violation = [app_violation(a) for a in r_apps]
+        max_violation = np.array([v.max() for v in violation])
+
+        for _ in range(MAX_REBALANCE_MOVES):
+            a = int(np.argmax(max_violation))
+            current = max_violation[a]
+            if current <= 0.0:
+                break
+            b, h = np.unravel_index(np.argmax(violation[a]), violation[a].shape)
+            amount = load[a, b, h]
+
+            # violation at h after removing the flow (b, h)
+            h_load = load[a, :, h].copy()
+            h_load[b] = 0
+            h_delay = net_delay[a][:, h] + proc_delay(a, app_load[a, h] - amount)
+            h_after = np.where(h_load > 0, h_delay - deadline[a], -INF).max()
+
+            # violation at each candidate node after receiving the flow
+            # a new instance can be opened while the app has instances left
+            placed = place[a] > 0
+            if placed.sum() < max_instances[a]:
+                candidates = np.ones(nb_nodes, dtype=bool)
+            else:
+                candidates = placed.copy()
+            candidates[h] = False
+            demand = (amount * k1[a][np.newaxis, :]
+                      + (~placed)[:, np.newaxis] * k2[a][np.newaxis, :])
+            candidates &= np.all(used + demand <= capacity, axis=1)
+            if not candidates.any():
+                break
+            flows = np.where(load[a] > 0, net_delay[a], -INF).max(axis=0)
+            flows = np.maximum(flows, net_delay[a][b])
+            cand_delay = flows + proc_delay(a, app_load[a] + amount)
+            cand_after = np.where(candidates, cand_delay - deadline[a], INF)
+
+            # the move must not increase the max violation, ties at
+            # the source are accepted since the number of worst flows drops
+            target = int(np.argmin(cand_after))
+            if cand_after[target] >= current or h_after > current:
+                break
+
+            load[a, b, target] += amount
+            load[a, b, h] = 0
+            app_load[a, h] -= amount
+            app_load[a, target] += amount
+            used[h] -= amount * k1[a]
+            used[target] += demand[target]
+            place[a, target] = 1
+            if app_load[a, h] == 0:
                 place[a, h] = 0
-                for b in r_nodes:
-                    load[a, b, cloud] += load[a, b, h]
-                    load[a, b, h] = 0
+                used[h] -= k2[a]
 
-        return place, load
+            violation[a] = app_violation(a)
+            max_violation[a] = violation[a].max()
@@ -0,0 +1,126 @@
+import json
+import time
+
+TIME_DECODE = "decode"
+TIME_METRIC = "metric"
+TIME_FITNESS = "fitness"
+TIME_MAP = "map"
+TIME_IPC = "ipc"
+TIME_CLASSIFY = "classify"
+TIME_CROSSOVER = "crossover"
+TIME_INIT = "init"
+
+
+def get_telemetry(telemetry):
+    """Get a telemetry object
+    Args:
+        telemetry (object): a Telemetry object, the name of a JSON Lines file
+                            or None
+    Returns:
+        telemetry: Telemetry object or None if it is disabled
+    """
+    if telemetry is None or isinstance(telemetry, Telemetry):
+        return telemetry
+    return Telemetry(telemetry)
+
+
+def add_time(timings, name, value):
+    """Accumulate a time in a dictionary of timings
+    Args:
+        timings (dict): elapsed times indexed by name
+        name (str): name of the timing
+        value (float): elapsed time in seconds
+    """
+    timings[name] = timings.get(name, 0.0) + value
+
+
+class Telemetry:
+    """Per-generation trace of a genetic algorithm
+    Times and counters are accumulated during a generation and written as
+    one JSON object per generation (JSON Lines) when the generation is
+    recorded. The records are also kept in memory
+    """
+
+    def __init__(self, filename=None, **fields):
+        """Initialize method
+        Args:
+            filename (str): JSON Lines file where records are appended,
+                            records are only kept in memory if it is None
+            **fields: constant fields added to all records,
+                      e.g., the name of the solver or of the run
+        """
+        self.filename = filename
+        self.fields = fields
+        self.records = []
+        self.timings = {}
+        self.counters = {}
+        self._file = None
+        self._start_time = None
+
+    def start(self, **fields):
+        """Start a new run
+        Args:
+            **fields: constant fields of the run added to all its records
+        """
+        self.close()
+        self.fields.update(fields)
+        self.records = []
+        self.timings = {}
+        self.counters = {}
+        self._start_time = time.perf_counter()
+        if self.filename is not None:
+            self._file = open(self.filename, "a")
+
+    def add_time(self, name, value):
+        """Accumulate an elapsed time of the current generation
+        Args:
+            name (str): name of the timing
+            value (float): elapsed time in seconds
+        """
+        add_time(self.timings, name, value)
+
+    def add_times(self, timings):
+        """Accumulate elapsed times of the current generation
+        Args:
+            timings (dict): elapsed times indexed by name
+        """
+        for name, value in timings.items():
+            add_time(self.timings, name, value)
+
+    def count(self, name, value=1):
+        """Increment a counter of the current generation
+        Args:
+            name (str): name of the counter
+            value (int): increment
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, generation, **values):
+        """Write the record of a generation and reset its times and counters
+        Args:
+            generation (int): generation number
+            **values: values of the generation, e.g., best and mean fitness
+        Returns:
+            record: the dictionary written
+        """
+        record = dict(self.fields)
+        record["generation"] = generation
+        record["elapsed"] = time.perf_counter() - self._start_time
+        record.update(values)
+        record["times"] = self.timings
+        record.update(self.counters)
+        self.records.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+        self.timings = {}
+        self.counters = {}
+        return record
+
+    def close(self):
+        """Close the trace file
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
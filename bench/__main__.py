@@ -0,0 +1,51 @@
+import argparse
+import sys
+from bench import instances as bi
+from bench import runner
+
+OUTPUT_FILENAME = "bench/output/results.json"
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Measure the time of each stage of the solvers "
+                    "on canonical instances")
+    parser.add_argument("--sizes", default=",".join(bi.DEFAULT_SIZES),
+                        help="comma-separated sizes of the instances, "
+                             "among " + ", ".join(bi.SIZES))
+    parser.add_argument("--config", nargs="+", default=bi.CONFIG_FILES,
+                        help="input configuration files")
+    parser.add_argument("--stages", default=None,
+                        help="comma-separated stages, all stages by default")
+    parser.add_argument("--repeat", type=int, default=runner.REPEAT,
+                        help="number of executions of each stage")
+    parser.add_argument("--output", default=OUTPUT_FILENAME,
+                        help="JSON file of the results")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON file of previous results to compare with")
+    parser.add_argument("--tolerance", type=float, default=runner.TOLERANCE,
+                        help="relative change of time considered as noise")
+    return parser.parse_args(args)
+
+
+def main(args=[]):
+    args = parse_args(args)
+    stages = args.stages.split(",") if args.stages else None
+    instances = bi.get_instances(args.sizes.split(","), args.config)
+
+    results = runner.run_benchmark(instances, stages, args.repeat)
+    runner.save_results(results, args.output)
+    print("results saved in {}".format(args.output))
+
+    if args.baseline:
+        baseline = runner.load_results(args.baseline)
+        rows = runner.compare_results(results, baseline, args.tolerance)
+        runner.print_comparison(rows)
+        if any(row[-1] == "regression" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
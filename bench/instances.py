@@ -0,0 +1,74 @@
+import glob
+import os
+import numpy as np
+from util import generator
+
+SEED = 0
+CONFIG_FILES = ["input.json"] + sorted(glob.glob("exp/input/*.json"))
+
+# (nodes, apps, users) of the canonical instances of each size
+SIZES = {
+    "small": [(6, 10, 1000), (11, 20, 1000)],
+    "medium": [(27, 50, 10000)],
+    "large": [(50, 100, 50000), (100, 200, 100000)],
+}
+DEFAULT_SIZES = ["small", "medium"]
+
+
+class Instance():
+    """Canonical benchmark instance
+    The input is generated from a configuration file with a seed derived
+    from the size, so every execution of the benchmark uses the same inputs
+    """
+
+    def __init__(self, config_file, nb_nodes, nb_apps, nb_users):
+        """Initialize method
+        Args:
+            config_file (str): JSON file of the input parameters
+            nb_nodes (int): number of nodes
+            nb_apps (int): number of applications
+            nb_users (int): number of users
+        """
+        self.config_file = config_file
+        self.nb_nodes = nb_nodes
+        self.nb_apps = nb_apps
+        self.nb_users = nb_users
+        self.generator = None
+        self.input = None
+
+    def get_name(self):
+        config = os.path.splitext(os.path.basename(self.config_file))[0]
+        return "{}-n{}-a{}-u{}".format(config, self.nb_nodes, self.nb_apps,
+                                       self.nb_users)
+
+    def get_seed(self):
+        return np.random.SeedSequence([SEED, self.nb_nodes, self.nb_apps,
+                                       self.nb_users])
+
+    def generate(self):
+        """Generate the input of the instance
+        Returns:
+            input: generated Input
+        """
+        self.generator = generator.InputGenerator(self.get_seed())
+        self.input = self.generator.gen_from_file(
+            self.config_file, self.nb_nodes, self.nb_apps, self.nb_users
+        )
+        return self.input
+
+
+def get_instances(sizes=DEFAULT_SIZES, config_files=CONFIG_FILES):
+    """Get the canonical instances
+    Args:
+        sizes (list): names of the sizes in SIZES
+        config_files (list): JSON files of the input parameters
+    Returns:
+        instances: list of Instance objects
+    """
+    instances = []
+    for config_file in config_files:
+        for size in sizes:
+            for nb_nodes, nb_apps, nb_users in SIZES[size]:
+                instances.append(Instance(config_file, nb_nodes, nb_apps,
+                                          nb_users))
+    return instances
@@ -0,0 +1,133 @@
+import json
+import os
+import platform
+import time
+import numpy as np
+from bench.stages import STAGES
+
+REPEAT = 5
+# relative change of the median time reported as a regression or improvement
+TOLERANCE = 0.1
+FORMAT_VERSION = 1
+
+
+def time_func(func, repeat=REPEAT):
+    """Measure the execution time of a function
+    Args:
+        func (function): function without arguments
+        repeat (int): number of executions
+    Returns:
+        stats: dictionary with the minimum, median and mean time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return {"min": min(times),
+            "median": float(np.median(times)),
+            "mean": float(np.mean(times)),
+            "repeat": repeat}
+
+
+def get_environment():
+    return {"python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()}
+
+
+def run_benchmark(instances, stages=None, repeat=REPEAT, verbose=True):
+    """Measure the time of the stages of the solvers on the instances
+    Args:
+        instances (list): list of bench.instances.Instance
+        stages (list): names of the stages in STAGES, all stages if None
+        repeat (int): number of executions of each stage
+        verbose (bool): whether to print the times
+    Returns:
+        results: dictionary with the time of each stage of each instance
+    """
+    results = {"version": FORMAT_VERSION,
+               "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "environment": get_environment(),
+               "repeat": repeat,
+               "instances": {}}
+
+    for instance in instances:
+        name = instance.get_name()
+        rng = np.random.default_rng(instance.get_seed())
+        instance.generate()
+        instance_results = {"config_file": instance.config_file,
+                            "nodes": instance.nb_nodes,
+                            "apps": instance.nb_apps,
+                            "users": instance.nb_users,
+                            "stages": {}}
+        results["instances"][name] = instance_results
+        if verbose:
+            print(name)
+
+        for stage_name, setup in STAGES:
+            if stages is not None and stage_name not in stages:
+                continue
+            for func_name, func in setup(instance, rng):
+                stats = time_func(func, repeat)
+                instance_results["stages"][func_name] = stats
+                if verbose:
+                    print("\t {:40} : {:.6f} s".format(func_name,
+                                                       stats["median"]))
+
+        instance.input = None
+        instance.generator = None
+
+    return results
+
+
+def save_results(results, filename):
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, "w") as json_file:
+        json.dump(results, json_file, indent=1, sort_keys=True)
+
+
+def load_results(filename):
+    with open(filename) as json_file:
+        return json.load(json_file)
+
+
+def compare_results(results, baseline, tolerance=TOLERANCE):
+    """Compare the median times of a benchmark with a baseline
+    Args:
+        results (dict): results of run_benchmark
+        baseline (dict): results of a previous benchmark
+        tolerance (float): relative change of the median time
+                           considered as noise
+    Returns:
+        rows: list of (instance, stage, baseline time, time, ratio, status)
+              of the stages in both benchmarks, the status is
+              "regression", "improvement" or "same"
+    """
+    rows = []
+    for name, instance_results in results["instances"].items():
+        baseline_stages = baseline["instances"].get(name, {}).get("stages", {})
+        for stage, stats in instance_results["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            baseline_time = baseline_stages[stage]["median"]
+            current_time = stats["median"]
+            ratio = current_time / baseline_time if baseline_time > 0 else 1.0
+            status = "same"
+            if ratio > 1.0 + tolerance:
+                status = "regression"
+            elif ratio < 1.0 - tolerance:
+                status = "improvement"
+            rows.append((name, stage, baseline_time, current_time, ratio,
+                         status))
+    return rows
+
+
+def print_comparison(rows):
+    for name, stage, baseline_time, current_time, ratio, status in rows:
+        print("{:30} {:40} {:12.6f} {:12.6f} {:8.3f}x {}".format(
+              name, stage, baseline_time, current_time, ratio, status))
@@ -0,0 +1,129 @@
+import importlib.util
+import inspect
+import numpy as np
+from util import path
+from algo.util.metric import Metric
+from algo.util.nsgaii import NSGAII, NSGAII_Chromosome
+from algo.util import ga_heuristic
+from algo.genetic import SP_Chromosome
+
+# population size and number of objectives of the NSGA-II sorting
+POPULATION_SIZE = 100
+NB_OBJECTIVES = 3
+
+
+def stage_input_generation(instance, rng):
+    """Generate the input of the instance, including the network delays
+    """
+    return [("input_generation", instance.generate)]
+
+
+def stage_floyd_warshall(instance, rng):
+    """Calculate the shortest network delays of all applications
+    """
+    graphs = [instance.generator.gen_network_graph(app)
+              for app in instance.input.apps]
+
+    def func():
+        for graph in graphs:
+            path.calc_net_delay(graph)
+
+    return [("floyd_warshall", func)]
+
+
+def stage_dijkstra(instance, rng):
+    """Calculate the shortest network delays of all applications
+    by Dijkstra on the sparse graph, as done by the input generator
+    """
+    links = [instance.generator.gen_network_links(app)
+             for app in instance.input.apps]
+    nb_nodes = len(instance.input.nodes)
+
+    def func():
+        for app_links in links:
+            path.calc_net_delay_sparse(nb_nodes, app_links)
+
+    return [("dijkstra", func)]
+
+
+def stage_heuristic_seeding(instance, rng):
+    """Create the initial population of the genetic algorithm
+    by the heuristics, without the cache of individuals
+    """
+    chromosome = SP_Chromosome(instance.input, use_heuristic=True,
+                               pool_size=0)
+
+    def func():
+        ga_heuristic.clear_cache()
+        chromosome.gen_init_population()
+
+    return [("heuristic_seeding", func)]
+
+
+def stage_decode(instance, rng):
+    """Decode a random individual into a solution
+    """
+    chromosome = SP_Chromosome(instance.input, use_heuristic=False)
+    individual = rng.random(chromosome.nb_genes).tolist()
+    return [("decode", lambda: chromosome.decode(individual))]
+
+
+def stage_metric(instance, rng):
+    """Calculate each metric of the solution of a random individual
+    """
+    chromosome = SP_Chromosome(instance.input, use_heuristic=False)
+    individual = rng.random(chromosome.nb_genes).tolist()
+    place, load = chromosome.decode(individual)
+    metric = Metric(instance.input)
+
+    funcs = []
+    for name, method in inspect.getmembers(metric, inspect.ismethod):
+        if name.startswith("get_"):
+            funcs.append(("metric." + name,
+                          lambda method=method: method(place, load)))
+    return funcs
+
+
+def stage_nsgaii_sort(instance, rng):
+    """Sort a random population of NSGA-II by fronts and crowding distance
+    """
+    genetic = NSGAII(NSGAII_Chromosome(), POPULATION_SIZE, 1,
+                     0.1, 0.1, 0.6)
+    fitnesses = rng.random((POPULATION_SIZE, NB_OBJECTIVES)).tolist()
+
+    def func():
+        fronts, rank = genetic._fast_non_dominated_sort(fitnesses)
+        genetic._crowding_distance(fitnesses, fronts)
+
+    return [("nsgaii_sort", func)]
+
+
+def stage_milp_build(instance, rng):
+    """Create the model of the MILP solver, without solving it
+    The stage is skipped if docplex is not installed
+    """
+    if importlib.util.find_spec("docplex") is None:
+        return []
+    from algo.milp import MILP
+
+    def func():
+        milp = MILP(instance.input)
+        mdl = milp._create_model()
+        milp._set_objective(mdl)
+        mdl.end()
+
+    return [("milp_build", func)]
+
+
+# stages in the order they are executed,
+# the input generation is the first as the others use the input
+STAGES = [
+    ("input_generation", stage_input_generation),
+    ("floyd_warshall", stage_floyd_warshall),
+    ("dijkstra", stage_dijkstra),
+    ("heuristic_seeding", stage_heuristic_seeding),
+    ("decode", stage_decode),
+    ("metric", stage_metric),
+    ("nsgaii_sort", stage_nsgaii_sort),
+    ("milp_build", stage_milp_build),
+]
@@ -254,7 +254,7 @@ def main(args=[]):
         nb_nodes, nb_users, nb_clusters = map(lambda i: int(i), args)
 
     input_filename = "input.json"
-    input = generator.InputGenerator().gen_from_file(
+    input = generator.InputGenerator(seed).gen_from_file(
         input_filename, nb_nodes, nb_apps, nb_users
     )
 
@@ -1,8 +1,6 @@
-import csv
 import numpy as np
-import scipy.stats as st
-import matplotlib
-import matplotlib.pyplot as plt
+from exp.results import load_results
+from exp.figures import Figure_Task, new_figure, save_figure, render_figures
 
 
 DPI = 100
@@ -91,39 +89,8 @@ SOL_LABEL = {
 }
 
 
-def get_data_from_file(filename):
-    results = []
-    with open(filename) as csv_file:
-        csv_reader = csv.DictReader(csv_file, delimiter=',')
-        line_count = 0
-        for row in csv_reader:
-            if line_count > 0:
-                results.append(row)
-            line_count += 1
-    return results
-
-
-def filter_data(data, **kwargs):
-    def to_string_values(values):
-        str_values = []
-        if not isinstance(values, list):
-            values = [values]
-        for value in values:
-            str_values.append(str(value))
-        return str_values
-
-    def in_filter(row):
-        for key, value in row.items():
-            if key in f_values and value not in f_values[key]:
-                return False
-        return True
-
-    f_values = {k: to_string_values(v) for k, v in kwargs.items()}
-    return list(filter(lambda row: in_filter(row), data))
-
-
 def format_metric(value, metric):
-    value = float(value)
+    value = np.asarray(value, dtype=float)
     if metric == 'max_unavail':
         value = 100.0 * (1.0 - value)
     elif metric == 'avg_unavail':
@@ -136,71 +103,57 @@ def format_metric(value, metric):
     return value
 
 
-def calc_stats(values):
-    nb_runs = len(values)
-    mean = np.mean(values)
-    sem = st.sem(values)
-    if sem > 0.0:
-        # Calc confidence interval, return [mean - e, mean + e]
-        error = st.t.interval(0.95, nb_runs - 1, loc=mean, scale=sem)
-        error = error[1] - mean
-    else:
-        error = 0.0
-    return mean, error
-
-
 def gen_figure(data, solutions, metric, x, x_field, data_filter, filename=None):
-    plt.clf()
-    matplotlib.rcParams.update({'font.size': 20})
-    filtered = filter_data(data, **data_filter)
-    formats = LINE_FORMATS
-    formats_len = len(formats)
-    line = 0
-    for solution, version in solutions:
-        sol_data = filter_data(filtered, solution=solution, version=version)
-        y = []
-        y_errors = []
-        for i in x:
-            x_filter = {x_field: i}
-            x_data = filter_data(sol_data, **x_filter)
-            values = list(map(lambda r: format_metric(r[metric], metric), x_data))
-            mean, error = calc_stats(values)
-            y.append(mean)
-            y_errors.append(error)
-
-        line_format = formats[line % formats_len]
-        label = SOL_LABEL[solution, version]
-        plt.errorbar(x, y, yerr=y_errors, label=label,
-                     markersize=10, **line_format)
-        line += 1
-
-    # ncol = 4 if len(solutions) > 4 else 3
-    ncol = 2
-    # plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.17),
-    #            numpoints=1, ncol=ncol, columnspacing=0.5, fontsize=20)
-    # plt.subplots_adjust(bottom=0.2, top=0.97, left=0.12, right=0.96)
-
-    x_param = X_PARAM[x_field]
-    y_param = Y_PARAM[metric]
-
-    plt.xlabel(x_param['label'])
-    plt.ylabel(y_param['label'])
-    plt.ylim(*y_param['limit'])
-    plt.xlim(x[0] + x_param['limit'][0], x[-1] + x_param['limit'][1])
-    if 'xticks' in x_param:
-        plt.xticks(x, x_param['xticks'])
-    else:
-        plt.xticks(x)
-    plt.grid(True)
-
-    if not filename:
-        plt.show()
-    else:
-        plt.savefig(filename, dpi=DPI, bbox_inches='tight', pad_inches=0.05)
+    import matplotlib
+    with matplotlib.rc_context({'font.size': 20}):
+        fig = new_figure(filename)
+        ax = fig.add_subplot()
+        filtered = data.filter(**data_filter)
+        values = format_metric(filtered[metric], metric)
+        stats = filtered.group_stats(['solution', 'version', x_field], values)
+        formats = LINE_FORMATS
+        formats_len = len(formats)
+        line = 0
+        for solution, version in solutions:
+            y = []
+            y_errors = []
+            for i in x:
+                mean, error = stats.get(solution, version, i)
+                y.append(mean)
+                y_errors.append(error)
+
+            line_format = formats[line % formats_len]
+            label = SOL_LABEL[solution, version]
+            ax.errorbar(x, y, yerr=y_errors, label=label,
+                        markersize=10, **line_format)
+            line += 1
+
+        # ncol = 4 if len(solutions) > 4 else 3
+        ncol = 2
+        # ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.17),
+        #           numpoints=1, ncol=ncol, columnspacing=0.5, fontsize=20)
+        # fig.subplots_adjust(bottom=0.2, top=0.97, left=0.12, right=0.96)
+
+        x_param = X_PARAM[x_field]
+        y_param = Y_PARAM[metric]
+
+        ax.set_xlabel(x_param['label'])
+        ax.set_ylabel(y_param['label'])
+        ax.set_ylim(*y_param['limit'])
+        ax.set_xlim(x[0] + x_param['limit'][0], x[-1] + x_param['limit'][1])
+        if 'xticks' in x_param:
+            ax.set_xticks(x)
+            ax.set_xticklabels(x_param['xticks'])
+        else:
+            ax.set_xticks(x)
+        ax.grid(True)
+
+        save_figure(fig, filename, dpi=DPI, bbox_inches='tight',
+                    pad_inches=0.05)
 
 
 def run():
-    data = get_data_from_file('exp/output/exp_2.csv')
+    data = load_results('exp/output/exp_2.csv')
 
     all_solutions = [
         ('milp', ''),
@@ -299,6 +252,7 @@ def run():
         }
     ]
 
+    tasks = []
     for param in params:
         for metric, solutions in metric_solutions.items():
             fig_title = param['title']
@@ -306,7 +260,10 @@ def run():
             x = param['x_values']
             x_field = param['x_field']
             filename = "exp/figs/exp_2/fig_{}_{}.png".format(metric, fig_title)
-            gen_figure(data, solutions, metric, x, x_field, filter, filename)
+            tasks.append(Figure_Task(filename, gen_figure,
+                                     data.filter(**filter), solutions,
+                                     metric, x, x_field, filter))
+    render_figures(tasks)
 
 
 if __name__ == '__main__':
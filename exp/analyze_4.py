@@ -1,8 +1,6 @@
-import csv
 import numpy as np
-import scipy.stats as st
-import matplotlib
-import matplotlib.pyplot as plt
+from exp.results import load_results
+from exp.figures import Figure_Task, new_figure, save_figure, render_figures
 
 
 DPI = 100
@@ -46,39 +44,8 @@ X_PARAM = {
 }
 
 
-def get_data_from_file(filename):
-    results = []
-    with open(filename) as csv_file:
-        csv_reader = csv.DictReader(csv_file)
-        line_count = 0
-        for row in csv_reader:
-            if line_count > 0:
-                results.append(row)
-            line_count += 1
-    return results
-
-
-def filter_data(data, **kwargs):
-    def to_string_values(values):
-        str_values = []
-        if not isinstance(values, list):
-            values = [values]
-        for value in values:
-            str_values.append(str(value))
-        return str_values
-
-    def in_filter(row):
-        for key, value in row.items():
-            if key in f_values and value not in f_values[key]:
-                return False
-        return True
-
-    f_values = {k: to_string_values(v) for k, v in kwargs.items()}
-    return list(filter(lambda row: in_filter(row), data))
-
-
 def format_metric(value, metric):
-    value = float(value)
+    value = np.asarray(value, dtype=float)
     if metric == 'max_unavail':
         value = 100.0 * (1.0 - value)
     elif metric == 'avg_unavail':
@@ -99,56 +66,42 @@ def format_field(value, field):
     return value
 
 
-def calc_stats(values):
-    nb_runs = len(values)
-    mean = np.mean(values)
-    sem = st.sem(values)
-    if sem > 0.0:
-        # Calc confidence interval, return [mean - e, mean + e]
-        error = st.t.interval(0.95, nb_runs - 1, loc=mean, scale=sem)
-        error = error[1] - mean
-    else:
-        error = 0.0
-    return mean, error
-
-
 def gen_figure(data, metric, x, x_field, data_filter, filename=None):
-    plt.clf()
-    matplotlib.rcParams.update({'font.size': 20})
-    filtered = filter_data(data, **data_filter)
-
-    y = []
-    y_errors = []
-    for x_value in x:
-        x_filter = {x_field: x_value}
-        x_data = filter_data(filtered, **x_filter)
-        values = list(map(lambda r: format_metric(r[metric], metric), x_data))
-        mean, error = calc_stats(values)
-        y.append(mean)
-        y_errors.append(error)
-        print("{} x={:.1f}, y={:.1f}".format(metric, x_value, mean))
-
-    x = [format_field(i, x_field) for i in x]
-    plt.errorbar(x, y, yerr=y_errors, markersize=10, fmt='-o')
-    plt.subplots_adjust(bottom=0.2, top=0.97, left=0.12, right=0.96)
-
-    x_param = X_PARAM[x_field]
-    y_param = Y_PARAM[metric]
-
-    plt.xlabel(x_param['label'])
-    plt.ylabel(y_param['label'])
-    plt.ylim(*y_param['limit'])
-    # plt.xlim(*x_param['limit'])
-    plt.xticks(x)
-    plt.grid(True)
-    if not filename:
-        plt.show()
-    else:
-        plt.savefig(filename, dpi=DPI, bbox_inches='tight', pad_inches=0.05)
+    import matplotlib
+    with matplotlib.rc_context({'font.size': 20}):
+        fig = new_figure(filename)
+        ax = fig.add_subplot()
+        filtered = data.filter(**data_filter)
+        values = format_metric(filtered[metric], metric)
+        stats = filtered.group_stats([x_field], values)
+
+        y = []
+        y_errors = []
+        for x_value in x:
+            mean, error = stats.get(x_value)
+            y.append(mean)
+            y_errors.append(error)
+            print("{} x={:.1f}, y={:.1f}".format(metric, x_value, mean))
+
+        x = [format_field(i, x_field) for i in x]
+        ax.errorbar(x, y, yerr=y_errors, markersize=10, fmt='-o')
+        fig.subplots_adjust(bottom=0.2, top=0.97, left=0.12, right=0.96)
+
+        x_param = X_PARAM[x_field]
+        y_param = Y_PARAM[metric]
+
+        ax.set_xlabel(x_param['label'])
+        ax.set_ylabel(y_param['label'])
+        ax.set_ylim(*y_param['limit'])
+        # ax.set_xlim(*x_param['limit'])
+        ax.set_xticks(x)
+        ax.grid(True)
+        save_figure(fig, filename, dpi=DPI, bbox_inches='tight',
+                    pad_inches=0.05)
 
 
 def run():
-    data = get_data_from_file('exp/output/exp_4.csv')
+    data = load_results('exp/output/exp_4.csv')
 
     all_solutions = [
         ('moga', 'preferred'),
@@ -171,11 +124,12 @@ def run():
         },
     ]
 
+    tasks = []
     for param in params:
         for metric, solutions in metric_solutions.items():
             for solution, sol_version in solutions:
                 fig_title = param['title']
-                filter = param['filter']
+                filter = dict(param['filter'])
                 filter['solution'] = solution
                 filter['version'] = sol_version
                 x = param['x_values']
@@ -183,7 +137,10 @@ def run():
                 filename = "exp/figs/exp_4/fig_{}_{}_{}_{}.png".format(
                     fig_title, metric, solution, sol_version
                 )
-                gen_figure(data, metric, x, x_field, filter, filename)
+                tasks.append(Figure_Task(filename, gen_figure,
+                                         data.filter(**filter), metric,
+                                         x, x_field, filter))
+    render_figures(tasks)
 
 
 if __name__ == '__main__':
@@ -1,45 +1,25 @@
-import csv
-import random
-import numpy as np
-import time
-from pathos.multiprocessing import ProcessPool
+from exp.runner import Runner, Solver_Data
 from util import generator
-from algo.util.metric import Metric
+from algo.util import pareto
 import algo
 
-EXP_POOL_SIZE = 5
+NB_CORES = 0  # all the available cores
+SEED = None  # a new seed is saved with the output
+# stop the runs of a group when the confidence interval of CI_FIELD is
+# below this proportion of its mean, all the runs are executed if 0
+CI_THRESHOLD = 0.0
+CI_FIELD = "max_dv"
 GA_POOL_SIZE = 3
 
 
-def exec_solver(solver_data):
-    solver = solver_data.solver
-    params = solver_data.params
-
-    start_time = time.time()
-    solution = solver.solve(**params)
-    elapsed_time = time.time() - start_time
-
-    solver_data.time = elapsed_time
-    solver_data.solution = solution
-
-    return solver_data
-
-
-class Solver_Data():
-    def __init__(self):
-        pass
-
-
-class Exp_2():
+class Exp_2(Runner):
     def __init__(self):
-        random.seed()
-        np.random.seed()
-
-        self.pool = ProcessPool(EXP_POOL_SIZE)
         self.nb_runs = 30
 
         self.input_filename = "exp/input/exp_2.json"
         self.output_filename = "exp/output/exp_2.csv"
+        Runner.__init__(self, self.output_filename, NB_CORES, seed=SEED,
+                        ci_threshold=CI_THRESHOLD, ci_field=CI_FIELD)
 
         self.scenarios = [
             {"nodes": [27], "apps": [10, 20, 30, 40], "users": [10000]},
@@ -67,59 +47,49 @@ class Exp_2():
 
         self.app_types = ["eMBB", "URLLC", "mMTC"]
 
-    def run(self):
-        with open(self.output_filename, "w") as csv_file:
-            field_names = [
-                "nodes", "apps", "users", "run", "solution", "version",
-                "time", "objective"
-            ]
+    def get_field_names(self):
+        field_names = [
+            "nodes", "apps", "users", "run", "solution", "version",
+            "time", "objective"
+        ]
+        for m_title, m_func_name in self.metrics:
+            field_names.append(m_title)
+        for type in self.app_types:
             for m_title, m_func_name in self.metrics:
+                m_title = type + "_" + m_title
                 field_names.append(m_title)
-            for type in self.app_types:
-                for m_title, m_func_name in self.metrics:
-                    m_title = type + "_" + m_title
-                    field_names.append(m_title)
-
-            self.writer = csv.DictWriter(csv_file, fieldnames=field_names)
-            self.writer.writeheader()
-
-            for scenario in self.scenarios:
-                self._run_scenario(scenario)
-
-    def _run_scenario(self, scenario):
-        r_runs = range(self.nb_runs)
-        r_nodes = scenario["nodes"]
-        r_apps = scenario["apps"]
-        r_users = scenario["users"]
-
-        for nb_nodes in r_nodes:
-            for nb_apps in r_apps:
-                for nb_users in r_users:
-                    solvers = []
-                    for run in r_runs:
-                        solvers += self._get_solvers(nb_nodes, nb_apps,
-                                                     nb_users, run)
-
-                    solutions = self.pool.uimap(exec_solver, solvers)
-                    for data in solutions:
-                        output = self._get_output(data)
-                        self._write_output(output)
+        field_names += ["front_size", "hv"]
+        return field_names
+
+    def get_key_fields(self):
+        return ["nodes", "apps", "users", "run", "solution", "version", "objective"]
+
+    def gen_batches(self):
+        for scenario in self.scenarios:
+            for nb_nodes in scenario["nodes"]:
+                for nb_apps in scenario["apps"]:
+                    for nb_users in scenario["users"]:
+                        solvers = []
+                        for run in range(self.nb_runs):
+                            solvers += self._get_solvers(nb_nodes, nb_apps,
+                                                         nb_users, run)
+                        yield solvers
 
     def _get_solvers(self, nb_nodes, nb_apps, nb_users, run):
-        input = generator.InputGenerator().gen_from_file(
-            self.input_filename, nb_nodes, nb_apps, nb_users
+        input_id = self.get_input(
+            (nb_nodes, nb_apps, nb_users, run),
+            lambda seed: generator.InputGenerator(seed).gen_from_file(
+                self.input_filename, nb_nodes, nb_apps, nb_users
+            )
         )
-        metric = Metric(input)
         solvers = []
 
         for obj_title, obj_func_name in self.objectives:
-            obj_func = getattr(metric, obj_func_name)
             for use_heuristic in [True, False]:
                 data = Solver_Data()
                 data.solver = algo.genetic_mo
                 data.params = {
-                    "input": input,
-                    "objective": [obj_func],
+                    "objective": [obj_func_name],
                     "use_heuristic": use_heuristic,
                     "pool_size": GA_POOL_SIZE
                 }
@@ -130,9 +100,10 @@ class Exp_2():
                 data.nb_apps = nb_apps
                 data.nb_users = nb_users
                 data.run = run
+                data.input_id = input_id
                 solvers.append(data)
 
-        obj_func = [getattr(metric, obj[1]) for obj in self.objectives]
+        obj_func_name = [obj[1] for obj in self.objectives]
         obj_title = [obj[0] for obj in self.objectives]
         mo_versions = [("preferred", algo.genetic_mo),
                        ("pareto", algo.genetic_mo_pareto)]
@@ -141,8 +112,7 @@ class Exp_2():
                 data = Solver_Data()
                 data.solver = solver
                 data.params = {
-                    "input": input,
-                    "objective": obj_func,
+                    "objective": obj_func_name,
                     "use_heuristic": use_heuristic,
                     "pool_size": GA_POOL_SIZE
                 }
@@ -153,22 +123,26 @@ class Exp_2():
                 data.nb_apps = nb_apps
                 data.nb_users = nb_users
                 data.run = run
+                data.input_id = input_id
                 solvers.append(data)
 
         return solvers
 
-    def _get_output(self, data):
-        output = {
+    def get_job_fields(self, data):
+        return {
             "nodes": data.nb_nodes,
             "apps": data.nb_apps,
             "users": data.nb_users,
             "run": data.run,
             "solution": data.title,
             "version": data.version,
-            "time": data.time,
             "objective": data.objective,
         }
 
+    def get_output(self, data):
+        output = self.get_job_fields(data)
+        output["time"] = data.time
+
         for m_title, m_func_name in self.metrics:
             solution = data.solution
             m_func = getattr(solution.metric, m_func_name)
@@ -184,22 +158,42 @@ class Exp_2():
                 value = m_func(*solution.get_vars())
                 output[m_title] = value
 
+        front = solution.pareto_front
+        output["front_size"] = len(front) if front is not None else ""
+        output["hv"] = self._get_hypervolume(data)
         return output
 
-    def _write_output(self, output):
+    def _get_hypervolume(self, data):
+        """Get the hypervolume of the Pareto front of a solution
+        between the ideal point 0 and the upper bounds of the objectives
+        in the instance, so it is comparable among runs and solvers
+        """
+        solution = data.solution
+        front = solution.pareto_front
+        if front is None or len(front) == 0:
+            return ""
+        metric = solution.metric
+        metric.filter.clean()
+        reference = [metric.get_upper_bound(name)
+                     for name in data.params["objective"]]
+        if any(bound is None for bound in reference):
+            return ""
+        return pareto.normalized_hypervolume(front, [0.0] * len(reference),
+                                             reference)
+
+    def write_output(self, output):
         print("{} {} | nodes: {} | apps: {} | users: {} | run: {}".format(
                output["solution"], output["version"], output["nodes"],
                output["apps"], output["users"], output["run"]
         ))
         print("\t {:15} : {} s".format("time", output["time"]))
         print("\t {:15} : {}".format("objective", output["objective"]))
+        print("\t {:15} : {}".format("hv", output["hv"]))
 
         for m_title, m_name in self.metrics:
             print("\t {:15} : {}".format(m_title, output[m_title]))
         print(" ")
 
-        self.writer.writerow(output)
-
 
 def run():
     exp = Exp_2()
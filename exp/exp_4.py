@@ -1,41 +1,19 @@
-import csv
-import random
 import numpy as np
-import time
-from pathos.multiprocessing import ProcessPool
+from exp.runner import Runner, Solver_Data
 from util import generator
-from algo.util.metric import Metric
 import algo
 
-EXP_POOL_SIZE = 3
+NB_CORES = 0  # all the available cores
+SEED = None  # a new seed is saved with the output
+# stop the runs of a group when the confidence interval of CI_FIELD is
+# below this proportion of its mean, all the runs are executed if 0
+CI_THRESHOLD = 0.0
+CI_FIELD = "max_dv"
 GA_POOL_SIZE = 4
 
 
-def exec_solver(solver_data):
-    solver = solver_data.solver
-    params = solver_data.params
-
-    start_time = time.time()
-    solution = solver.solve(**params)
-    elapsed_time = time.time() - start_time
-
-    solver_data.time = elapsed_time
-    solver_data.solution = solution
-
-    return solver_data
-
-
-class Solver_Data():
+class Exp_4(Runner):
     def __init__(self):
-        pass
-
-
-class Exp_4():
-    def __init__(self):
-        random.seed()
-        np.random.seed()
-
-        self.pool = ProcessPool(EXP_POOL_SIZE)
         self.nb_runs = 30
         self.nb_nodes = 27
         self.nb_apps = 50
@@ -43,6 +21,8 @@ class Exp_4():
 
         self.input_filename = "exp/input/exp_4.json"
         self.output_filename = "exp/output/exp_4.csv"
+        Runner.__init__(self, self.output_filename, NB_CORES, seed=SEED,
+                        ci_threshold=CI_THRESHOLD, ci_field=CI_FIELD)
 
         self.scenarios = []
         for p in np.arange(0.1, 1.0, 0.1):
@@ -69,44 +49,40 @@ class Exp_4():
 
         self.app_types = ["eMBB", "URLLC", "mMTC"]
 
-    def run(self):
-        with open(self.output_filename, "w") as csv_file:
-            field_names = [
-                "probability", "run", "solution", "version",
-                "time", "objective"
-            ]
+    def get_field_names(self):
+        field_names = [
+            "probability", "run", "solution", "version",
+            "time", "objective"
+        ]
+        for m_title, m_func_name in self.metrics:
+            field_names.append(m_title)
+        for type in self.app_types:
             for m_title, m_func_name in self.metrics:
+                m_title = type + "_" + m_title
                 field_names.append(m_title)
-            for type in self.app_types:
-                for m_title, m_func_name in self.metrics:
-                    m_title = type + "_" + m_title
-                    field_names.append(m_title)
+        return field_names
 
-            self.writer = csv.DictWriter(csv_file, fieldnames=field_names)
-            self.writer.writeheader()
+    def get_key_fields(self):
+        return ["probability", "run", "solution", "version", "objective"]
 
-            self._run_scenarios()
-
-    def _run_scenarios(self):
-        r_runs = range(self.nb_runs)
-
-        for run in r_runs:
+    def gen_batches(self):
+        for run in range(self.nb_runs):
             solvers = []
-            input = generator.InputGenerator().gen_from_file(
-                self.input_filename, self.nb_nodes, self.nb_apps, self.nb_users
+            input_id = self.get_input(
+                (run,),
+                lambda seed: generator.InputGenerator(seed).gen_from_file(
+                    self.input_filename, self.nb_nodes, self.nb_apps,
+                    self.nb_users
+                )
             )
-            metric = Metric(input)
 
             for scenario in self.scenarios:
                 prob = scenario['p']
-                solvers += self._get_solvers(prob, run, input, metric)
+                solvers += self._get_solvers(prob, run, input_id)
 
-            solutions = self.pool.uimap(exec_solver, solvers)
-            for data in solutions:
-                output = self._get_output(data)
-                self._write_output(output)
+            yield solvers
 
-    def _get_solvers(self, probability, run, input, metric):
+    def _get_solvers(self, probability, run, input_id):
         solvers = []
 
         # so_title, so_func_name = self.single_objective
@@ -127,13 +103,12 @@ class Exp_4():
         # data.run = run
         # solvers.append(data)
 
-        mo_func = [getattr(metric, obj[1]) for obj in self.multi_objective]
+        mo_func_name = [obj[1] for obj in self.multi_objective]
         mo_title = [obj[0] for obj in self.multi_objective]
         data = Solver_Data()
         data.solver = algo.genetic_mo
         data.params = {
-            "input": input,
-            "objective": mo_func,
+            "objective": mo_func_name,
             "use_heuristic": True,
             "pool_size": GA_POOL_SIZE,
             "elite_probability": probability
@@ -143,20 +118,24 @@ class Exp_4():
         data.objective = "|".join(mo_title)
         data.probability = probability
         data.run = run
+        data.input_id = input_id
         solvers.append(data)
 
         return solvers
 
-    def _get_output(self, data):
-        output = {
+    def get_job_fields(self, data):
+        return {
             "probability": data.probability,
             "run": data.run,
             "solution": data.title,
             "version": data.version,
-            "time": data.time,
             "objective": data.objective,
         }
 
+    def get_output(self, data):
+        output = self.get_job_fields(data)
+        output["time"] = data.time
+
         for m_title, m_func_name in self.metrics:
             solution = data.solution
             m_func = getattr(solution.metric, m_func_name)
@@ -174,7 +153,7 @@ class Exp_4():
 
         return output
 
-    def _write_output(self, output):
+    def write_output(self, output):
         print("{} {} | elite prob: {} | run: {}".format(
                output["solution"], output["version"],
                output["probability"], output["run"]
@@ -186,8 +165,6 @@ class Exp_4():
             print("\t {:15} : {}".format(m_title, output[m_title]))
         print(" ")
 
-        self.writer.writerow(output)
-
 
 def run():
     exp = Exp_4()
@@ -1,41 +1,20 @@
-import csv
-import random
 import numpy as np
-import time
-from pathos.multiprocessing import ProcessPool
+from exp.runner import Runner, Solver_Data
 from util import generator
-from algo.util.metric import Metric
+from algo.util import pareto
 import algo
 
-EXP_POOL_SIZE = 3
+NB_CORES = 0  # all the available cores
+SEED = None  # a new seed is saved with the output
+# stop the runs of a group when the confidence interval of CI_FIELD is
+# below this proportion of its mean, all the runs are executed if 0
+CI_THRESHOLD = 0.0
+CI_FIELD = "max_dv"
 GA_POOL_SIZE = 4
 
 
-def exec_solver(solver_data):
-    solver = solver_data.solver
-    params = solver_data.params
-
-    start_time = time.time()
-    solution = solver.solve(**params)
-    elapsed_time = time.time() - start_time
-
-    solver_data.time = elapsed_time
-    solver_data.solution = solution
-
-    return solver_data
-
-
-class Solver_Data():
+class Exp_5(Runner):
     def __init__(self):
-        pass
-
-
-class Exp_5():
-    def __init__(self):
-        random.seed()
-        np.random.seed()
-
-        self.pool = ProcessPool(EXP_POOL_SIZE)
         self.nb_runs = 30
         self.nb_nodes = 27
         self.nb_apps = 50
@@ -43,6 +22,8 @@ class Exp_5():
 
         self.input_filename = "exp/input/exp_5.json"
         self.output_filename = "exp/output/exp_5.csv"
+        Runner.__init__(self, self.output_filename, NB_CORES, seed=SEED,
+                        ci_threshold=CI_THRESHOLD, ci_field=CI_FIELD)
 
         self.scenarios = []
         for i in np.arange(0.0, 0.6, 0.1):
@@ -68,53 +49,49 @@ class Exp_5():
 
         self.app_types = ["eMBB", "URLLC", "mMTC"]
 
-    def run(self):
-        with open(self.output_filename, "w") as csv_file:
-            field_names = [
-                "stop_threshold", "run", "solution", "version",
-                "time", "objective"
-            ]
+    def get_field_names(self):
+        field_names = [
+            "stop_threshold", "run", "solution", "version",
+            "time", "objective"
+        ]
+        for m_title, m_func_name in self.metrics:
+            field_names.append(m_title)
+        for type in self.app_types:
             for m_title, m_func_name in self.metrics:
+                m_title = type + "_" + m_title
                 field_names.append(m_title)
-            for type in self.app_types:
-                for m_title, m_func_name in self.metrics:
-                    m_title = type + "_" + m_title
-                    field_names.append(m_title)
+        field_names += ["front_size", "hv"]
+        return field_names
 
-            self.writer = csv.DictWriter(csv_file, fieldnames=field_names)
-            self.writer.writeheader()
+    def get_key_fields(self):
+        return ["stop_threshold", "run", "solution", "version", "objective"]
 
-            self._run_scenarios()
-
-    def _run_scenarios(self):
-        r_runs = range(self.nb_runs)
-
-        for run in r_runs:
+    def gen_batches(self):
+        for run in range(self.nb_runs):
             solvers = []
-            input = generator.InputGenerator().gen_from_file(
-                self.input_filename, self.nb_nodes, self.nb_apps, self.nb_users
+            input_id = self.get_input(
+                (run,),
+                lambda seed: generator.InputGenerator(seed).gen_from_file(
+                    self.input_filename, self.nb_nodes, self.nb_apps,
+                    self.nb_users
+                )
             )
-            metric = Metric(input)
 
             for scenario in self.scenarios:
                 st = scenario['stop_threshold']
-                solvers += self._get_solvers(st, run, input, metric)
+                solvers += self._get_solvers(st, run, input_id)
 
-            solutions = self.pool.uimap(exec_solver, solvers)
-            for data in solutions:
-                output = self._get_output(data)
-                self._write_output(output)
+            yield solvers
 
-    def _get_solvers(self, stop_threshold, run, input, metric):
+    def _get_solvers(self, stop_threshold, run, input_id):
         solvers = []
 
-        mo_func = [getattr(metric, obj[1]) for obj in self.multi_objective]
+        mo_func_name = [obj[1] for obj in self.multi_objective]
         mo_title = [obj[0] for obj in self.multi_objective]
         data = Solver_Data()
         data.solver = algo.genetic_mo
         data.params = {
-            "input": input,
-            "objective": mo_func,
+            "objective": mo_func_name,
             "use_heuristic": True,
             "pool_size": GA_POOL_SIZE,
             "stop_threshold": stop_threshold
@@ -124,20 +101,24 @@ class Exp_5():
         data.objective = "|".join(mo_title)
         data.stop_threshold = stop_threshold
         data.run = run
+        data.input_id = input_id
         solvers.append(data)
 
         return solvers
 
-    def _get_output(self, data):
-        output = {
+    def get_job_fields(self, data):
+        return {
             "stop_threshold": data.stop_threshold,
             "run": data.run,
             "solution": data.title,
             "version": data.version,
-            "time": data.time,
             "objective": data.objective,
         }
 
+    def get_output(self, data):
+        output = self.get_job_fields(data)
+        output["time"] = data.time
+
         for m_title, m_func_name in self.metrics:
             solution = data.solution
             m_func = getattr(solution.metric, m_func_name)
@@ -153,22 +134,42 @@ class Exp_5():
                 value = m_func(*solution.get_vars())
                 output[m_title] = value
 
+        front = solution.pareto_front
+        output["front_size"] = len(front) if front is not None else ""
+        output["hv"] = self._get_hypervolume(data)
         return output
 
-    def _write_output(self, output):
+    def _get_hypervolume(self, data):
+        """Get the hypervolume of the Pareto front of a solution
+        between the ideal point 0 and the upper bounds of the objectives
+        in the instance, so it is comparable among runs and solvers
+        """
+        solution = data.solution
+        front = solution.pareto_front
+        if front is None or len(front) == 0:
+            return ""
+        metric = solution.metric
+        metric.filter.clean()
+        reference = [metric.get_upper_bound(name)
+                     for name in data.params["objective"]]
+        if any(bound is None for bound in reference):
+            return ""
+        return pareto.normalized_hypervolume(front, [0.0] * len(reference),
+                                             reference)
+
+    def write_output(self, output):
         print("{} {} | stop threshold : {} | run: {}".format(
                output["solution"], output["version"],
                output["stop_threshold"], output["run"]
         ))
         print("\t {:15} : {} s".format("time", output["time"]))
         print("\t {:15} : {}".format("objective", output["objective"]))
+        print("\t {:15} : {}".format("hv", output["hv"]))
 
         for m_title, m_name in self.metrics:
             print("\t {:15} : {}".format(m_title, output[m_title]))
         print(" ")
 
-        self.writer.writerow(output)
-
 
 def run():
     exp = Exp_5()
@@ -0,0 +1,160 @@
+import hashlib
+import inspect
+import json
+import os
+import multiprocessing as mp
+
+NB_PROCESSES = 0  # all the available cores
+HASH_FILENAME = ".figures.json"
+
+
+def new_figure(filename=None):
+    """Create a figure
+    A figure saved to a file is rendered by the Agg backend without pyplot,
+    otherwise it is created by pyplot to be shown
+    Args:
+        filename (str): file where the figure will be saved
+    Returns:
+        figure: matplotlib Figure object
+    """
+    # matplotlib is only loaded when a figure is rendered
+    if filename:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        return figure
+
+    import matplotlib.pyplot as plt
+    return plt.figure()
+
+
+def save_figure(figure, filename=None, **kwargs):
+    """Save a figure to a file or show it if there is no file
+    Args:
+        figure (Figure): figure created by new_figure
+        filename (str): output file
+        **kwargs: arguments of Figure.savefig
+    """
+    if not filename:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        figure.savefig(filename, **kwargs)
+
+
+class Figure_Task:
+    """Figure drawn by a function of the results
+    The function is called as func(data, *args, filename)
+    """
+
+    def __init__(self, filename, func, data, *args):
+        """Initialize method
+        Args:
+            filename (str): output file of the figure
+            func (function): module-level function drawing the figure
+            data (Results): results used by the figure, e.g.,
+                            the rows selected by the figure filter
+            *args: other arguments of the function
+        """
+        self.filename = filename
+        self.func = func
+        self.data = data
+        self.args = args
+
+    def get_hash(self):
+        """Get the content hash of the figure
+        It covers the data, the arguments and the source of the module
+        of the drawing function, e.g., the limits of the axes
+        Returns:
+            hash: hexadecimal digest
+        """
+        digest = hashlib.sha1()
+        module = inspect.getmodule(self.func)
+        with open(inspect.getsourcefile(module), "rb") as source:
+            digest.update(source.read())
+        digest.update(self.func.__name__.encode())
+        digest.update(repr(self.args).encode())
+        for name in sorted(self.data.columns):
+            column = self.data.columns[name]
+            digest.update(name.encode())
+            digest.update(column.dtype.str.encode())
+            digest.update(column.tobytes())
+        return digest.hexdigest()
+
+    def render(self):
+        self.func(self.data, *self.args, self.filename)
+        return self.filename
+
+
+def _render(task):
+    return task.render()
+
+
+def render_figures(tasks, nb_processes=NB_PROCESSES, force=False):
+    """Render figures in a process pool
+    The figures whose content hash did not change since the last render
+    are skipped. The hashes are kept in a file in the directory of
+    each figure
+    Args:
+        tasks (list): list of Figure_Task objects
+        nb_processes (int): number of processes, all the available cores if 0
+        force (bool): whether to render all figures
+    Returns:
+        filenames: list of the rendered files
+    """
+    index = {}
+    pending = []
+    hashes = {}
+    for task in tasks:
+        dirname = os.path.dirname(task.filename) or "."
+        if dirname not in index:
+            index[dirname] = _load_hashes(dirname)
+        key = os.path.basename(task.filename)
+        task_hash = task.get_hash()
+        if (not force and index[dirname].get(key) == task_hash
+                and os.path.isfile(task.filename)):
+            continue
+        os.makedirs(dirname, exist_ok=True)
+        pending.append(task)
+        hashes[task.filename] = task_hash
+
+    if nb_processes <= 0:
+        nb_processes = mp.cpu_count()
+    nb_processes = min(nb_processes, len(pending))
+
+    rendered = []
+    try:
+        if nb_processes > 1:
+            # Require UNIX fork to work
+            mp_ctx = mp.get_context("fork")
+            with mp_ctx.Pool(processes=nb_processes) as pool:
+                for filename in pool.imap_unordered(_render, pending):
+                    rendered.append(filename)
+        else:
+            for task in pending:
+                rendered.append(task.render())
+    finally:
+        for filename in rendered:
+            dirname = os.path.dirname(filename) or "."
+            index[dirname][os.path.basename(filename)] = hashes[filename]
+        for dirname, dir_hashes in index.items():
+            _save_hashes(dirname, dir_hashes)
+
+    return rendered
+
+
+def _load_hashes(dirname):
+    filename = os.path.join(dirname, HASH_FILENAME)
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename) as hash_file:
+        return json.load(hash_file)
+
+
+def _save_hashes(dirname, hashes):
+    if not hashes:
+        return
+    filename = os.path.join(dirname, HASH_FILENAME)
+    with open(filename, "w") as hash_file:
+        json.dump(hashes, hash_file, indent=1, sort_keys=True)
@@ -0,0 +1,294 @@
+import csv
+import os
+import numpy as np
+
+CONFIDENCE = 0.95
+CACHE_EXTENSION = ".npz"
+_SOURCE_KEY = "__source__"
+
+
+def load_results(filename, cache=True):
+    """Load the results of an experiment by column
+    The CSV file is parsed once, numeric columns are stored as float arrays
+    (empty values are NaN) and the others as string arrays. The columns are
+    cached in a NumPy file next to the CSV file, which is reused while the
+    CSV file is unchanged
+    Args:
+        filename (str): CSV file written by the experiment runner
+        cache (bool): whether to read and write the column cache
+    Returns:
+        results: Results object
+    """
+    source = _get_source(filename)
+    cache_filename = filename + CACHE_EXTENSION
+    if cache and os.path.isfile(cache_filename):
+        with np.load(cache_filename) as cached:
+            if np.array_equal(cached[_SOURCE_KEY], source):
+                names = [n for n in cached.files if n != _SOURCE_KEY]
+                return Results({n: cached[n] for n in names})
+
+    results = _read_csv(filename)
+    if cache:
+        tmp_filename = cache_filename + ".tmp"
+        try:
+            with open(tmp_filename, "wb") as cache_file:
+                np.savez(cache_file, **{_SOURCE_KEY: source},
+                         **results.columns)
+            os.replace(tmp_filename, cache_filename)
+        except OSError:
+            pass
+    return results
+
+
+def _get_source(filename):
+    stat = os.stat(filename)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _read_csv(filename):
+    with open(filename, newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        names = next(reader, [])
+        rows = [row for row in reader if len(row) == len(names)]
+
+    columns = {}
+    for index, name in enumerate(names):
+        columns[name] = _to_array([row[index] for row in rows])
+    return Results(columns)
+
+
+def _to_array(values):
+    """Convert the values of a column to a float array if possible
+    Args:
+        values (list): string values
+    Returns:
+        array: float array, or string array if any value is not a number
+               or all values are empty
+    """
+    if values and any(v != "" for v in values):
+        try:
+            return np.array([v if v != "" else "nan" for v in values],
+                            dtype=float)
+        except ValueError:
+            pass
+    return np.array(values, dtype=str)
+
+
+def calc_stats(values):
+    """Calculate the mean and the confidence interval of values
+    Args:
+        values (list): values
+    Returns:
+        mean: mean of the values
+        error: half width of the confidence interval, [mean - e, mean + e]
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.nan, 0.0
+    means, errors, _ = _calc_group_stats(np.zeros(len(values), dtype=int),
+                                         values, 1)
+    return means[0], errors[0]
+
+
+def _calc_group_stats(groups, values, nb_groups):
+    """Calculate the mean and the confidence interval of groups of values
+    in one pass
+    Args:
+        groups (numpy.ndarray): group index of each value
+        values (numpy.ndarray): values
+        nb_groups (int): number of groups
+    Returns:
+        means: mean of each group
+        errors: half width of the confidence interval of each group
+        counts: number of values of each group
+    """
+    # scipy.stats is slow to import and only needed for the intervals
+    import scipy.stats as st
+    counts = np.bincount(groups, minlength=nb_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(groups, weights=values, minlength=nb_groups) / counts
+        deviations = (values - means[groups]) ** 2
+        squares = np.bincount(groups, weights=deviations, minlength=nb_groups)
+        sem = np.sqrt(squares / (counts - 1)) / np.sqrt(counts)
+        quantile = st.t.ppf((1.0 + CONFIDENCE) / 2.0, counts - 1)
+        errors = np.where(sem > 0.0, quantile * sem, 0.0)
+    return means, errors, counts
+
+
+def _to_key(value):
+    if isinstance(value, (str, np.str_)):
+        return str(value)
+    return float(value)
+
+
+class Group_Stats:
+    """Mean and confidence interval of each group of results
+    """
+
+    def __init__(self, keys, means, errors, counts):
+        """Initialize method
+        Args:
+            keys (list): key of each group, tuple of column values
+            means (numpy.ndarray): mean of each group
+            errors (numpy.ndarray): confidence interval of each group
+            counts (numpy.ndarray): number of results of each group
+        """
+        self._index = {key: i for i, key in enumerate(keys)}
+        self.means = means
+        self.errors = errors
+        self.counts = counts
+
+    def __contains__(self, key):
+        return tuple(_to_key(v) for v in key) in self._index
+
+    def get(self, *key):
+        """Get the stats of a group
+        Args:
+            *key: value of each grouped column
+        Returns:
+            mean: mean of the group, NaN if the group has no results
+            error: half width of the confidence interval of the group
+        """
+        index = self._index.get(tuple(_to_key(v) for v in key))
+        if index is None:
+            return np.nan, 0.0
+        return self.means[index], self.errors[index]
+
+
+class Results:
+    """Results of an experiment stored by column
+    """
+
+    def __init__(self, columns):
+        """Initialize method
+        Args:
+            columns (dict): NumPy array of each column indexed by name
+        """
+        self.columns = columns
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def get_mask(self, **kwargs):
+        """Get the rows matching the values of some columns
+        Args:
+            **kwargs: value or list of values of each column
+        Returns:
+            mask: boolean array of the matched rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, values in kwargs.items():
+            column = self.columns[name]
+            if not isinstance(values, (list, tuple, np.ndarray)):
+                values = [values]
+            if column.dtype.kind == "f":
+                values = [float(v) for v in values]
+            else:
+                values = [str(v) for v in values]
+            mask &= np.isin(column, values)
+        return mask
+
+    def filter(self, **kwargs):
+        """Get the rows matching the values of some columns
+        Args:
+            **kwargs: value or list of values of each column
+        Returns:
+            results: Results object with the matched rows
+        """
+        mask = self.get_mask(**kwargs)
+        return Results({n: c[mask] for n, c in self.columns.items()})
+
+    def group_stats(self, keys, values):
+        """Calculate the mean and the confidence interval of values
+        grouped by some columns, in one vectorized pass
+        Args:
+            keys (list): names of the grouped columns
+            values (numpy.ndarray): value of each row, e.g., a metric column
+        Returns:
+            stats: Group_Stats object
+        """
+        values = np.asarray(values, dtype=float)
+        if len(self) == 0:
+            return Group_Stats([], np.zeros(0), np.zeros(0), np.zeros(0))
+
+        uniques = []
+        codes = []
+        for name in keys:
+            unique, code = np.unique(self.columns[name], return_inverse=True)
+            uniques.append(unique)
+            codes.append(code)
+        shape = tuple(len(unique) for unique in uniques)
+        flat = np.ravel_multi_index(codes, shape)
+        flat_keys, groups = np.unique(flat, return_inverse=True)
+
+        means, errors, counts = _calc_group_stats(groups, values,
+                                                  len(flat_keys))
+        keys = []
+        for index in zip(*np.unravel_index(flat_keys, shape)):
+            keys.append(tuple(_to_key(uniques[k][i])
+                              for k, i in enumerate(index)))
+        return Group_Stats(keys, means, errors, counts)
+
+
+class Accumulator:
+    """Streaming mean and variance of values (Welford's algorithm)
+    Each value is added in O(1) without keeping the values
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        """Initialize method
+        Args:
+            count (int): number of values
+            mean (float): mean of the values
+            m2 (float): sum of the squared deviations from the mean
+        """
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        """Add a value
+        Args:
+            value (float): value
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def get_variance(self):
+        """Get the sample variance of the values
+        Returns:
+            variance: sample variance, 0 if there are less than 2 values
+        """
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def get_error(self, confidence=CONFIDENCE):
+        """Get the half width of the confidence interval of the mean,
+        as calculated by calc_stats
+        Args:
+            confidence (float): confidence level
+        Returns:
+            error: half width, [mean - e, mean + e]
+        """
+        if self.count < 2:
+            return 0.0
+        sem = np.sqrt(self.get_variance() / self.count)
+        if sem <= 0.0:
+            return 0.0
+        import scipy.stats as st
+        return float(st.t.ppf((1.0 + confidence) / 2.0, self.count - 1) * sem)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @staticmethod
+    def from_dict(values):
+        return Accumulator(values["count"], values["mean"], values["m2"])
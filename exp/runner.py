@@ -0,0 +1,904 @@
+import os
+import csv
+import copy
+import json
+import time
+import pickle
+import hashlib
+import inspect
+import traceback
+import numpy as np
+from collections import OrderedDict
+from pathos.multiprocessing import ProcessPool
+from algo.util.metric import Metric
+from exp.results import Accumulator
+
+CACHE_SIZE = 2
+POLL_INTERVAL = 0.1
+INF = float("inf")
+# minimum interval in seconds between the saves of the result statistics
+STATS_SAVE_INTERVAL = 5.0
+# column of the replications of a scenario
+REPLICATION_FIELD = "run"
+# minimum number of runs of a group in the adaptive replication
+MIN_RUNS = 5
+
+# expected duration class of the solvers, longest first
+SOLVER_PRIORITY = {
+    "algo.milp": 0,
+    "algo.milp_decomp": 0,
+    "algo.genetic_mo_pareto": 1,
+    "algo.genetic_mo": 1,
+    "algo.genetic": 2,
+    "algo.pso": 2,
+    "algo.heuristic": 3,
+}
+
+# inputs loaded by the current process
+_instances = OrderedDict()
+
+
+def exec_solver(solver_data):
+    solver = solver_data.solver
+    params = dict(solver_data.params)
+
+    store = solver_data.instance_store
+    if store is not None:
+        input = store.load(solver_data.input_id)
+        params["input"] = input
+        if "objective" in params:
+            params["objective"] = _get_objective(input, params["objective"])
+
+    start_time = time.time()
+    try:
+        solution = solver.solve(**params)
+    except Exception:
+        # solver exceptions may not be picklable, which would block the pool
+        raise RuntimeError(traceback.format_exc())
+    elapsed_time = time.time() - start_time
+
+    # the input is attached again by the runner
+    if store is not None:
+        solution.input = None
+        solution.metric = None
+
+    solver_data.time = elapsed_time
+    solver_data.solution = solution
+
+    return solver_data
+
+
+def _get_objective(input, objective):
+    """Get the metric functions of an objective given by name
+    Args:
+        input (Input): input of the problem
+        objective (object): name of the metric function or list of names
+    Returns:
+        objective: function or list of functions
+    """
+    metric = Metric(input)
+    if isinstance(objective, str):
+        return getattr(metric, objective)
+    return [getattr(metric, name) for name in objective]
+
+
+class Solver_Data():
+    def __init__(self):
+        self.input_id = None
+        self.instance_store = None
+
+
+class Result_Writer():
+    """Append-only CSV writer
+    Each row is flushed and synced to disk as soon as it is written,
+    so a crash loses at most the jobs still running
+    """
+
+    def __init__(self, filename, field_names, key_fields):
+        """Initialize method
+        Args:
+            filename (str): CSV file name
+            field_names (list): names of the columns
+            key_fields (list): columns that identify a job
+        """
+        self.filename = filename
+        self.field_names = field_names
+        self.key_fields = key_fields
+        self.done = set()
+        self._file = None
+        self._writer = None
+
+    def get_key(self, row):
+        return tuple(str(row[field]) for field in self.key_fields)
+
+    def open(self):
+        """Open the file and load the keys of the jobs already written
+        A row partially written by a crash is discarded
+        """
+        exists = os.path.isfile(self.filename) and os.path.getsize(self.filename) > 0
+        if exists:
+            self._load_done()
+        else:
+            dirname = os.path.dirname(self.filename)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+        self._file = open(self.filename, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.field_names)
+        if not exists:
+            self._writer.writeheader()
+            self._sync()
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _load_done(self):
+        with open(self.filename, "r+", newline="") as csv_file:
+            content = csv_file.read()
+            # drop an incomplete last line
+            if not content.endswith("\n"):
+                end = content.rfind("\n") + 1
+                csv_file.seek(end)
+                csv_file.truncate()
+                content = content[:end]
+
+        reader = csv.DictReader(content.splitlines())
+        if reader.fieldnames != self.field_names:
+            raise ValueError("columns of {} differ from the experiment, "
+                             "move the file to start a new output"
+                             .format(self.filename))
+        for row in reader:
+            if all(row.get(field) is not None for field in self.key_fields):
+                self.done.add(self.get_key(row))
+
+    def is_done(self, row):
+        return self.get_key(row) in self.done
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._sync()
+        self.done.add(self.get_key(row))
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class Result_Stats():
+    """Streaming statistics of the results of an experiment
+    Each group of results, i.e., a scenario and a solver, has an Accumulator
+    per numeric column, so the mean and the confidence interval of a metric
+    are updated in O(1) per result. The statistics are saved as JSON next to
+    the CSV file and rebuilt from the CSV file if they are out of date
+    """
+
+    def __init__(self, filename, group_fields, key_fields,
+                 save_interval=STATS_SAVE_INTERVAL):
+        """Initialize method
+        Args:
+            filename (str): JSON file name
+            group_fields (list): columns that identify a group of results
+            key_fields (list): columns that identify a job,
+                               they are not accumulated
+            save_interval (float): minimum interval in seconds between saves
+        """
+        self.filename = filename
+        self.group_fields = group_fields
+        self.key_fields = key_fields
+        self.save_interval = save_interval
+        self.groups = OrderedDict()
+        self.nb_results = 0
+        self._last_save = None
+
+    def get_group(self, row):
+        return tuple(str(row[field]) for field in self.group_fields)
+
+    def add(self, row):
+        """Add a result
+        The columns that are not numbers, e.g., empty values, are skipped
+        Args:
+            row (dict): row of the output file
+        """
+        group = self.get_group(row)
+        accumulators = self.groups.setdefault(group, OrderedDict())
+        for field, value in row.items():
+            if field in self.key_fields or field in self.group_fields:
+                continue
+            value = _to_number(value)
+            if value is None:
+                continue
+            if field not in accumulators:
+                accumulators[field] = Accumulator()
+            accumulators[field].add(value)
+        self.nb_results += 1
+
+    def get(self, row, field):
+        """Get the accumulator of a column of the group of a row
+        Args:
+            row (dict): values of the group columns
+            field (str): column name
+        Returns:
+            accumulator: Accumulator object, or None if there is no value
+        """
+        accumulators = self.groups.get(self.get_group(row), {})
+        return accumulators.get(field)
+
+    def load(self, csv_filename, nb_results):
+        """Load the saved statistics
+        They are rebuilt from the CSV file if they do not reflect
+        all of its results, e.g., after a crash
+        Args:
+            csv_filename (str): CSV file of the results
+            nb_results (int): number of results in the CSV file
+        """
+        if self._load_json() and self.nb_results == nb_results:
+            return
+        self.groups = OrderedDict()
+        self.nb_results = 0
+        if nb_results > 0:
+            with open(csv_filename, newline="") as csv_file:
+                for row in csv.DictReader(csv_file):
+                    if all(row.get(field) is not None
+                           for field in self.key_fields):
+                        self.add(row)
+        self.save()
+
+    def _load_json(self):
+        if not os.path.isfile(self.filename):
+            return False
+        try:
+            with open(self.filename) as json_file:
+                content = json.load(json_file)
+        except ValueError:
+            return False
+        if content.get("group_fields") != self.group_fields:
+            return False
+
+        self.groups = OrderedDict()
+        for item in content["groups"]:
+            group = tuple(item["group"][field] for field in self.group_fields)
+            self.groups[group] = OrderedDict(
+                (field, Accumulator.from_dict(values))
+                for field, values in item["fields"].items())
+        self.nb_results = content["nb_results"]
+        return True
+
+    def save(self, force=True):
+        """Save the statistics
+        The file is replaced atomically
+        Args:
+            force (bool): whether to save even if the last save is
+                          more recent than the save interval
+        """
+        now = time.time()
+        if (not force and self._last_save is not None
+                and now - self._last_save < self.save_interval):
+            return
+        content = {
+            "group_fields": self.group_fields,
+            "nb_results": self.nb_results,
+            "groups": [
+                {"group": dict(zip(self.group_fields, group)),
+                 "fields": {field: acc.to_dict()
+                            for field, acc in accumulators.items()}}
+                for group, accumulators in self.groups.items()
+            ]
+        }
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w") as json_file:
+            json.dump(content, json_file, indent=1)
+        os.replace(tmp_filename, self.filename)
+        self._last_save = now
+
+
+def _to_number(value):
+    """Convert a value of the output file to a finite float
+    Args:
+        value (object): value of a column
+    Returns:
+        number: float value, or None if it is not a finite number
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not np.isfinite(value):
+        return None
+    return value
+
+
+class Adaptive_Replication():
+    """Adaptive number of runs of each group of results
+    The runs of a group, i.e., a scenario and a solver, are scheduled
+    until the half width of the confidence interval of a metric is below
+    a proportion of its mean, or until the runs enumerated by the experiment
+    are exhausted. The cores freed by the converged groups are given to
+    the groups with the widest confidence interval
+    """
+
+    def __init__(self, stats, field, threshold, min_runs=MIN_RUNS):
+        """Initialize method
+        Args:
+            stats (Result_Stats): statistics of the results
+            field (str): column of the metric
+            threshold (float): maximum half width of the confidence
+                               interval relative to the mean
+            min_runs (int): minimum number of runs of each group
+        """
+        self.stats = stats
+        self.field = field
+        self.threshold = threshold
+        self.min_runs = max(2, min_runs)
+        self.remaining = OrderedDict()
+        self.running = {}
+
+    def get_count(self, group):
+        accumulators = self.stats.groups.get(group, {})
+        acc = accumulators.get(self.field)
+        return acc.count if acc is not None else 0
+
+    def get_error(self, group):
+        """Get the relative half width of the confidence interval of a group
+        Args:
+            group (tuple): group of results
+        Returns:
+            error: half width divided by the absolute mean, INF if unknown
+        """
+        acc = self.stats.groups.get(group, {}).get(self.field)
+        if acc is None or acc.count < 2:
+            return INF
+        error = acc.get_error()
+        if error <= 0.0:
+            return 0.0
+        if acc.mean == 0.0:
+            return INF
+        return error / abs(acc.mean)
+
+    def is_converged(self, group):
+        return (self.get_count(group) >= self.min_runs
+                and self.get_error(group) <= self.threshold)
+
+    def start(self, jobs):
+        """Select the first jobs to execute
+        Each group starts with the runs missing to reach the minimum number
+        of runs, or a single run if the group already has enough results
+        Args:
+            jobs (list): pending jobs in the order of their runs
+        Returns:
+            jobs: jobs to execute
+        """
+        self.remaining = OrderedDict()
+        for data, row in jobs:
+            group = self.stats.get_group(row)
+            self.remaining.setdefault(group, []).append(data)
+
+        selected = []
+        for group, group_jobs in self.remaining.items():
+            if self.is_converged(group):
+                group_jobs.clear()
+                continue
+            nb_jobs = max(1, self.min_runs - self.get_count(group))
+            for _ in range(min(nb_jobs, len(group_jobs))):
+                selected.append(self._pop(group))
+        return selected
+
+    def update(self, row):
+        """Select the next jobs after a job finished
+        Args:
+            row (dict): output of the finished job
+        Returns:
+            jobs: jobs to execute
+        """
+        group = self.stats.get_group(row)
+        self.running[group] -= 1
+        if self.is_converged(group):
+            self.remaining[group].clear()
+            return []
+        if self.running[group] == 0 and self.remaining[group]:
+            return [self._pop(group)]
+        return []
+
+    def pop_noisiest(self):
+        """Select the next run of the group with the widest confidence
+        interval, preferring the groups with less running jobs
+        Returns:
+            data: job, or None if all the groups are finished
+        """
+        groups = [group for group, group_jobs in self.remaining.items()
+                  if group_jobs]
+        if not groups:
+            return None
+        group = min(groups, key=lambda g: (self.running[g],
+                                           -self.get_error(g)))
+        return self._pop(group)
+
+    def _pop(self, group):
+        self.running[group] = self.running.get(group, 0) + 1
+        return self.remaining[group].pop(0)
+
+
+class Instance_Store():
+    """Store of the generated inputs
+    Each input is written once as a pickle of its parameters and a NumPy
+    file with the network delays of all applications, which is
+    memory-mapped when loaded. Jobs refer to an input only by its id,
+    and each process keeps the last loaded inputs in a cache
+    """
+
+    def __init__(self, dirname, mmap=True):
+        """Initialize method
+        Args:
+            dirname (str): directory of the stored inputs
+            mmap (bool): whether the network delays are memory-mapped
+        """
+        self.dirname = dirname
+        self.mmap = mmap
+
+    def get_id(self, key):
+        return "_".join(str(k) for k in key)
+
+    def _get_filenames(self, input_id):
+        filename = os.path.join(self.dirname, input_id)
+        return filename + ".pickle", filename + "_net_delay.npy"
+
+    def contains(self, input_id):
+        filenames = self._get_filenames(input_id)
+        return all(os.path.isfile(filename) for filename in filenames)
+
+    def get(self, key, gen_func):
+        """Get the id of an input, generating and saving it if it does not exist
+        Args:
+            key (tuple): identification of the input
+            gen_func (function): function to generate the input
+        Returns:
+            input_id: id of the stored input
+        """
+        input_id = self.get_id(key)
+        if not self.contains(input_id):
+            self.save(input_id, gen_func())
+        return input_id
+
+    def save(self, input_id, input):
+        """Save an input
+        The network delays are stored as a matrix per application
+        indexed by node ids
+        Args:
+            input_id (str): id of the input
+            input (Input): input to save
+        """
+        os.makedirs(self.dirname, exist_ok=True)
+        pickle_filename, npy_filename = self._get_filenames(input_id)
+
+        size = max(node.id for node in input.nodes) + 1
+        net_delay = np.zeros((len(input.apps), size, size))
+        for a, app in enumerate(input.apps):
+            for node_i in input.nodes:
+                for node_j in input.nodes:
+                    value = app.get_net_delay(node_i, node_j)
+                    net_delay[a, node_i.id, node_j.id] = value
+
+        params = copy.copy(input)
+        params.apps = [copy.copy(app) for app in input.apps]
+        for app in params.apps:
+            app.net_delay = None
+
+        # the pickle is the last file written, it marks a complete input
+        with open(npy_filename, "wb") as npy_file:
+            np.save(npy_file, net_delay)
+            npy_file.flush()
+            os.fsync(npy_file.fileno())
+        tmp_filename = pickle_filename + ".tmp"
+        with open(tmp_filename, "wb") as pickle_file:
+            pickle.dump(params, pickle_file)
+            pickle_file.flush()
+            os.fsync(pickle_file.fileno())
+        os.replace(tmp_filename, pickle_filename)
+
+    def load(self, input_id):
+        """Load an input
+        Args:
+            input_id (str): id of the input
+        Returns:
+            input: the stored input
+        """
+        cache_key = (self.dirname, input_id)
+        if cache_key in _instances:
+            _instances.move_to_end(cache_key)
+            return _instances[cache_key]
+
+        pickle_filename, npy_filename = self._get_filenames(input_id)
+        with open(pickle_filename, "rb") as pickle_file:
+            input = pickle.load(pickle_file)
+        mmap_mode = "r" if self.mmap else None
+        net_delay = np.load(npy_filename, mmap_mode=mmap_mode)
+        for a, app in enumerate(input.apps):
+            app.net_delay = net_delay[a]
+
+        _instances[cache_key] = input
+        while len(_instances) > CACHE_SIZE:
+            _instances.popitem(last=False)
+        return input
+
+
+class Job_Scheduler():
+    """Scheduler of solver jobs on a budget of CPU cores
+    Each job declares its parallelism (the GA pool size, the CPLEX threads,
+    or one core for single-threaded solvers). The jobs are started in
+    longest-expected-first order, i.e., MILP jobs first, and a job is
+    started only when its cores are free. Smaller jobs backfill
+    the cores left by larger ones, but while a job waits for its cores,
+    only the jobs of the same priority class backfill, so the longer jobs
+    are not delayed by the shorter ones
+    """
+
+    def __init__(self, nb_cores=0, poll_interval=POLL_INTERVAL):
+        """Initialize method
+        Args:
+            nb_cores (int): number of cores, all the available cores if 0
+            poll_interval (float): interval in seconds between the checks
+                                   of the finished jobs
+        """
+        if nb_cores <= 0:
+            nb_cores = os.cpu_count() or 1
+        self.nb_cores = nb_cores
+        self.poll_interval = poll_interval
+        self.pool = ProcessPool(nb_cores)
+        self.free_cores = nb_cores
+        self._pending = []
+
+    def get_nb_threads(self, data):
+        """Get the number of cores used by a job
+        Args:
+            data (Solver_Data): job
+        Returns:
+            nb_threads: number of cores
+        """
+        params = data.params
+        nb_threads = max(1, params.get("nb_threads", 1))
+        return nb_threads * max(1, params.get("pool_size", 1))
+
+    def _fit_job(self, data):
+        """Reduce the parallelism of a job larger than the budget of cores
+        Args:
+            data (Solver_Data): job
+        """
+        if self.get_nb_threads(data) <= self.nb_cores:
+            return
+        params = dict(data.params)
+        if "nb_threads" in params:
+            params["nb_threads"] = min(max(1, params["nb_threads"]),
+                                       self.nb_cores)
+        if "pool_size" in params:
+            nb_threads = max(1, params.get("nb_threads", 1))
+            params["pool_size"] = max(1, self.nb_cores // nb_threads)
+        data.params = params
+
+    def get_priority(self, data):
+        """Get the expected duration class of a job, lower values first
+        Args:
+            data (Solver_Data): job
+        Returns:
+            priority: priority of the job
+        """
+        name = getattr(data.solver, "__name__", "")
+        return SOLVER_PRIORITY.get(name, len(SOLVER_PRIORITY))
+
+    def _get_order(self, data):
+        return (self.get_priority(data), -self.get_nb_threads(data))
+
+    def submit(self, data):
+        """Add a job while the jobs are executed by run()
+        Args:
+            data (Solver_Data): job
+        """
+        self._fit_job(data)
+        self._pending.append(data)
+        self._pending.sort(key=self._get_order)
+
+    def get_idle_cores(self):
+        """Get the number of free cores not claimed by the pending jobs
+        Returns:
+            nb_cores: number of idle cores
+        """
+        claimed = sum(self.get_nb_threads(data) for data in self._pending)
+        return max(0, self.free_cores - claimed)
+
+    def run(self, jobs, prepare=None):
+        """Execute the jobs
+        More jobs can be added by submit() while the finished jobs are
+        consumed
+        Args:
+            jobs (list): list of Solver_Data
+            prepare (function): function called with a job just before
+                                it is started, e.g., to store its input
+        Returns:
+            generator: the jobs in the order they finish
+        """
+        for data in jobs:
+            self._fit_job(data)
+        self._pending = sorted(jobs, key=self._get_order)
+        pending = self._pending
+        running = []
+        self.free_cores = self.nb_cores
+
+        while pending or running:
+            # start the first pending jobs that fit in the free cores
+            index = 0
+            waiting_priority = None
+            while index < len(pending) and self.free_cores > 0:
+                data = pending[index]
+                priority = self.get_priority(data)
+                if (waiting_priority is not None
+                        and priority > waiting_priority):
+                    break
+                nb_threads = self.get_nb_threads(data)
+                if nb_threads <= self.free_cores:
+                    if prepare is not None:
+                        prepare(data)
+                    result = self.pool.apipe(exec_solver, data)
+                    running.append((result, nb_threads))
+                    self.free_cores -= nb_threads
+                    del pending[index]
+                else:
+                    if waiting_priority is None:
+                        waiting_priority = priority
+                    index += 1
+
+            finished = [item for item in running if item[0].ready()]
+            if not finished:
+                time.sleep(self.poll_interval)
+                continue
+            for item in finished:
+                running.remove(item)
+                result, nb_threads = item
+                self.free_cores += nb_threads
+                yield result.get()
+
+
+def _hash_key(key):
+    data = repr(tuple(str(k) for k in key)).encode()
+    return int.from_bytes(hashlib.sha1(data).digest()[:8], "little")
+
+
+class Runner():
+    """Resumable experiment runner
+    The jobs are enumerated in a deterministic order, the jobs already
+    in the output file are skipped and the others are executed by
+    a Job_Scheduler.
+    Each input and each job has its own random stream, spawned from
+    the seed of the experiment and the key of the input or job,
+    so any job can be replayed independently of the others
+    """
+
+    def __init__(self, output_filename, nb_cores=0, mmap=True, seed=None,
+                 ci_threshold=0.0, ci_field=None, min_runs=MIN_RUNS):
+        """Initialize method
+        Args:
+            output_filename (str): CSV file name
+            nb_cores (int): number of cores, all the available cores if 0
+            mmap (bool): whether the stored inputs are memory-mapped
+            seed (int): seed of the experiment, a new one is generated
+                        if None. It is saved with the output file
+            ci_threshold (float): the runs of a group of results stop when
+                                  the half width of the confidence interval
+                                  of ci_field is below this proportion of
+                                  its mean, all the runs are executed if 0
+            ci_field (str): column of the adaptive number of runs
+            min_runs (int): minimum number of runs of the adaptive
+                            number of runs
+        """
+        self.output_filename = output_filename
+        self.ci_threshold = ci_threshold
+        self.ci_field = ci_field
+        self.min_runs = min_runs
+        self.scheduler = Job_Scheduler(nb_cores)
+        basename = os.path.splitext(output_filename)[0]
+        self.instance_store = Instance_Store(basename + "_inputs", mmap)
+        self.seed = self._load_seed(basename + ".seed", seed)
+        self.stats_filename = basename + ".stats.json"
+        self.stats = None
+        self._input_funcs = {}
+
+    def _load_seed(self, filename, seed):
+        """Load the seed of a previous execution or save a new one
+        Raises:
+            ValueError: if the seed differs from the saved one
+        """
+        if os.path.isfile(filename):
+            with open(filename) as seed_file:
+                saved_seed = json.load(seed_file)
+            if seed is not None and seed != saved_seed:
+                raise ValueError("seed {} differs from the seed {} of {}".format(
+                                 seed, saved_seed, filename))
+            return saved_seed
+
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        dirname = os.path.dirname(filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(filename, "w") as seed_file:
+            json.dump(seed, seed_file)
+        return seed
+
+    def get_seed(self, *key):
+        """Get the seed of the random stream identified by a key
+        Args:
+            key (tuple): identification of the stream
+        Returns:
+            seed: numpy.random.SeedSequence
+        """
+        return np.random.SeedSequence([self.seed, _hash_key(key)])
+
+    def get_input(self, key, gen_func):
+        """Get the id of the input of a job
+        The input is generated and stored only when the first job
+        using it is started, so the jobs of skipped runs cost nothing
+        Args:
+            key (tuple): identification of the input
+            gen_func (function): function to generate the input,
+                                 it receives the seed of the input
+        Returns:
+            input_id: id of the stored input
+        """
+        seed = self.get_seed("input", *key)
+        input_id = self.instance_store.get_id(key)
+        if input_id not in self._input_funcs:
+            self._input_funcs[input_id] = (key, lambda: gen_func(seed))
+        return input_id
+
+    def _store_input(self, data):
+        """Generate and store the input of a job if it is not stored yet
+        Args:
+            data (Solver_Data): job
+        """
+        if data.input_id in self._input_funcs:
+            key, gen_func = self._input_funcs.pop(data.input_id)
+            self.instance_store.get(key, gen_func)
+
+    def _prepare_job(self, data, key):
+        """Set the seed and the input store of a job
+        Args:
+            data (Solver_Data): job
+            key (tuple): key of the job in the output file
+        """
+        if data.input_id is not None:
+            data.instance_store = self.instance_store
+        params = inspect.signature(data.solver.solve).parameters
+        if "seed" in params and "seed" not in data.params:
+            data.params = dict(data.params)
+            data.params["seed"] = self.get_seed("job", *key)
+
+    def get_field_names(self):
+        """Get the names of the columns of the output file
+        """
+        return []
+
+    def get_key_fields(self):
+        """Get the columns that identify a job
+        """
+        return []
+
+    def get_group_fields(self):
+        """Get the columns that identify a group of results of the
+        statistics, by default the key columns except the replication
+        """
+        return [field for field in self.get_key_fields()
+                if field != REPLICATION_FIELD]
+
+    def gen_batches(self):
+        """Generate the batches of jobs
+        Returns:
+            generator: lists of Solver_Data
+        """
+        return []
+
+    def get_job_fields(self, data):
+        """Get the values of the key columns of a job
+        """
+        return {}
+
+    def get_output(self, data):
+        """Get the row of the output file of a finished job
+        """
+        return self.get_job_fields(data)
+
+    def write_output(self, output):
+        pass
+
+    def run(self):
+        field_names = self.get_field_names()
+        key_fields = self.get_key_fields()
+        self.stats = Result_Stats(self.stats_filename,
+                                  self.get_group_fields(), key_fields)
+        with Result_Writer(self.output_filename, field_names, key_fields) as writer:
+            self.stats.load(self.output_filename, len(writer.done))
+            jobs = []
+            for solvers in self.gen_batches():
+                for data in solvers:
+                    row = self.get_job_fields(data)
+                    if writer.is_done(row):
+                        continue
+                    self._prepare_job(data, writer.get_key(row))
+                    jobs.append((data, row))
+
+            replication = None
+            if self.ci_threshold > 0.0 and self.ci_field:
+                replication = Adaptive_Replication(self.stats, self.ci_field,
+                                                   self.ci_threshold,
+                                                   self.min_runs)
+                jobs = replication.start(jobs)
+            else:
+                jobs = [data for data, row in jobs]
+
+            try:
+                for data in self.scheduler.run(jobs, self._store_input):
+                    self._attach_input(data)
+                    output = self.get_output(data)
+                    self.stats.add(output)
+                    self.write_output(output)
+                    writer.write(output)
+                    self.stats.save(force=False)
+                    if replication is not None:
+                        self._schedule_runs(replication, output)
+            finally:
+                self.stats.save()
+
+    def _schedule_runs(self, replication, output):
+        """Schedule the next runs of the adaptive number of runs
+        Args:
+            replication (Adaptive_Replication): runs of each group
+            output (dict): output of the finished job
+        """
+        for data in replication.update(output):
+            self.scheduler.submit(data)
+        while self.scheduler.get_idle_cores() > 0:
+            data = replication.pop_noisiest()
+            if data is None:
+                break
+            self.scheduler.submit(data)
+
+    def _attach_input(self, data):
+        if data.instance_store is not None:
+            input = self.instance_store.load(data.input_id)
+            data.solution.input = input
+            data.solution.metric = Metric(input)
+
+    def replay(self, **fields):
+        """Execute again a single job in the current process,
+        e.g., to profile it. It uses the same input and seed of the job
+        executed by run()
+        Args:
+            fields: values of the key columns of the job
+        Returns:
+            data: the finished Solver_Data
+        Raises:
+            ValueError: if no job matches the fields
+        """
+        key_fields = self.get_key_fields()
+        key = tuple(str(fields[field]) for field in key_fields)
+        for solvers in self.gen_batches():
+            for data in solvers:
+                row = self.get_job_fields(data)
+                if tuple(str(row[field]) for field in key_fields) == key:
+                    self._prepare_job(data, key)
+                    self._store_input(data)
+                    data = exec_solver(data)
+                    self._attach_input(data)
+                    return data
+        raise ValueError("job {} not found".format(fields))
@@ -1,4 +1,5 @@
 import sys
+from util import profiling
 
 
 def exp_1(args=[]):
@@ -27,8 +28,9 @@ def exp_5(args=[]):
 
 
 if __name__ == '__main__':
-    args = sys.argv[1:]
+    profiler, args = profiling.parse_args(sys.argv[1:])
     experiment = args[0] if args else 'exp_1'
     if experiment in locals():
         exp_func = locals()[experiment]
-        exp_func(args[1:])
+        with profiler:
+            exp_func(args[1:])
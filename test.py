@@ -1,15 +1,48 @@
-import random
 import numpy as np
 import sys
 import time
-from util import generator
+from util import generator, profiling
 from algo.util.metric import Metric
 import algo
 
 
+def exp_6(args=[]):
+    seed = 3
+
+    nb_nodes = 6
+    nb_apps = 4
+    nb_users = 1000
+    if len(args) >= 3:
+        nb_nodes, nb_apps, nb_users = map(lambda i: int(i), args[:3])
+    group_by = args[3] if len(args) >= 4 else "app"
+
+    input_filename = "input.json"
+    input = generator.InputGenerator(seed).gen_from_file(
+        input_filename, nb_nodes, nb_apps, nb_users
+    )
+    metric = Metric(input)
+
+    start_time = time.time()
+    solution = algo.milp_decomp.solve(input, group_by=group_by,
+                                      nb_iterations=10, time_limit=60)
+    elapsed_time = round(time.time() - start_time, 4)
+    print("milp decomposition by {}".format(group_by))
+    print("\t {:15} : {} s".format("time", elapsed_time))
+    violations = solution.get_violations()
+    print("\t {:15} : {}".format("valid", violations.is_valid()))
+    if not violations.is_valid():
+        print(violations)
+
+    print("\t {:15} : {}".format("iterations", solution.nb_iterations))
+    print("\t {:15} : {}".format("lower bound", solution.lower_bound))
+    print("\t {:15} : {}".format("upper bound", solution.upper_bound))
+    print("\t {:15} : {}".format("gap", solution.gap))
+    print("\t {:15} : {}".format("max e",
+                                  metric.get_qos_violation(*solution.get_vars())))
+
+
 def exp_5(args=[]):
-    random.seed(3)
-    np.random.seed(3)
+    seed = 3
 
     nb_nodes = 27
     nb_apps = 10
@@ -18,7 +51,7 @@ def exp_5(args=[]):
         nb_nodes, nb_apps, nb_users = map(lambda i: int(i), args)
 
     input_filename = "input.json"
-    input = generator.InputGenerator().gen_from_file(
+    input = generator.InputGenerator(seed).gen_from_file(
         input_filename, nb_nodes, nb_apps, nb_users
     )
     metric = Metric(input)
@@ -40,7 +73,10 @@ def exp_5(args=[]):
         elapsed_time = round(time.time() - start_time, 4)
         print(title)
         print("\t {:22} : {} s".format("time", elapsed_time))
-        print("\t {:22} : {}".format("valid", solution.is_valid()))
+        violations = solution.get_violations()
+        print("\t {:22} : {}".format("valid", violations.is_valid()))
+        if not violations.is_valid():
+            print(violations)
 
         for type in app_types:
             metric.filter.clean()
@@ -53,8 +89,7 @@ def exp_5(args=[]):
 
 
 def exp_4(args=[]):
-    random.seed(3)
-    np.random.seed(3)
+    seed = 3
 
     nb_nodes = 27
     nb_apps = 30
@@ -63,7 +98,7 @@ def exp_4(args=[]):
         nb_nodes, nb_apps, nb_users = map(lambda i: int(i), args)
 
     input_filename = "input.json"
-    input = generator.InputGenerator().gen_from_file(
+    input = generator.InputGenerator(seed).gen_from_file(
         input_filename, nb_nodes, nb_apps, nb_users
     )
     metric = Metric(input)
@@ -89,7 +124,10 @@ def exp_4(args=[]):
         elapsed_time = round(time.time() - start_time, 4)
         print("heuristic {}: {}".format(title, version))
         print("\t {:15} : {} s".format("time", elapsed_time))
-        print("\t {:15} : {}".format("valid", solution.is_valid()))
+        violations = solution.get_violations()
+        print("\t {:15} : {}".format("valid", violations.is_valid()))
+        if not violations.is_valid():
+            print(violations)
 
         for m_title, m_func in metrics:
             value = m_func(*solution.get_vars())
@@ -97,9 +135,6 @@ def exp_4(args=[]):
 
 
 def exp_3(args=[]):
-    random.seed()
-    np.random.seed()
-
     nb_nodes = 27
     nb_apps = 30
     nb_users = 10000
@@ -151,8 +186,7 @@ def exp_3(args=[]):
 
 
 def exp_2(args=[]):
-    random.seed(3)
-    np.random.seed(3)
+    seed = 3
 
     nb_nodes = 27
     nb_apps = 10
@@ -161,7 +195,7 @@ def exp_2(args=[]):
         nb_nodes, nb_apps, nb_users = map(lambda i: int(i), args)
 
     input_filename = "input.json"
-    input = generator.InputGenerator().gen_from_file(
+    input = generator.InputGenerator(seed).gen_from_file(
         input_filename, nb_nodes, nb_apps, nb_users
     )
     metric = Metric(input)
@@ -199,7 +233,10 @@ def exp_2(args=[]):
         elapsed_time = round(time.time() - start_time, 4)
         print(title)
         print("\t {:15} : {} s".format("time", elapsed_time))
-        print("\t {:15} : {}".format("valid", solution.is_valid()))
+        violations = solution.get_violations()
+        print("\t {:15} : {}".format("valid", violations.is_valid()))
+        if not violations.is_valid():
+            print(violations)
 
         for m_title, m_func in metrics:
             value = m_func(*solution.get_vars())
@@ -210,8 +247,9 @@ def exp_2(args=[]):
 
 
 if __name__ == '__main__':
-    args = sys.argv[1:]
+    profiler, args = profiling.parse_args(sys.argv[1:])
     experiment = args[0] if args else 'exp_2'
     if experiment in locals():
         exp_func = locals()[experiment]
-        exp_func(args[1:])
+        with profiler:
+            exp_func(args[1:])
@@ -1,4 +1,20 @@
-from . import generator
-from . import model
-from . import path
-from . import point
+import importlib
+
+# modules imported on first access, e.g., util.point
+__all__ = [
+    "generator",
+    "model",
+    "path",
+    "point",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+                         __name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,14 +1,32 @@
-import random
 import math
 import json
+import numpy as np
 from util import point, path, model
 
 INF = float("inf")
+# number of nodes above which the network delays of an application are
+# stored as a matrix instead of a dictionary
+NET_DELAY_MATRIX_THRESHOLD = 100
 
 
-def get_int_param(param):
+def _get_rng(rng):
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng
+
+
+def _randrange(rng, start, stop=None, step=1):
+    """Choose a random value from range(start, stop, step)
+    """
+    if stop is None:
+        start, stop = 0, start
+    nb_values = len(range(start, stop, step))
+    return start + step * int(rng.integers(nb_values))
+
+
+def get_int_param(param, rng=None):
     if isinstance(param, list) or isinstance(param, tuple):
-        param = random.randrange(*param)
+        param = _randrange(_get_rng(rng), *param)
     if param == "INF":
         param = INF
     else:
@@ -16,9 +34,9 @@ def get_int_param(param):
     return param
 
 
-def get_float_param(param, precision=None):
+def get_float_param(param, precision=None, rng=None):
     if isinstance(param, list) or isinstance(param, tuple):
-        param = random.uniform(*param)
+        param = float(_get_rng(rng).uniform(*param))
     if param == "INF":
         param = INF
     else:
@@ -29,14 +47,21 @@ def get_float_param(param, precision=None):
 
 
 class InputGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, seed=None):
+        """Initialize method
+        Args:
+            seed (object): seed of the random generator, e.g., an int or a
+                           numpy.random.SeedSequence. Inputs generated with
+                           the same seed and parameters are equal
+        """
+        self.rng = np.random.default_rng(seed)
 
     def gen_from_file(self, config_file, nb_nodes, nb_apps, nb_users):
         with open(config_file) as json_data:
             self.config = json.load(json_data)
 
         self.input = model.Input()
+        self._links = None
         self.nb_nodes = nb_nodes
         self.nb_apps = nb_apps
         self.nb_users = nb_users
@@ -107,25 +132,31 @@ class InputGenerator:
 
         return
 
+    def _get_int_param(self, param):
+        return get_int_param(param, rng=self.rng)
+
+    def _get_float_param(self, param, precision=None):
+        return get_float_param(param, precision, rng=self.rng)
+
     def _gen_app(self, data):
         app = model.App()
 
         app.type = data["type"]
-        app.deadline = get_float_param(data["deadline"], 4)
-        app.work_size = get_int_param(data["work_size"])
-        app.request_rate = get_float_param(data["request_rate"], 4)
-        app.availability = get_float_param(data["availability"], 4)
+        app.deadline = self._get_float_param(data["deadline"], 4)
+        app.work_size = self._get_int_param(data["work_size"])
+        app.request_rate = self._get_float_param(data["request_rate"], 4)
+        app.availability = self._get_float_param(data["availability"], 4)
 
         max_instances = 0
         if "max_instances" in data:
-            max_instances = get_float_param(data["max_instances"])
+            max_instances = self._get_float_param(data["max_instances"])
             if max_instances > 1.0:
                 max_instances = int(round(max_instances))
             else:
                 max_instances = int(round(max_instances * self.nb_nodes))
             max_instances = max(1, max_instances)
         else:
-            max_instances = random.randint(1, self.nb_nodes)
+            max_instances = int(self.rng.integers(1, self.nb_nodes + 1))
         app.max_instances = max_instances
 
         # TODO: improve CPU demand based on WORK SIZE
@@ -145,9 +176,9 @@ class InputGenerator:
 
                     value = r_data[key]
                     if r.type == "int":
-                        value = get_int_param(value)
+                        value = self._get_int_param(value)
                     elif r.type == "float":
-                        value = get_float_param(value, r.precision)
+                        value = self._get_float_param(value, r.precision)
                     r_demand[key] = value
 
             app.demand[r.name] = r_demand
@@ -187,11 +218,11 @@ class InputGenerator:
     def _gen_node(self, data):
         node = model.Node()
         node.type = data["type"]
-        node.availability = get_float_param(data["availability"], 4)
+        node.availability = self._get_float_param(data["availability"], 4)
 
         power = {"min": 0, "max": 0}
         for key in power:
-            power[key] = get_float_param(data["power"][key], 2)
+            power[key] = self._get_float_param(data["power"][key], 2)
         node.power_consumption = power
 
         node.cost = {}
@@ -205,14 +236,14 @@ class InputGenerator:
                 for key in r_cost.keys():
                     if key not in r_data:
                         continue
-                    r_cost[key] = get_float_param(r_data[key])
+                    r_cost[key] = self._get_float_param(r_data[key])
 
             if r_name in data["capacity"]:
                 r_capacity = data["capacity"][r_name]
                 if r.type == "int":
-                    r_capacity = get_int_param(r_capacity)
+                    r_capacity = self._get_int_param(r_capacity)
                 elif r.type == "float":
-                    r_capacity = get_float_param(r_capacity, r.precision)
+                    r_capacity = self._get_float_param(r_capacity, r.precision)
 
             node.cost[r.name] = r_cost
             node.capacity[r.name] = r_capacity
@@ -223,34 +254,19 @@ class InputGenerator:
         r_nodes = range(self.nb_nodes)
 
         for app in self.input.apps:
-            app_type = self.input.app_types[app.type]
-            data = app_type.network
-            net_data = {}
-
-            for key, value in data.items():
-                net_data[key] = get_float_param(data[key])
+            links = self.gen_network_links(app)
+            shortest_delay = path.calc_net_delay_sparse(self.nb_nodes, links)
+            if self.nb_nodes > NET_DELAY_MATRIX_THRESHOLD:
+                # the node ids are the node indexes, so the delays are kept
+                # as a matrix instead of a dictionary of N^2 items
+                app.net_delay = np.round(shortest_delay, 4)
+                continue
 
-            graph = [[INF for j in r_nodes] for i in r_nodes]
+            # the delay of a node to itself is kept as the integer 0
+            # of the adjacency matrix, as in the previously generated inputs
+            shortest_delay = shortest_delay.tolist()
             for i in r_nodes:
-                node_i = self.input.nodes[i]
-                for j in range(i, self.nb_nodes):
-                    node_j = self.input.nodes[j]
-                    delay = INF
-
-                    if i == j:
-                        delay = 0
-                    elif node_i.type != node_j.type or node_i.is_neighbor(node_j):
-                        key_1 = node_i.type + "_" + node_j.type
-                        key_2 = node_j.type + "_" + node_i.type
-                        if key_1 in net_data:
-                            delay = net_data[key_1]
-                        elif key_2 in net_data:
-                            delay = net_data[key_2]
-
-                    graph[i][j] = delay
-                    graph[j][i] = delay
-
-            shortest_delay = path.calc_net_delay(graph)
+                shortest_delay[i][i] = 0
             app.net_delay = {}
             for i in r_nodes:
                 id_i = self.input.nodes[i].id
@@ -261,6 +277,92 @@ class InputGenerator:
 
         return
 
+    def gen_network_graph(self, app):
+        """Generate the graph of the network delays of an application
+        between directly linked nodes
+        Args:
+            app (App): application of the generated input
+        Returns:
+            graph: adjacency matrix, INF if the nodes are not linked
+        """
+        r_nodes = range(self.nb_nodes)
+        graph = [[INF for j in r_nodes] for i in r_nodes]
+        for i in r_nodes:
+            graph[i][i] = 0
+
+        for i, j, delay in self.gen_network_links(app):
+            graph[i][j] = delay
+            graph[j][i] = delay
+
+        return graph
+
+    def gen_network_links(self, app):
+        """Generate the network delays of an application
+        between directly linked nodes
+        Args:
+            app (App): application of the generated input
+        Returns:
+            links: list of (i, j, delay) with the node indexes i < j,
+                   the delay is INF if the link type has no delay
+        """
+        app_type = self.input.app_types[app.type]
+        data = app_type.network
+        net_data = {}
+
+        for key, value in data.items():
+            net_data[key] = self._get_float_param(data[key])
+
+        links = []
+        for i, j in self.get_links():
+            node_i = self.input.nodes[i]
+            node_j = self.input.nodes[j]
+            delay = INF
+            key_1 = node_i.type + "_" + node_j.type
+            key_2 = node_j.type + "_" + node_i.type
+            if key_1 in net_data:
+                delay = net_data[key_1]
+            elif key_2 in net_data:
+                delay = net_data[key_2]
+            links.append((i, j, delay))
+
+        return links
+
+    def get_links(self):
+        """Get the pairs of directly linked nodes
+        Nodes of different types are linked, and nodes of the same type
+        are linked if they are neighbors in the map. The neighbors are
+        found by an index of the map coordinates, so the number of links
+        grows linearly with the number of base stations
+        Returns:
+            links: list of (i, j) node indexes, with i < j
+        """
+        if self._links is not None:
+            return self._links
+
+        nodes = self.input.nodes
+        types = {}
+        for i, node in enumerate(nodes):
+            types.setdefault(node.type, []).append(i)
+
+        links = set()
+        for type_1, indexes_1 in types.items():
+            for type_2, indexes_2 in types.items():
+                if type_1 < type_2:
+                    links.update((min(i, j), max(i, j))
+                                 for i in indexes_1 for j in indexes_2)
+
+        for indexes in types.values():
+            points = [nodes[i].point for i in indexes]
+            if any(p is None for p in points):
+                continue
+            neighbors = point.get_hex_neighbors(points)
+            for k, i in enumerate(indexes):
+                links.update((min(i, indexes[n]), max(i, indexes[n]))
+                             for n in neighbors[k])
+
+        self._links = sorted(links)
+        return self._links
+
     def _gen_users(self):
         nb_bs = self.nb_nodes - 2
         map_format = self.config["map"]['format']
@@ -273,43 +375,33 @@ class InputGenerator:
             bound_box = point.calc_hex_bound_box(nb_bs)
         self.input.bs_bound_box = bound_box
 
-        bs_nodes = self.input.get_bs_nodes()
+        bs_nodes = [bs for bs in self.input.get_bs_nodes()
+                    if bs.point is not None]
+        bs_pixels = point.to_pixels([bs.point for bs in bs_nodes])
+        bs_ids = np.array([bs.id for bs in bs_nodes], dtype=int)
         user_id = 0
         for app in self.input.apps:
             points = self._gen_points(app.nb_users, distributions, bound_box)
-            app.nb_node_users = {n.id: 0 for n in self.input.nodes}
-            app.users = []
-            for p in points:
-                min_dist = INF
-                selected_node = None
-                for bs in bs_nodes:
-                    dist = INF
-                    if bs.point is not None:
-                        dist = p.get_distance(bs.point)
-                    if dist < min_dist:
-                        min_dist = dist
-                        selected_node = bs
-
-                user = model.User()
-                user.id = user_id
-                user.app_id = app.id
-                user.node_id = selected_node.id
-                user.point = p
-                app.users.append(user)
-                app.nb_node_users[selected_node.id] += 1
-                user_id += 1
+            # each user is attached to the nearest base station
+            node_ids = bs_ids[point.get_nearest(points, bs_pixels)]
+            counts = np.bincount(node_ids, minlength=len(self.input.nodes))
+            app.nb_node_users = {n.id: int(counts[n.id])
+                                 for n in self.input.nodes}
+            app.set_users(points, node_ids, user_id)
+            user_id += len(points)
 
         return
 
     def _gen_points(self, nb_points, distributions, bound_box):
-        distribution = random.choice(distributions)
+        rng = self.rng
+        distribution = distributions[rng.integers(len(distributions))]
         if distribution == "blob":
-            points = point.gen_2d_points_blob(nb_points, bound_box)
+            points = point.gen_2d_points_blob(nb_points, bound_box, rng=rng)
         elif distribution == "circle":
-            points = point.gen_2d_points_circle(nb_points, bound_box)
+            points = point.gen_2d_points_circle(nb_points, bound_box, rng=rng)
         elif distribution == "moon":
-            points = point.gen_2d_points_moon(nb_points, bound_box)
+            points = point.gen_2d_points_moon(nb_points, bound_box, rng=rng)
         else:  # uniform
-            points = point.gen_2d_points_uniform(nb_points, bound_box)
+            points = point.gen_2d_points_uniform(nb_points, bound_box, rng=rng)
 
         return points
@@ -1,5 +1,8 @@
 import math
 import copy
+import hashlib
+import numpy as np
+from util import point
 
 INF = float("inf")
 CPU = "CPU"
@@ -37,6 +40,32 @@ class Input:
     def get_cpu_resource(self):
         return self.resources[CPU]
 
+    def get_fingerprint(self):
+        """Get a hash of the parameters of the apps and nodes
+        It identifies inputs with the same placement problem, e.g.,
+        copies of an input sent to other processes.
+        Users are represented only by their number per node
+        """
+        h = hashlib.sha1()
+        for node in self.nodes:
+            data = (node.id, node.type, node.availability,
+                    sorted(node.capacity.items()),
+                    sorted((r, sorted(c.items())) for r, c in node.cost.items()),
+                    sorted(node.power_consumption.items()))
+            h.update(repr(data).encode())
+        for app in self.apps:
+            data = (app.id, app.type, app.deadline, app.work_size,
+                    app.request_rate, app.max_instances, app.availability,
+                    sorted((r, sorted(d.items())) for r, d in app.demand.items()),
+                    sorted(app.nb_node_users.items()))
+            h.update(repr(data).encode())
+            # network delays are a dict or a matrix indexed by node ids
+            if isinstance(app.net_delay, dict):
+                h.update(repr(sorted(app.net_delay.items())).encode())
+            else:
+                h.update(np.ascontiguousarray(app.net_delay).tobytes())
+        return h.hexdigest()
+
     def filter(self, app_indexes=None, node_indexes=None):
         new_input = copy.copy(self)
 
@@ -86,7 +115,48 @@ class App:
         self.net_delay = {}
         self.nb_users = 0
         self.nb_node_users = {}
-        self.users = []
+        self.user_points = None
+        self.user_node_ids = None
+        self.first_user_id = 0
+        self._users = []
+
+    @property
+    def users(self):
+        """Users of the application, created on demand from user_points
+        """
+        if self._users is None:
+            self._users = self._create_users()
+        return self._users
+
+    @users.setter
+    def users(self, users):
+        self._users = users
+
+    def set_users(self, points, node_ids, first_user_id=0):
+        """Set the users of the application
+        Args:
+            points (numpy.ndarray): (n, 2) array with the location of each user
+            node_ids (numpy.ndarray): id of the node of each user
+            first_user_id (int): id of the first user
+        """
+        self.user_points = points
+        self.user_node_ids = node_ids
+        self.first_user_id = first_user_id
+        self._users = None
+
+    def _create_users(self):
+        users = []
+        if self.user_points is None:
+            return users
+        points = point.to_points(self.user_points)
+        for index, node_id in enumerate(self.user_node_ids.tolist()):
+            user = User()
+            user.id = self.first_user_id + index
+            user.app_id = self.id
+            user.node_id = node_id
+            user.point = points[index]
+            users.append(user)
+        return users
 
     def get_nb_users(self, node):
         return self.nb_node_users[node.id]
@@ -8,6 +8,30 @@ def calc_net_delay(graph):
     return floyd_warshall(graph)
 
 
+def calc_net_delay_sparse(nb_nodes, links):
+    """Calculate the shortest delays between all nodes of a sparse network
+    The links are stored in a CSR matrix and the paths are found by Dijkstra
+    from each source, in O(N (E + N) log N) instead of O(N^3)
+    Args:
+        nb_nodes (int): number of nodes
+        links (list): list of (i, j, delay) of the undirected links,
+                      links with INF delay are ignored
+    Returns:
+        dist: numpy matrix of the shortest delays, INF if there is no path
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import shortest_path
+
+    links = [(i, j, delay) for i, j, delay in links if delay != INF]
+    rows = np.array([link[0] for link in links], dtype=int)
+    cols = np.array([link[1] for link in links], dtype=int)
+    delays = np.array([link[2] for link in links], dtype=float)
+    # explicit zeros of the CSR matrix are kept as links of zero delay
+    graph = csr_matrix((delays, (rows, cols)), shape=(nb_nodes, nb_nodes))
+    return shortest_path(graph, method="D", directed=False)
+
+
 # Solves all pair shortest path via Floyd Warshall Algorithm
 def floyd_warshall(graph):
     # https://www.geeksforgeeks.org/dynamic-programming-set-16-floyd-warshall-algorithm/
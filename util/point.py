@@ -1,6 +1,5 @@
 import math
-import random
-from sklearn import datasets
+import numpy as np
 
 DEFAULT_HEX_SIZE = 1
 DEFAULT_NB_BLOBS = 4
@@ -114,6 +113,28 @@ class HexPoint(Point):
         return (abs(p1.x - p2.x) + abs(p1.y - p2.y) + abs(p1.z - p2.z)) / 2.0
 
 
+def get_hex_neighbors(points):
+    """Get the neighbors of each point of a hexagonal map
+    The points are indexed by their axial coordinates, so each point is
+    compared only with its six possible neighbors
+    Args:
+        points (list): list of HexPoint
+    Returns:
+        neighbors: list with the indexes of the neighbors of each point
+    """
+    index = {}
+    for i, p in enumerate(points):
+        index.setdefault((p.q, p.r), []).append(i)
+
+    neighbors = []
+    for p in points:
+        indexes = []
+        for neighbor in p.get_neighbors():
+            indexes += index.get((neighbor.q, neighbor.r), [])
+        neighbors.append(sorted(indexes))
+    return neighbors
+
+
 def gen_hex_map(nb_points, hex_size=DEFAULT_HEX_SIZE):
     # https://www.redblobgames.com/grids/hexagons/#range
     delta_sqrt = math.sqrt(9 + 12 * (nb_points - 1))
@@ -186,62 +207,163 @@ def calc_rect_bound_box(nb_points, hex_size=DEFAULT_HEX_SIZE):
     return [min_p, max_p]
 
 
-def gen_2d_points_blob(nb_points, bound_box, nb_centers=DEFAULT_NB_BLOBS, hex_size=DEFAULT_HEX_SIZE):
-    centers = 1 + random.randrange(nb_centers)
-    cluster_std = [hex_size * random.uniform(0.1, 1.0) for _ in range(centers)]
+def _get_rng(rng):
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng
+
+
+def to_points(points):
+    """Create the Point2D objects of an array of points
+    Args:
+        points (numpy.ndarray): (n, 2) array of x and y coordinates
+    Returns:
+        points: list of Point2D
+    """
+    return [Point2D(x, y) for x, y in np.asarray(points).tolist()]
+
+
+def to_pixels(points):
+    """Get the pixel coordinates of a list of points
+    Args:
+        points (list): list of Point2D or HexPoint
+    Returns:
+        pixels: (n, 2) array of x and y coordinates
+    """
+    pixels = [p.to_pixel() for p in points]
+    return np.array([[p.x, p.y] for p in pixels], dtype=float).reshape(-1, 2)
+
+
+def get_nearest(points, centers):
+    """Get the nearest center of each point by the euclidean distance
+    Args:
+        points (numpy.ndarray): (n, 2) array of points
+        centers (numpy.ndarray): (m, 2) array of centers
+    Returns:
+        indexes: array with the index of the nearest center of each point,
+                 the first one in case of ties
+    """
+    points = np.asarray(points, dtype=float)
+    nearest = np.zeros(len(points), dtype=int)
+    min_dist = np.full(len(points), np.inf)
+    for index, (x, y) in enumerate(np.asarray(centers, dtype=float)):
+        dist = np.sqrt((points[:, 0] - x) ** 2 + (points[:, 1] - y) ** 2)
+        closer = dist < min_dist
+        nearest[closer] = index
+        min_dist[closer] = dist[closer]
+    return nearest
+
+
+def _split(nb_points, nb_groups):
+    """Split points in groups of almost equal size, the first groups
+    receive the remaining points
+    """
+    sizes = np.full(nb_groups, nb_points // nb_groups)
+    sizes[:nb_points % nb_groups] += 1
+    return sizes
+
+
+def gen_2d_points_blob(nb_points, bound_box, nb_centers=DEFAULT_NB_BLOBS,
+                       hex_size=DEFAULT_HEX_SIZE, rng=None):
+    """Generate points of isotropic Gaussian blobs
+    Args:
+        nb_points (int): number of points
+        bound_box (list): minimum and maximum Point2D of the points
+        nb_centers (int): maximum number of blobs
+        hex_size (float): size of the hexagons of the map
+        rng (numpy.random.Generator): random generator
+    Returns:
+        points: (nb_points, 2) array of points
+    """
+    rng = _get_rng(rng)
+    centers = 1 + int(rng.integers(nb_centers))
+    cluster_std = hex_size * rng.uniform(0.1, 1.0, size=centers)
     # cluster_std = 1.0
     center_box = [max(bound_box[0].x, bound_box[0].y),
                   min(bound_box[1].x, bound_box[1].y)]
+    center_points = rng.uniform(center_box[0], center_box[1],
+                                size=(centers, 2))
 
-    points, labels = datasets.make_blobs(n_samples=nb_points, n_features=2,
-                                         cluster_std=cluster_std, centers=centers,
-                                         center_box=center_box)
+    labels = np.repeat(np.arange(centers), _split(nb_points, centers))
+    points = (center_points[labels]
+              + rng.normal(size=(nb_points, 2)) * cluster_std[labels, np.newaxis])
+    points = points[rng.permutation(nb_points)]
     return _bound_points(points, bound_box)
 
 
-def gen_2d_points_uniform(nb_points, bound_box, hex_size=DEFAULT_HEX_SIZE):
-    points = [[random.uniform(bound_box[0].x, bound_box[1].x),
-               random.uniform(bound_box[0].y, bound_box[1].y)]
-              for _ in range(nb_points)]
+def gen_2d_points_uniform(nb_points, bound_box, hex_size=DEFAULT_HEX_SIZE, rng=None):
+    """Generate points uniformly distributed in the bounding box
+    Returns:
+        points: (nb_points, 2) array of points
+    """
+    rng = _get_rng(rng)
+    low = [bound_box[0].x, bound_box[0].y]
+    high = [bound_box[1].x, bound_box[1].y]
+    points = rng.uniform(low, high, size=(nb_points, 2))
     return _bound_points(points, bound_box)
 
 
-def gen_2d_points_circle(nb_points, bound_box):
-    center_x = random.uniform(bound_box[0].x, bound_box[1].x / 2.0)
-    center_y = random.uniform(bound_box[0].y, bound_box[1].y / 2.0)
-    noise = random.uniform(0.0, 0.05)
+def gen_2d_points_circle(nb_points, bound_box, rng=None):
+    """Generate points of two concentric circles with noise
+    Returns:
+        points: (nb_points, 2) array of points
+    """
+    rng = _get_rng(rng)
+    center_x = rng.uniform(bound_box[0].x, bound_box[1].x / 2.0)
+    center_y = rng.uniform(bound_box[0].y, bound_box[1].y / 2.0)
+    noise = rng.uniform(0.0, 0.05)
     width = bound_box[1].x - bound_box[0].x
     height = bound_box[1].y - bound_box[0].y
-    scale = [width * random.uniform(0.1, 1.0), height * random.uniform(0.1, 1.0)]
-    factor = random.random()
-
-    points, labels = datasets.make_circles(n_samples=nb_points, noise=noise,
-                                           factor=factor)
-    points = map(lambda p: [(p[0] + 1) / 2.0, (p[1] + 1) / 2.0], points)
-    points = map(lambda p: [p[0] * scale[0] + center_x, p[1] * scale[1] + center_y], points)
+    scale = [width * rng.uniform(0.1, 1.0), height * rng.uniform(0.1, 1.0)]
+    factor = rng.random()
+
+    nb_outer = nb_points // 2
+    nb_inner = nb_points - nb_outer
+    outer = np.linspace(0.0, 2.0 * np.pi, nb_outer, endpoint=False)
+    inner = np.linspace(0.0, 2.0 * np.pi, nb_inner, endpoint=False)
+    points = np.empty((nb_points, 2))
+    points[:nb_outer, 0] = np.cos(outer)
+    points[:nb_outer, 1] = np.sin(outer)
+    points[nb_outer:, 0] = factor * np.cos(inner)
+    points[nb_outer:, 1] = factor * np.sin(inner)
+    points += rng.normal(scale=noise, size=(nb_points, 2))
+
+    points = (points + 1) / 2.0
+    points = points * scale + [center_x, center_y]
     return _bound_points(points, bound_box)
 
 
-def gen_2d_points_moon(nb_points, bound_box):
-    center_x = random.uniform(bound_box[0].x, bound_box[1].x / 2.0)
-    center_y = random.uniform(bound_box[0].y, bound_box[1].y / 2.0)
-    noise = random.uniform(0.0, 0.05)
+def gen_2d_points_moon(nb_points, bound_box, rng=None):
+    """Generate points of two interleaving half circles with noise
+    Returns:
+        points: (nb_points, 2) array of points
+    """
+    rng = _get_rng(rng)
+    center_x = rng.uniform(bound_box[0].x, bound_box[1].x / 2.0)
+    center_y = rng.uniform(bound_box[0].y, bound_box[1].y / 2.0)
+    noise = rng.uniform(0.0, 0.05)
     width = bound_box[1].x - bound_box[0].x
     height = bound_box[1].y - bound_box[0].y
-    scale = [width * random.uniform(0.1, 1.0), height * random.uniform(0.1, 1.0)]
-
-    points, labels = datasets.make_moons(n_samples=nb_points, noise=noise)
-    points = map(lambda p: [(p[0] + 1) / 3.0, (p[1] + 0.5) / 1.5], points)
-    points = map(lambda p: [p[0] * scale[0] + center_x, p[1] * scale[0] + center_y], points)
+    scale = [width * rng.uniform(0.1, 1.0), height * rng.uniform(0.1, 1.0)]
+
+    nb_outer = nb_points // 2
+    nb_inner = nb_points - nb_outer
+    outer = np.linspace(0.0, np.pi, nb_outer)
+    inner = np.linspace(0.0, np.pi, nb_inner)
+    points = np.empty((nb_points, 2))
+    points[:nb_outer, 0] = np.cos(outer)
+    points[:nb_outer, 1] = np.sin(outer)
+    points[nb_outer:, 0] = 1.0 - np.cos(inner)
+    points[nb_outer:, 1] = 1.0 - np.sin(inner) - 0.5
+    points += rng.normal(scale=noise, size=(nb_points, 2))
+
+    points[:, 0] = (points[:, 0] + 1) / 3.0
+    points[:, 1] = (points[:, 1] + 0.5) / 1.5
+    points = points * scale[0] + [center_x, center_y]
     return _bound_points(points, bound_box)
 
 
 def _bound_points(points, bound_box):
-    def _bound(point):
-        x = point[0]
-        y = point[1]
-
-        x = max(bound_box[0].x, min(bound_box[1].x, x))
-        y = max(bound_box[0].y, min(bound_box[1].y, y))
-        return Point2D(x, y)
-    return [_bound(p) for p in points]
+    low = [bound_box[0].x, bound_box[0].y]
+    high = [bound_box[1].x, bound_box[1].y]
+    return np.clip(np.asarray(points, dtype=float).reshape(-1, 2), low, high)
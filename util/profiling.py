@@ -0,0 +1,173 @@
+import argparse
+import cProfile
+import glob
+import os
+import pstats
+import shutil
+import signal
+import tempfile
+import tracemalloc
+import multiprocessing as mp
+import multiprocessing.util
+
+# number of functions printed in the profile summary
+PROFILE_LIMIT = 30
+PROFILE_SORT = "cumulative"
+# number of lines printed in the memory summary
+MEMORY_LIMIT = 20
+# number of frames of the traceback stored by tracemalloc
+MEMORY_FRAMES = 10
+MEMORY_EXTENSION = ".tracemalloc"
+
+
+def parse_args(args):
+    """Get the profiling options of the arguments of an entry point
+    Args:
+        args (list): command line arguments
+    Returns:
+        profiler: Profiler object, it does nothing if no option is set
+        args: the other arguments
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-out", default=None)
+    parser.add_argument("--trace-memory", action="store_true")
+    options, args = parser.parse_known_args(args)
+    profiler = Profiler(profile=options.profile or bool(options.profile_out),
+                        filename=options.profile_out,
+                        trace_memory=options.trace_memory)
+    return profiler, args
+
+
+def _get_mp_modules():
+    """Get the multiprocessing modules used by the solvers and the runner,
+    i.e., multiprocessing and multiprocess of pathos
+    """
+    modules = [mp]
+    try:
+        import multiprocess
+        import multiprocess.util
+        modules.append(multiprocess)
+    except ImportError:
+        pass
+    return modules
+
+
+def _after_fork(profiler):
+    profiler._start_child()
+
+
+class Profiler():
+    """Profiler of the execution of an experiment
+    The functions are profiled by cProfile in the main process and in the
+    forked processes, e.g., the GA pools and the pathos workers of the
+    runner. Each process saves its profile when it finishes and the main
+    process merges them into a summary sorted by cumulative time.
+    The memory allocations of the main process are traced by tracemalloc
+    """
+
+    def __init__(self, profile=False, filename=None, trace_memory=False):
+        """Initialize method
+        Args:
+            profile (bool): whether the functions are profiled
+            filename (str): file of the merged profile in pstats format,
+                            the memory snapshot is saved in the same file
+                            with the MEMORY_EXTENSION
+            trace_memory (bool): whether the memory allocations are traced
+        """
+        self.profile = profile
+        self.filename = filename
+        self.trace_memory = trace_memory
+        self._profile = None
+        self._dirname = None
+        self._dumped = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start(MEMORY_FRAMES)
+        if self.profile:
+            self._dirname = tempfile.mkdtemp(prefix="profile_")
+            for module in _get_mp_modules():
+                module.util.register_after_fork(self, _after_fork)
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def _start_child(self):
+        """Start the profile of a forked process
+        The profile is saved when the process exits or is terminated
+        """
+        if self._profile is not None:
+            self._profile.disable()
+        self._dumped = False
+        for module in _get_mp_modules():
+            module.util.Finalize(None, self._dump_child, exitpriority=100)
+
+        def terminate(signum, frame):
+            self._dump_child()
+            os._exit(0)
+
+        signal.signal(signal.SIGTERM, terminate)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _dump_child(self):
+        if self._dumped:
+            return
+        self._dumped = True
+        self._profile.disable()
+        # a process terminated while saving its profile ends after the save
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        filename = os.path.join(self._dirname, "{}.prof".format(os.getpid()))
+        self._profile.dump_stats(filename + ".tmp")
+        os.replace(filename + ".tmp", filename)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+
+    def _stop_workers(self):
+        """Terminate the pools still alive, e.g., the pathos pool of the
+        runner, as it is done at exit, so their workers save their profiles
+        """
+        for module in _get_mp_modules():
+            module.util._run_finalizers(0)
+
+    def stop(self):
+        """Stop the profile and print the summaries
+        """
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__)])
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print("memory: {:.1f} MiB current, {:.1f} MiB peak".format(
+                  current / 2.0**20, peak / 2.0**20))
+            top_stats = snapshot.statistics("lineno")
+            for stat in top_stats[:MEMORY_LIMIT]:
+                print("\t {}".format(stat))
+            if self.filename:
+                snapshot.dump(self.filename + MEMORY_EXTENSION)
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._stop_workers()
+            stats = pstats.Stats(self._profile)
+            filenames = glob.glob(os.path.join(self._dirname, "*.prof"))
+            for filename in sorted(filenames):
+                stats.add(filename)
+            shutil.rmtree(self._dirname, ignore_errors=True)
+            # the temporary files are not listed in the summary
+            stats.files = []
+            self._profile = None
+
+            print("profile of {} processes".format(len(filenames) + 1))
+            stats.sort_stats(PROFILE_SORT).print_stats(PROFILE_LIMIT)
+            if self.filename:
+                stats.dump_stats(self.filename)
+                print("profile saved in {}".format(self.filename))